@@ -1,24 +1,37 @@
 # main.py
 
-from playwright.sync_api import sync_playwright
 import time
-import pandas as pd
 import ujson as json
-import re
 import os
 from pathlib import Path
-from utilities.logger import setup_logger
-from utilities.wait_for_loader_to_disappear import wait_for_loader_to_disappear
-from utilities.perform_search import perform_search
-from utilities.extract_table_data import extract_table_data
-from utilities.extract_directors import extract_directors
+from utilities.logger import setup_logger, set_log_levels, open_progress, log_progress, close_progress
+from utilities.perform_search import negotiate_page_size
+from utilities.extract_row_counts import extract_row_counts
+from utilities.extract_table_data import extract_table_data, raw_output_file_name
+from utilities.director_lookup import lookup_directors, open_director_tab, close_director_tab, last_lookup_error
+from utilities.director_pool import fetch_directors_concurrently
+from utilities.browser_profile import log_blocked_requests
+from utilities.run_metrics import timed, record_sample, count_playwright_calls, write_run_metrics
+from utilities.browser_session import open_browser_session, close_browser_session, ensure_browser_session, start_search
+from utilities.state_scheduler import schedule_states, report_progress
+from utilities.wait_strategy import get_wait_profile, click_next_page, jump_to_page, log_wait_savings
+from utilities.run_state_store import open_run_state, get_search, record_page, missing_pages, page_files, pending_borrowers, count_fetched_borrowers, record_director_batch, export_page, find_search, queue_failure, resolve_retries, search_page_plan, page_plan_matches
+from utilities.retry_pass import run_retry_pass, queued_retry_count
+from utilities.quarter_delta import carry_forward_directors
+from utilities.director_cache import CACHE_FILE_NAME, open_director_cache, apply_cached_directors, coalesce_pending, store_directors, count_misses, close_director_cache, log_director_cache_stats
+from utilities.director_log import replay_director_logs, open_director_checkpoints, checkpoint_directors, finish_director_page, close_director_checkpoints
+import multiprocessing
 from utilities.merger import merge_data
 from utilities.cleaner import cleaner
-from utilities.is_website_issue import is_website_issue
+from utilities.throttle import open_throttle, throttle_slot, log_throttle_stats
+from utilities.grid_client import record_grid_requests, stop_grid_recording, prepare_direct_fetch, create_grid_session, fetch_pages_direct, capture_director_request, fetch_directors_direct, direct_page_plan
 import sys, os
 
 logger = setup_logger()
 
+SITE_URL = "https://suit.cibil.com/"
+MAX_CONSECUTIVE_PAGE_FAILURES = 3
+
 def load_json_config(filename):
     """
     Always load JSON dynamically from external 'configurations' folder
@@ -71,161 +84,208 @@ logger.info(f"Write path: {write_path}")
 os.environ["PLAYWRIGHT_BROWSERS_PATH"] = os.path.join(read_path, "ms-playwright")
 
 
-# ----------------- Director Extraction -----------------
-def extract_directors_from_href(page, href_js, raw_output_folder, timeout_ms:int = 60000):
-    try:
-        page.evaluate(href_js)
-        page.wait_for_load_state("networkidle")
-        wait_for_loader_to_disappear(page, logger, timeout_ms)
-        time.sleep(1)
-        director_data = extract_directors(page, logger)
-        logger.info("Successfully extracted director data.")
-        return director_data
-    except Exception as e:
-        logger.error(f"⚠️ Error parsing or fetching directors: {e}", exc_info=True)
-        response_text = page.content()
-        if is_website_issue(response_text):
-            logger.info("Website crashed, wait and retry later.")
-        else:
-            logger.info("Website response looks fine, wait and retry later.")
-        return []
-
 # ----------------- Main Run -----------------
-def run(date, state, defaulters_type, raw_output_folder, timeout_ms:int = 60000):    
+def run(date, state, defaulters_type, raw_output_folder, timeout_ms:int = 60000, bulk_extraction:bool = True, fetch_mode:str = "browser", http_pool_size:int = 8, direct_page_size:int = 0, director_concurrency:int = 1, progress=None, wait_profile:str = "safe", director_checkpoint_every:int = 20, delta_from_date:str = "", delta_change_columns=("totalAmount",), director_cache_file:str = "", director_cache_ttl_days:int = 0, director_cache_scope:str = "quarter", director_lookup_mode:str = "navigate", browser_profile:str = "visible", browser_session=None, max_page_size:int = 10000, adaptive_throttle:bool = True, throttle_failure_threshold:int = 5, throttle_open_seconds:int = 30, throttle_latency_target_s:float = 0.0, retry_max_attempts:int = 3, retry_only:bool = False, site_url:str = SITE_URL):
+    """
+    Scrapes one state. With `browser_session` (see utilities.browser_session) the shared
+    browser is used and left open for the next state; otherwise a browser is launched and
+    closed for this state alone. With `retry_only` only the state's retry queue is processed
+    (see utilities.retry_pass), and no browser is started when nothing is queued.
+    """
     cibil_link_files = []
     logger.info(f'Running automation for State: {state}, Date: {date}, Defaulters type: {defaulters_type}')
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=200)
-        context = browser.new_context()
-        page = context.new_page()
-        logger.info("Browser launched.")
-
-        page.goto("https://suit.cibil.com/", timeout=timeout_ms, wait_until="load")
-        logger.info("Page loaded.")
+    report_progress(progress, state)
+    count_playwright_calls()
+    state_start_time = time.time()
+    # Closed in the finally below, also when a state attempt fails and the scheduler retries it
+    conn = open_run_state(raw_output_folder)
+    director_cache = None
+    live_session = None
+    grid_capture = []
+    nothing_queued = False
+    try:
+        if retry_only:
+            search_id = find_search(conn, date, defaulters_type, state)
+            if search_id is not None:
+                resolve_retries(conn, search_id)
+            if not (queued_retry_count(conn, search_id) if search_id is not None else 0):
+                logger.info(f"Nothing queued for retry for {state}.")
+                nothing_queued = True
+                return
+        live_session = browser_session or open_browser_session(logger, browser_profile)
+        context, page = live_session["context"], live_session["page"]
+
+        wait_profile_settings = get_wait_profile(wait_profile)
+        direct_fetch = fetch_mode == "direct"
+        # Shared by the page and director workers below; see utilities.throttle
+        throttle = open_throttle(logger, max(http_pool_size if direct_fetch else 1, director_concurrency), throttle_failure_threshold, throttle_open_seconds, latency_target_s=throttle_latency_target_s) if adaptive_throttle else None
+        grid_capture = record_grid_requests(page, logger) if direct_fetch else []
 
         # perform_search(page, date, state)
-        pagination_limit = perform_search(page, logger, date, state, defaulters_type, timeout_ms)
+        with timed("search"):
+            pagination_limit = start_search(live_session, logger, site_url, date, state, defaulters_type, timeout_ms, wait_profile)
+        if max_page_size and int(pagination_limit) > 1:
+            with timed("page_size"):
+                pagination_limit = negotiate_page_size(page, logger, max_page_size, wait_profile, timeout_ms)
+        # Rows per page and in total, stored with the search so saved pages can be checked against them
+        grid_page_size, grid_records = extract_row_counts(page, logger, timeout_ms) if int(pagination_limit) > 0 else (0, 0)
         logger.info(f"Pagination limit: {pagination_limit}")
+        report_progress(progress, state, total_pages=int(pagination_limit))
+
+        if retry_only:
+            search_id = find_search(conn, date, defaulters_type, state)
+            retry_pages = page_plan_matches(search_page_plan(conn, search_id), (int(pagination_limit), grid_page_size, grid_records))
+            if not retry_pages:
+                logger.warning(f"⚠️ Page plan for {state} changed since the failures were queued, only director rows are retried.")
+            director_cache = open_director_cache(director_cache_file, date, director_cache_ttl_days, director_cache_scope)
+            with timed("retry_pass"):
+                run_retry_pass(page, logger, conn, search_id, date, defaulters_type, state, raw_output_folder, director_cache, timeout_ms, wait_profile, bulk_extraction, director_checkpoint_every, retry_max_attempts, throttle, retry_pages)
+            log_throttle_stats(logger, throttle, state)
+            return
 
         # files_in_parent = os.listdir(raw_output_folder)
         # existing_files_for_state = [f for f in files_in_parent if state in f and f.endswith(".xlsx")]
-        existing_files_for_state = [
-            os.path.join(raw_output_folder, f)
-            for f in os.listdir(raw_output_folder)
-            if state.lower() in f.lower() and f.endswith(".xlsx")
-        ]
-
-        if existing_files_for_state and len(existing_files_for_state) == int(pagination_limit):
+        direct_setup = prepare_direct_fetch(page, logger, grid_capture) if direct_fetch and int(pagination_limit) > 0 else None
+
+        direct_done = False
+        if direct_setup:
+            # Direct pages follow direct_page_size, so the store tracks them under the direct page count
+            grid_entry, templates, col_model = direct_setup
+            page_size, page_count, records = direct_page_plan(grid_entry, direct_page_size)
+            search_id = get_search(conn, logger, raw_output_folder, date, defaulters_type, state, page_count, page_size, records)
+            session = create_grid_session(page, grid_entry, http_pool_size)
+            with timed("direct_pages"):
+                saved_pages, failed = fetch_pages_direct(session, logger, grid_entry, templates, col_model, date, defaulters_type, state, raw_output_folder, missing_pages(conn, search_id, page_count), page_size, http_pool_size, timeout_ms, throttle)
+            for page_no, (file_name, df) in saved_pages.items():
+                record_page(conn, search_id, page_no, file_name, df)
+            report_progress(progress, state, pages=page_count - len(missing_pages(conn, search_id, page_count)), total_pages=page_count)
+            direct_done = not failed
+        if direct_fetch and not direct_done:
+            logger.warning(f"⚠️ Direct fetch incomplete for {state}, falling back to browser pagination.")
+
+        if not direct_done:
+            search_id = get_search(conn, logger, raw_output_folder, date, defaulters_type, state, int(pagination_limit), grid_page_size, grid_records)
+
+        if direct_done:
+            logger.info(f"Raw Data for {state} fetched directly from the grid endpoint.")
+
+        elif not missing_pages(conn, search_id, int(pagination_limit)) and int(pagination_limit) > 0:
             logger.info(f"Raw Data for {state} already exists. Skipping raw table extraction.")
-            cibil_link_files = existing_files_for_state.copy()
+            report_progress(progress, state, pages=int(pagination_limit))
         
         else:
-            for i in range(1, int(pagination_limit)+1):
-                page_no = i
-                if any(f'page_{page_no}' in f for f in existing_files_for_state):
-                    logger.info(f"Data for {state}, page {page_no} already exists. Skipping page extraction.")
-                    next_button = page.locator('td#next_pagingDiv')
-                    # Check if it is enabled
-                    if 'ui-state-disabled' not in next_button.get_attribute('class'):
-                        next_button.click()
-                        time.sleep(0.5)
-                        # Wait for loader to appear and then disappear
-                        try:
-                            loader = page.locator('div#load_projectTable')
-                            loader.wait_for(state='visible', timeout=timeout_ms)  # wait if it appears
-                        except:
-                            pass  # loader may not appear sometimes
-                        page.wait_for_load_state("networkidle")
-                        time.sleep(1)
-                    else:
-                        logger.info("▶ Next button is disabled, reached last page.")
-                    # page.locator('td#next_pagingDiv').click()
-                    page.wait_for_load_state("networkidle")
-                    time.sleep(2)
-                    continue
-                
-                cibil_df = extract_table_data(page, logger, date, defaulters_type, state, page_no, cibil_link_files, raw_output_folder, timeout_ms)
-                if cibil_df.empty:
-                    logger.info(f"No data for {state}, skipping director extraction")
+            pages_to_fetch = missing_pages(conn, search_id, int(pagination_limit))
+            report_progress(progress, state, pages=int(pagination_limit) - len(pages_to_fetch))
+            logger.info(f"Pages to fetch for {state}: {pages_to_fetch}")
+            current_page = 1
+            consecutive_failures = 0
+            for page_no in pages_to_fetch:
+                try:
+                    with throttle_slot(throttle):
+                        # Move to the page: Next for the following page, a direct jump past completed ones
+                        if page_no == current_page + 1:
+                            with timed("next_page"):
+                                if not click_next_page(page, logger, wait_profile_settings, timeout_ms):
+                                    # Saving the grid now would store the previous page again as page_no
+                                    raise Exception("Next did not move the grid to a new page")
+                        elif page_no != current_page:
+                            with timed("jump_page"):
+                                jump_to_page(page, logger, page_no, wait_profile_settings, page_no - current_page - 1, timeout_ms)
+                        current_page = page_no
+
+                        with timed("extract_page"):
+                            cibil_df = extract_table_data(page, logger, date, defaulters_type, state, page_no, cibil_link_files, raw_output_folder, timeout_ms, bulk_extraction)
+                    if cibil_df.empty:
+                        raise Exception("no data rows")
+                except Exception as e:
+                    # Queued for the retry pass; a run of failures means the page itself is gone, so the state is retried
+                    queue_failure(conn, search_id, "page", page_no, -1, e, retry_max_attempts)
+                    consecutive_failures += 1
+                    if consecutive_failures >= MAX_CONSECUTIVE_PAGE_FAILURES:
+                        raise
+                    logger.warning(f"⚠️ Page {page_no} of {state} failed ({e}), queued for the retry pass.")
+                    current_page = -1  # position unknown, jump to the next page
                     continue
-
-                next_button = page.locator('td#next_pagingDiv')
-                # Check if it is enabled
-                if 'ui-state-disabled' not in next_button.get_attribute('class'):
-                    next_button.click()
-                    # Wait for loader to appear and then disappear
-                    try:
-                        loader = page.locator('div#load_projectTable')
-                        loader.wait_for(state='visible', timeout=timeout_ms)  # wait if it appears
-                    except:
-                        pass  # loader may not appear sometimes
-                    page.wait_for_load_state("networkidle")
-                    time.sleep(1)
-                else:
-                    logger.info("▶ Next button is disabled, reached last page.")
-                # page.locator('td#next_pagingDiv').click()
-                page.wait_for_load_state("networkidle")
-                time.sleep(2)
+                consecutive_failures = 0
+                record_page(conn, search_id, page_no, raw_output_file_name(date, defaulters_type, state, page_no), cibil_df)
+                report_progress(progress, state, pages=1, rows=len(cibil_df))
 
         # ----------------- Extract directors row by row -----------------
-        state_files = [
-            os.path.join(raw_output_folder, f)
-            for f in os.listdir(raw_output_folder)
-            if f.lower().endswith(".xlsx") and state.lower() in f.lower()
-        ]
+        state_files = page_files(conn, search_id, raw_output_folder)
         if not state_files:
             logger.warning(f"⚠️ No raw Excel files found for state: {state}")
             return
         
-        logger.info(f"Found {len(state_files)} raw Excel files for {state}")
-
-        for i, file_name in enumerate(state_files):
-            df_for_director_fetch = pd.read_excel(file_name)
-            if "directors_data" not in df_for_director_fetch.columns:
-                df_for_director_fetch["directors_data"] = [[] for _ in range(len(df_for_director_fetch))]
-            if "directors_presence" not in df_for_director_fetch.columns:
-                df_for_director_fetch["directors_presence"] = "not fetched"
-
-            # df_for_director_fetch["directors_data"] = [[] for _ in range(len(df_for_director_fetch))]
-            for idx, row in df_for_director_fetch.iterrows():
-                if str(df_for_director_fetch.at[idx, "directors_presence"]).lower().strip() == 'fetched':
-                # if df_for_director_fetch.at[idx, "directors_presence"].lower() == 'fetched':
-                    logger.info(f"Directors already extracted for row {idx+1}, skipping...")
-                    continue
-                href = row.get("directorName_href", "")
-                if isinstance(href, str) and href.startswith("javascript:getDirctorList"):
-                    logger.info(f"▶ Extracting directors for row {idx+1}: {row.get('borrowerName','')}")
-                    # if df_for_director_fetch.at[idx, "directors_presence"] == 1:
-                    directors = extract_directors_from_href(page, href, raw_output_folder, timeout_ms)
-                    df_for_director_fetch.at[idx, "directors_data"] = directors
-                    if directors or len(directors) > 0:
-                        df_for_director_fetch.at[idx, "directors_presence"] = 'fetched'
-
-                    try:
-                        page.go_back(timeout=60000)
-                        page.wait_for_load_state("networkidle")
-                        wait_for_loader_to_disappear(page, logger, timeout_ms)
-                        time.sleep(1)
-                    except Exception:
-                        logger.info("⚠️ Could not navigate back, reloading page...")
-                        # Reload the page and re-perform the search to restore state
-                        page.reload()
-                        page.wait_for_load_state("networkidle")
-                        wait_for_loader_to_disappear(page, logger, timeout_ms)
-                        time.sleep(1)
-                        logger.info("🔄 Page reloaded successfully.")
-                
-                if (idx+1) % 5 == 0:
-                    df_for_director_fetch.to_excel(file_name, index=False)
-                    logger.info(f"Checkpoint saved at row {idx+1} for {file_name}")
-
-            df_for_director_fetch.to_excel(file_name, index=False)
-            logger.info(f"✅ Updated raw file saved with director info → {file_name}")
-
-        browser.close()
+        replay_director_logs(conn, logger, search_id, raw_output_folder)
+        if delta_from_date:
+            carry_forward_directors(logger, conn, search_id, raw_output_folder, date, delta_from_date, defaulters_type, state, delta_change_columns)
+        # Cached hrefs are filled straight away and every remaining href is looked up once
+        director_cache = open_director_cache(director_cache_file, date, director_cache_ttl_days, director_cache_scope)
+        pending = apply_cached_directors(logger, director_cache, conn, search_id, raw_output_folder, pending_borrowers(conn, search_id))
+        pending = coalesce_pending(pending)
+        logger.info(f"Found {len(state_files)} raw Excel files for {state}, {len(pending)} unique director lookups pending, skipped {count_fetched_borrowers(conn, search_id):,} already-fetched rows")
+
+        if direct_fetch and pending:
+            director_setup = capture_director_request(page, logger, pending[0][2], timeout_ms)
+            if director_setup:
+                director_template, director_col_model = director_setup
+                session = create_grid_session(page, director_template["entry"], http_pool_size)
+                with timed("direct_directors"):
+                    direct_results = fetch_directors_direct(session, logger, director_template, director_col_model, pending, http_pool_size, timeout_ms, throttle)
+                count_misses(director_cache, len(pending))
+                hrefs = {(page_no, row_idx): href for page_no, row_idx, href, _ in pending}
+                for page_no, row_idx, directors in direct_results:
+                    store_directors(director_cache, hrefs[(page_no, row_idx)], directors)
+                record_director_batch(conn, search_id, direct_results)
+                for page_no in sorted({page_no for page_no, _, _ in direct_results}):
+                    logger.info(f"✅ Updated raw file saved with director info → {export_page(conn, search_id, page_no, raw_output_folder)}")
+                pending = coalesce_pending(apply_cached_directors(logger, director_cache, conn, search_id, raw_output_folder, pending_borrowers(conn, search_id)))
+
+        if director_concurrency > 1:
+            fetch_directors_concurrently(logger, conn, search_id, raw_output_folder, pending, director_concurrency, live_session["profile"], site_url, date, state, defaulters_type, timeout_ms, wait_profile=wait_profile, checkpoint_every=director_checkpoint_every, cache=director_cache, throttle=throttle, max_attempts=retry_max_attempts)
+        else:
+            # Results go to an append-only page log; the page file is exported once the page is done
+            checkpoints = open_director_checkpoints(conn, search_id, raw_output_folder, director_checkpoint_every)
+            director_tab = open_director_tab(context, logger, site_url, date, state, defaulters_type, timeout_ms, wait_profile) if director_lookup_mode == "tab" and pending else None
+            current_page_no = None
+            director_progress = open_progress(logger, f"Director lookups for {state}", len(pending))
+            for page_no, row_idx, href, borrower_name in pending:
+                if current_page_no is not None and page_no != current_page_no:
+                    logger.info(f"✅ Updated raw file saved with director info → {finish_director_page(checkpoints, current_page_no)}")
+                current_page_no = page_no
+
+                directors = lookup_directors(page, logger, href, director_cache, timeout_ms, wait_profile, director_tab, throttle)
+                checkpoint_directors(checkpoints, page_no, row_idx, directors)
+                if not directors:
+                    queue_failure(conn, search_id, "director", page_no, row_idx, last_lookup_error(), retry_max_attempts)
+                log_progress(director_progress, "fetched" if directors else "empty", f"Directors for page {page_no}, row {row_idx+1}: {borrower_name} ({len(directors)})")
+            close_director_tab(director_tab)
+            close_progress(director_progress)
+
+            for file_name in close_director_checkpoints(checkpoints):
+                logger.info(f"✅ Updated raw file saved with director info → {file_name}")
+
+        # Rows sharing an href with a row looked up above
+        apply_cached_directors(logger, director_cache, conn, search_id, raw_output_folder, pending_borrowers(conn, search_id))
+        with timed("retry_pass"):
+            run_retry_pass(page, logger, conn, search_id, date, defaulters_type, state, raw_output_folder, director_cache, timeout_ms, wait_profile, bulk_extraction, director_checkpoint_every, retry_max_attempts, throttle)
+        log_director_cache_stats(logger, director_cache, state)
+        log_wait_savings(logger)
+        log_blocked_requests(logger)
+        log_throttle_stats(logger, throttle, state)
+    finally:
+        stop_grid_recording(grid_capture)
+        if director_cache is not None:
+            close_director_cache(director_cache)
+        conn.close()
+        if live_session is not None and browser_session is None:
+            close_browser_session(live_session)
+        if not nothing_queued:
+            record_sample("state_total", time.time() - state_start_time, state_start_time)
+            write_run_metrics(logger, state)
 
 # ----------------- Entry Point -----------------
-def data_search():
+def data_search(retry_only:bool = False):
     # # When running from .exe, this ensures it finds the bundled browsers
     # os.environ["PLAYWRIGHT_BROWSERS_PATH"] = os.path.join(os.getcwd(), "ms-playwright")
 
@@ -240,8 +300,33 @@ def data_search():
     defaulters_type = search_details.get("defaulters_type", "1 crore")
     state_selection = search_details.get("state_selection", "state")
     timeout_seconds = int(search_details.get("timeout(seconds)", 60))
+    bulk_extraction = search_details.get("table_extraction_mode", "bulk").strip().lower() == "bulk"
+    fetch_mode = search_details.get("fetch_mode", "browser").strip().lower()
+    http_pool_size = int(search_details.get("http_pool_size", 8))
+    direct_page_size = int(search_details.get("direct_page_size", 0))
+    director_concurrency = int(search_details.get("director_concurrency", 1))
+    state_concurrency = int(search_details.get("state_concurrency", 1))
+    state_retries = int(search_details.get("state_retries", 2))
+    state_retry_backoff = int(search_details.get("state_retry_backoff(seconds)", 30))
+    wait_profile = search_details.get("wait_profile", "safe").strip().lower()
+    director_checkpoint_every = int(search_details.get("director_checkpoint_every", 20))
+    delta_from_date = search_details.get("delta_from_date", "").strip()
+    delta_change_columns = [c.strip() for c in search_details.get("delta_change_columns", "totalAmount").split(",") if c.strip()]
+    director_cache_enabled = search_details.get("director_cache", "true").strip().lower() == "true"
+    director_cache_ttl_days = int(search_details.get("director_cache_ttl_days", 0))
+    director_cache_scope = search_details.get("director_cache_scope", "quarter").strip().lower()
+    director_lookup_mode = search_details.get("director_lookup_mode", "navigate").strip().lower()
+    browser_profile = search_details.get("browser_profile", "visible").strip().lower()
+    warm_browser = search_details.get("warm_browser", "false").strip().lower() == "true"
+    max_page_size = int(search_details.get("max_page_size", 10000))
+    adaptive_throttle = search_details.get("throttle", "true").strip().lower() == "true"
+    throttle_failure_threshold = int(search_details.get("throttle_failure_threshold", 5))
+    throttle_open_seconds = int(search_details.get("throttle_open(seconds)", 30))
+    throttle_latency_target_s = float(search_details.get("throttle_latency_target(seconds)", 0))
+    retry_max_attempts = int(search_details.get("retry_max_attempts", 3))
+    set_log_levels(logger, search_details.get("log_levels", "INFO"))
     # logger.info(f'State selection configuration: {state_selection}')
-    logger.info(f'Selected Configurations: \nState type: {state_selection}, \nDefaulters type: {defaulters_type}, \nDate: {date}, \nTimeout: {timeout_seconds} seconds')
+    logger.info(f'Selected Configurations: \nState type: {state_selection}, \nDefaulters type: {defaulters_type}, \nDate: {date}, \nTimeout: {timeout_seconds} seconds, \nBulk table extraction: {bulk_extraction}, \nFetch mode: {fetch_mode}, \nDirector concurrency: {director_concurrency}, \nState concurrency: {state_concurrency}, \nWait profile: {wait_profile}, \nDelta from date: {delta_from_date or "off"}, \nDirector cache: {director_cache_enabled} (scope: {director_cache_scope}, TTL: {director_cache_ttl_days or "none"} days), \nDirector lookup mode: {director_lookup_mode}, \nBrowser profile: {browser_profile}, \nWarm browser: {warm_browser}, \nMax page size: {max_page_size or "grid default"}, \nAdaptive throttle: {adaptive_throttle} (opens after {throttle_failure_threshold} failures for {throttle_open_seconds}s, latency target: {throttle_latency_target_s or "learned"}), \nRetry attempts: {retry_max_attempts}{" (retry pass only)" if retry_only else ""}, \nLog levels: {search_details.get("log_levels", "INFO")}')
     timeout_seconds = timeout_seconds * 1000 # conversion to milliseconds
 
     # with open('configurations/state_details.json', 'r') as ff:
@@ -279,18 +364,54 @@ def data_search():
     # final_output_folder = base_output_dir / "final" / f'cibil_data_with_directors_{safe_def_type}_{date}_for_{state_selection}'
 
     os.makedirs(raw_output_folder, exist_ok=True)
+    director_cache_file = str(base_output_dir / CACHE_FILE_NAME) if director_cache_enabled else ""
     # os.makedirs(final_output_folder, exist_ok=True)
     
+    if state_concurrency > 1:
+        logger.info(f"Running up to {state_concurrency} states in parallel ({state_concurrency * director_concurrency} browsers at most)")
+        run_kwargs = dict(
+            date=date, defaulters_type=defaulters_type, raw_output_folder=raw_output_folder, timeout_ms=timeout_seconds,
+            bulk_extraction=bulk_extraction, fetch_mode=fetch_mode, http_pool_size=http_pool_size,
+            direct_page_size=direct_page_size, director_concurrency=director_concurrency, wait_profile=wait_profile,
+            director_checkpoint_every=director_checkpoint_every, delta_from_date=delta_from_date, delta_change_columns=delta_change_columns,
+            director_cache_file=director_cache_file, director_cache_ttl_days=director_cache_ttl_days, director_cache_scope=director_cache_scope,
+            director_lookup_mode=director_lookup_mode, browser_profile=browser_profile, max_page_size=max_page_size,
+            adaptive_throttle=adaptive_throttle, throttle_failure_threshold=throttle_failure_threshold,
+            throttle_open_seconds=throttle_open_seconds, throttle_latency_target_s=throttle_latency_target_s,
+            retry_max_attempts=retry_max_attempts, retry_only=retry_only,
+        )
+        schedule_states(logger, run, valid_states, state_details.get("big_state", []), run_kwargs, state_concurrency, state_retries, state_retry_backoff, log_levels=search_details.get("log_levels", "INFO"))
+        return
+
+    # One browser for all states: the next state only changes #stateId and searches again
+    browser_session = open_browser_session(logger, browser_profile, str(base_output_dir / "browser_state.json")) if warm_browser else None
     for state in valid_states:
         try:
-            run(date, state, defaulters_type, raw_output_folder, timeout_seconds)
+            if browser_session is not None:
+                browser_session = ensure_browser_session(browser_session, logger)
+            run(date, state, defaulters_type, raw_output_folder, timeout_seconds, bulk_extraction, fetch_mode, http_pool_size, direct_page_size, director_concurrency, wait_profile=wait_profile, director_checkpoint_every=director_checkpoint_every, delta_from_date=delta_from_date, delta_change_columns=delta_change_columns, director_cache_file=director_cache_file, director_cache_ttl_days=director_cache_ttl_days, director_cache_scope=director_cache_scope, director_lookup_mode=director_lookup_mode, browser_profile=browser_profile, browser_session=browser_session, max_page_size=max_page_size, adaptive_throttle=adaptive_throttle, throttle_failure_threshold=throttle_failure_threshold, throttle_open_seconds=throttle_open_seconds, throttle_latency_target_s=throttle_latency_target_s, retry_max_attempts=retry_max_attempts, retry_only=retry_only)
         except Exception as e:
             logger.error(f"❌ Error for {state}: {e}")
+            if browser_session is not None:
+                browser_session["search"] = None  # the page may be anywhere, start the next state from scratch
             continue
+    if browser_session is not None:
+        close_browser_session(browser_session, logger)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # needed for the state worker processes in the .exe build
     logger.info("▶ Running script...")
     logger.info("Running script...")
-    data_search()
-    merge_data(logger)
-    cleaner(logger)
+    # `python AutoScraper.py retry` only works through the retry queues of the selected states
+    data_search(retry_only="retry" in sys.argv[1:])
+    with timed("merge"):
+        merge_data(logger)
+    search_details = load_json_config("search_details.json")
+    with timed("clean"):
+        cleaner(
+            logger,
+            search_details.get("final_export_format", "xlsx").strip().lower(),
+            int(search_details.get("cleaner_workers", 1)),
+            int(search_details.get("cleaner_chunk_rows", 50000)),
+        )
+    write_run_metrics(logger, "post_processing")
@@ -0,0 +1,134 @@
+# bench_browser_profile.py
+#
+# Page-load and per-action latency of the browser profiles (utilities.browser_profile)
+# against a local replica of the results page: the saved jqGrid fixture served together
+# with a stylesheet, a web font and images, each delayed like a remote asset. Also checks
+# that every profile extracts the same table. The visible profile needs a display and is
+# skipped without one.
+# Run from the repo root:  python -m benchmarks.bench_browser_profile [profiles] [images] [asset_delay_ms] [actions]
+# e.g.                     python -m benchmarks.bench_browser_profile visible,headless,fast 20 50 200
+
+import logging
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from utilities.browser_profile import get_browser_profile, launch_browser, new_browser_context, blocked_stats
+from utilities.extract_table_data import extract_table_data
+
+FIXTURE = Path(__file__).parent / "fixtures" / "jqgrid_results_page.html"
+
+STYLESHEET = b"""
+@font-face { font-family: "SiteFont"; src: url("/assets/site-font.woff2") format("woff2"); }
+body { font-family: "SiteFont", Arial, sans-serif; font-size: 12px; }
+.ui-jqgrid-btable td { padding: 2px 4px; border: 1px solid #ccc; }
+"""
+
+
+def replica_page(image_count):
+    assets = '<link rel="stylesheet" href="/assets/site.css">\n' + "".join(f'<img src="/assets/banner-{i}.png" width="120" height="40">\n' for i in range(image_count))
+    return FIXTURE.read_text(encoding="utf-8").replace("</head>", assets + "</head>", 1).encode()
+
+
+def make_handler(page_html, asset_delay_s):
+    class ReplicaHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/":
+                body, content_type = page_html, "text/html; charset=utf-8"
+            elif self.path.startswith("/assets/"):
+                time.sleep(asset_delay_s)
+                if self.path.endswith(".css"):
+                    body, content_type = STYLESHEET, "text/css"
+                elif self.path.endswith(".woff2"):
+                    body, content_type = bytes(40000), "font/woff2"
+                else:
+                    body, content_type = bytes(25000), "image/png"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplicaHandler
+
+
+def measure_profile(p, logger, name, base_url, actions, loads:int = 5):
+    profile = get_browser_profile(name)
+    try:
+        browser = launch_browser(p, profile)
+    except Exception as e:
+        print(f"{name:>10}  skipped: {str(e).splitlines()[0]}")
+        return None
+    context = new_browser_context(browser, profile)
+    page = context.new_page()
+
+    load_times = []
+    for _ in range(loads):
+        start_time = time.time()
+        page.goto(base_url, wait_until="load")
+        load_times.append(time.time() - start_time)
+
+    cells = page.locator("table.ui-jqgrid-btable tr.jqgrow td")
+    cell_count = cells.count()
+    start_time = time.time()
+    for i in range(actions):
+        cells.nth(i % cell_count).inner_text()
+    action_ms = 1000 * (time.time() - start_time) / actions
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        df = extract_table_data(page, logger, "31-07-25", "gt_25_lacs", "GOA", 1, [], output_folder, 60000, True)
+    browser.close()
+    return {"load_ms": 1000 * sorted(load_times)[len(load_times) // 2], "action_ms": action_ms, "df": df}
+
+
+def main(profiles=("visible", "headless", "fast"), image_count:int = 20, asset_delay_ms:int = 50, actions:int = 200):
+    logger = logging.getLogger("BenchLogger")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(replica_page(image_count), asset_delay_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    print(f"Replica: {image_count} images + stylesheet + font, {asset_delay_ms} ms per asset, {actions} actions")
+    print(f"{'profile':>10} {'load ms (p50)':>14} {'ms / action':>12} {'blocked':>8}")
+    results = {}
+    with sync_playwright() as p:
+        for name in profiles:
+            blocked_stats.clear()
+            result = measure_profile(p, logger, name, base_url, actions)
+            if result is None:
+                continue
+            results[name] = result
+            print(f"{name:>10} {round(result['load_ms'], 1):>14} {round(result['action_ms'], 2):>12} {sum(blocked_stats.values()):>8}")
+    server.shutdown()
+
+    if not results:
+        print("❌ No profile could be launched.")
+        sys.exit(1)
+    frames = [r["df"] for r in results.values()]
+    if any(not df.equals(frames[0]) for df in frames[1:]):
+        print("❌ Profiles extracted different data!")
+        sys.exit(1)
+    print(f"Extracted tables identical across {len(results)} profiles")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        tuple(args[0].split(",")) if len(args) > 0 else ("visible", "headless", "fast"),
+        *(int(arg) for arg in args[1:4]),
+    )
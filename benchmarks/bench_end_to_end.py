@@ -0,0 +1,110 @@
+# bench_end_to_end.py
+#
+# Runs the scraper's run() for one state against benchmarks.site_replica and reports rows
+# per second, director lookups per second and the wall-clock split per phase. Phases are
+# cut at the replica's request log: the first results grid response ends the search, the
+# last grid response before the director lookups ends paging, the last director response
+# ends the director phase. Checks that every row and director list ended up in the store.
+# Run from the repo root:  python -m benchmarks.bench_end_to_end [rows] [director_every] [latency_ms] [presets]
+# e.g.                     python -m benchmarks.bench_end_to_end 3000 30 200 paging,negotiated,direct
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.site_replica import start_site_replica, STATES, QUARTERS
+
+# AutoScraper points Playwright at a bundled ms-playwright folder on import; keep the
+# browsers this environment already uses
+_browsers_path = os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+import AutoScraper
+if _browsers_path is None:
+    os.environ.pop("PLAYWRIGHT_BROWSERS_PATH", None)
+else:
+    os.environ["PLAYWRIGHT_BROWSERS_PATH"] = _browsers_path
+
+from utilities.logger import set_console_level
+from utilities.run_state_store import open_run_state, find_search
+
+STATE = STATES[0]
+DATE = QUARTERS[0]
+DEFAULTERS_TYPE = "gt_25_lacs"
+
+# run() settings per preset, on top of a headless browser with fast waits
+PRESETS = {
+    "paging": {"max_page_size": 0},                            # Next-button loop at the grid's page size
+    "negotiated": {"max_page_size": 10000},                    # one negotiated page size
+    "tab": {"max_page_size": 10000, "director_lookup_mode": "tab"},
+    "direct": {"max_page_size": 0, "fetch_mode": "direct"},    # pages and directors over HTTP
+}
+
+
+def phase_split(request_log, start_time, end_time):
+    """Wall-clock seconds per phase, cut at the replica's request timestamps."""
+    grid = [r["end"] for r in request_log if r["kind"] == "grid"]
+    directors = [r for r in request_log if r["kind"].startswith("director")]
+    search_end = grid[0] if grid else end_time
+    director_start = min(r["start"] for r in directors) if directors else end_time
+    paging_end = max([t for t in grid if t <= director_start] or [search_end])
+    director_end = max(r["end"] for r in directors) if directors else paging_end
+    return {
+        "search": search_end - start_time,
+        "paging": paging_end - search_end,
+        "directors": director_end - paging_end,
+        "teardown": end_time - director_end,
+    }
+
+
+def stored_counts(raw_output_folder):
+    conn = open_run_state(raw_output_folder)
+    try:
+        search_id = find_search(conn, DATE, DEFAULTERS_TYPE, STATE)
+        rows = conn.execute("SELECT COUNT(*) FROM borrowers WHERE search_id = ?", (search_id,)).fetchone()[0]
+        fetched = conn.execute("SELECT COUNT(*) FROM borrowers WHERE search_id = ? AND director_status = 'fetched'", (search_id,)).fetchone()[0]
+    finally:
+        conn.close()
+    return rows, fetched
+
+
+def run_preset(name, rows, director_every, latency_ms):
+    server, base_url, request_log = start_site_replica(rows=rows, director_every=director_every, grid_latency_ms=latency_ms, director_latency_ms=latency_ms // 2)
+    try:
+        with tempfile.TemporaryDirectory() as raw_output_folder:
+            start_time = time.time()
+            AutoScraper.run(
+                DATE, STATE, DEFAULTERS_TYPE, raw_output_folder, timeout_ms=30000, wait_profile="fast",
+                browser_profile="headless", site_url=base_url, **PRESETS[name],
+            )
+            end_time = time.time()
+            stored_rows, fetched = stored_counts(raw_output_folder)
+    finally:
+        server.shutdown()
+
+    expected_lookups = len(range(0, rows, director_every)) if director_every else 0
+    if stored_rows != rows or fetched != expected_lookups:
+        print(f"❌ {name}: stored {stored_rows}/{rows} rows and {fetched}/{expected_lookups} director lists")
+        sys.exit(1)
+
+    phases = phase_split(request_log, start_time, end_time)
+    grid_requests = sum(1 for r in request_log if r["kind"] == "grid")
+    rows_per_s = rows / max(phases["search"] + phases["paging"], 1e-9)
+    lookups_per_s = expected_lookups / max(phases["directors"], 1e-9)
+    split = " ".join(f"{phase} {round(seconds, 1)}s" for phase, seconds in phases.items())
+    print(f"{name:>10} {round(end_time - start_time, 1):>8} {grid_requests:>6} {round(rows_per_s):>9} {round(lookups_per_s, 1):>10}   {split}")
+
+
+def main(rows:int = 3000, director_every:int = 30, latency_ms:int = 200, presets=("paging", "negotiated", "direct")):
+    # Keep the scraper's own log in its file, not on the console
+    set_console_level(AutoScraper.logger, logging.ERROR)
+
+    print(f"Replica: {rows} rows, a director link every {director_every} rows, {latency_ms} ms grid latency")
+    print(f"{'preset':>10} {'wall s':>8} {'grids':>6} {'rows/s':>9} {'lookups/s':>10}   phases")
+    for name in presets:
+        run_preset(name, rows, director_every, latency_ms)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*(int(arg) for arg in args[:3]), *([tuple(args[3].split(","))] if len(args) > 3 else []))
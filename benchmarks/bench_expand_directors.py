@@ -0,0 +1,85 @@
+# bench_expand_directors.py
+#
+# Compares the previous iterrows/row.copy() director expansion with cleaner.explode_directors
+# on a synthetic merged state, and checks that both produce identical frames.
+# Run from the repo root:  python -m benchmarks.bench_expand_directors [borrowers]
+
+import random
+import sys
+import time
+
+import pandas as pd
+
+from utilities.cleaner import explode_directors
+
+NAME_PARTS = ["Ramesh", "Seema", "Sharma", "Kumar", "ABC", "Pvt", "Ltd", "Devi", "Singh", "Mehta"]
+
+
+def expand_with_iterrows(df):
+    """The implementation explode_directors replaced, kept here as the reference."""
+    expanded_rows = []
+    for _, row in df.iterrows():
+        directors_list = row["directors_data"] if isinstance(row["directors_data"], list) else []
+        for director in directors_list:
+            new_row = row.copy()
+            new_row["Director Name"] = director.get("Directors Reported by Credit Institutions", "")
+            new_row["DIN Number"] = director.get("DIN Number", "")
+            new_row["PAN Number"] = director.get("PAN Number", "")
+            expanded_rows.append(new_row)
+    return pd.DataFrame(expanded_rows)
+
+
+def synthetic_merged_state(borrowers, seed:int = 7):
+    """About 3 directors per borrower on average, with some borrowers having none and some missing keys."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(borrowers):
+        directors = []
+        for _ in range(rng.choice([0, 1, 2, 3, 4, 5, 6])):
+            director = {
+                "Directors Reported by Credit Institutions": " ".join(rng.choices(NAME_PARTS, k=3)),
+                "DIN Number": str(rng.randint(10**7, 10**8)),
+                "PAN Number": f"ABCDE{rng.randint(1000, 9999)}F",
+            }
+            if rng.random() < 0.05:
+                del director["PAN Number"]
+            directors.append(director)
+        rows.append({
+            "bankName": f"BANK {i % 40}",
+            "branchName": f"BRANCH {i % 300}",
+            "quarterDateStr": "30-06-2025",
+            "borrowerName": " ".join(rng.choices(NAME_PARTS, k=4)),
+            "regaddr": f"{i} MAIN ROAD",
+            "totalAmount": f"{rng.randint(25, 99999):,}.00",
+            "State": "GOA",
+            "directors_presence": "fetched" if directors else "not_fetched",
+            "directors_data": directors,
+        })
+    return pd.DataFrame(rows).astype(object)
+
+
+def main(borrowers:int = 50000):
+    df = synthetic_merged_state(borrowers)
+
+    start_time = time.time()
+    reference = expand_with_iterrows(df)
+    iterrows_time = time.time() - start_time
+
+    start_time = time.time()
+    expanded = explode_directors(df)
+    explode_time = time.time() - start_time
+
+    try:
+        pd.testing.assert_frame_equal(expanded, reference)
+    except AssertionError as e:
+        print(f"❌ explode_directors differs from the iterrows implementation:\n{e}")
+        sys.exit(1)
+
+    print(f"Borrowers: {len(df)}, directors: {len(expanded)} (output identical)")
+    print(f"🕒 iterrows + row.copy(): {round(iterrows_time, 2)} seconds")
+    print(f"🕒 explode_directors:     {round(explode_time, 2)} seconds")
+    print(f"⚡ Speedup:               {round(iterrows_time / max(explode_time, 1e-9), 1)}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
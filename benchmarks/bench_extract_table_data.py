@@ -0,0 +1,67 @@
+# bench_extract_table_data.py
+#
+# Compares per-cell and bulk extraction of the jqGrid results table on a saved page.
+# Run from the repo root:  python -m benchmarks.bench_extract_table_data [rows]
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from utilities.extract_table_data import extract_table_data
+
+FIXTURE = Path(__file__).parent / "fixtures" / "jqgrid_results_page.html"
+
+# Clones the saved rows until the grid holds the requested page size
+GROW_TABLE_JS = """
+(target) => {
+    const body = document.querySelector("table.ui-jqgrid-btable tbody");
+    const template = Array.from(body.querySelectorAll("tr.jqgrow"));
+    let n = template.length;
+    while (n < target) {
+        const clone = template[n % template.length].cloneNode(true);
+        clone.id = String(n + 1);
+        body.appendChild(clone);
+        n++;
+    }
+    document.querySelector("div.ui-paging-info").innerText = `View 1 - ${n} of ${n}`;
+}
+"""
+
+
+def time_extraction(page, logger, output_folder, bulk):
+    start_time = time.time()
+    df = extract_table_data(page, logger, "31-07-25", "gt_25_lacs", "GOA", 1, [], output_folder, 60000, bulk)
+    return df, time.time() - start_time
+
+
+def main(row_target:int = 1000):
+    logger = logging.getLogger("BenchLogger")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    with sync_playwright() as p, tempfile.TemporaryDirectory() as output_folder:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(FIXTURE.read_text(encoding="utf-8"))
+        page.evaluate(GROW_TABLE_JS, row_target)
+
+        bulk_df, bulk_time = time_extraction(page, logger, output_folder, bulk=True)
+        cell_df, cell_time = time_extraction(page, logger, output_folder, bulk=False)
+        browser.close()
+
+    if not bulk_df.equals(cell_df):
+        print("❌ Bulk and per-cell extraction produced different data!")
+        sys.exit(1)
+
+    print(f"Rows per page: {len(bulk_df)}, columns: {list(bulk_df.columns)}")
+    print(f"🕒 Per-cell extraction: {round(cell_time, 2)} seconds")
+    print(f"🕒 Bulk extraction:     {round(bulk_time, 2)} seconds")
+    print(f"⚡ Speedup per page:    {round(cell_time / max(bulk_time, 1e-9), 1)}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,97 @@
+# bench_logging.py
+#
+# Logging overhead per 10k rows, as seen by the scraping thread. Each row makes the calls a
+# director lookup makes (the per-row line, the lookup result, the loader wait):
+#   sync       - the previous setup: FileHandler + StreamHandler on the logger, all INFO
+#   queue      - utilities.logger, same INFO lines, written as JSON by the listener thread
+#   progress   - utilities.logger with the per-row lines at DEBUG and open_progress/log_progress
+# "caller" is the time spent in the loop, "drained" includes waiting for the listener to
+# finish writing. The console goes to os.devnull so the terminal does not dominate.
+# Run from the repo root:  python -m benchmarks.bench_logging [rows] [repeats]
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from utilities.logger import setup_logger, stop_logger, open_progress, log_progress, close_progress
+
+
+def sync_logger(log_dir, devnull):
+    logger = logging.getLogger("bench_sync")
+    logger.setLevel(logging.INFO)
+    logger.handlers.clear()
+    logger.propagate = False
+    file_handler = logging.FileHandler(os.path.join(log_dir, "sync.log"), encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    console_handler = logging.StreamHandler(devnull)
+    console_handler.setFormatter(logging.Formatter("▶ %(message)s"))
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    return logger
+
+
+def queue_logger(name, log_dir, devnull):
+    logger = setup_logger(name, log_dir)
+    logger.propagate = False
+    for handler in logger.log_listener.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(devnull)
+    return logger
+
+
+def per_row_lines(logger, rows):
+    for row_idx in range(rows):
+        logger.info(f"▶ Extracting directors for page {row_idx // 1000 + 1}, row {row_idx % 1000 + 1}: BORROWER {row_idx} PRIVATE LIMITED")
+        logger.info("Loader disappeared.")
+        logger.info("Successfully extracted director data.")
+
+
+def aggregated_lines(logger, rows):
+    progress = open_progress(logger, "Director lookups", rows)
+    for row_idx in range(rows):
+        logger.debug("Loader disappeared.")
+        logger.debug("Successfully extracted director data.")
+        log_progress(progress, "fetched", f"Directors for page {row_idx // 1000 + 1}, row {row_idx % 1000 + 1}: BORROWER {row_idx} PRIVATE LIMITED (2)")
+    close_progress(progress)
+
+
+def file_lines(log_dir):
+    return sum(sum(1 for _ in open(os.path.join(log_dir, name), encoding="utf-8")) for name in os.listdir(log_dir))
+
+
+def run_variant(name, rows, devnull):
+    with tempfile.TemporaryDirectory() as log_dir:
+        if name == "sync":
+            logger = sync_logger(log_dir, devnull)
+        else:
+            logger = queue_logger(f"bench_{name}", log_dir, devnull)
+        start_time = time.perf_counter()
+        (aggregated_lines if name == "progress" else per_row_lines)(logger, rows)
+        caller_s = time.perf_counter() - start_time
+        if name == "sync":
+            for handler in logger.handlers:
+                handler.flush()
+                handler.close()
+            logger.handlers.clear()
+        else:
+            stop_logger(logger)
+        drained_s = time.perf_counter() - start_time
+        return caller_s, drained_s, file_lines(log_dir)
+
+
+def main(rows:int = 10000, repeats:int = 3):
+    print(f"{rows} rows, best of {repeats}, per 10k rows")
+    print(f"{'variant':>10} {'caller ms':>10} {'drained ms':>11} {'lines':>8}")
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for name in ("sync", "queue", "progress"):
+            results = [run_variant(name, rows, devnull) for _ in range(repeats)]
+            caller_s = min(r[0] for r in results)
+            drained_s = min(r[1] for r in results)
+            scale = 10000 / rows
+            print(f"{name:>10} {round(1000 * caller_s * scale, 1):>10} {round(1000 * drained_s * scale, 1):>11} {results[0][2]:>8}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
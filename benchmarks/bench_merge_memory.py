@@ -0,0 +1,97 @@
+# bench_merge_memory.py
+#
+# Peak RSS of the streaming merge_data against the previous read-all + pd.concat merge as
+# the page count grows. Each measurement runs in a fresh process (Unix only).
+# Run from the repo root:  python -m benchmarks.bench_merge_memory [page_counts] [rows_per_page]
+# e.g.                     python -m benchmarks.bench_merge_memory 10,20,40,80 1000
+
+import logging
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_stage_formats import synthetic_page, DATE, DEFAULTERS_TYPE, STATE, REPO_ROOT
+from utilities.extract_table_data import raw_output_file_name
+from utilities.stage_io import stage_files, read_stage, write_stage
+
+MODES = ("baseline", "concat", "streaming")
+
+
+def peak_rss_mb():
+    # VmHWM is reset by exec; ru_maxrss on Linux carries the parent's peak over fork + exec
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def merge_with_concat(raw_folder, output_file):
+    """The merge merge_data replaced: every page in memory, pd.concat, one write."""
+    df_list = []
+    for name in sorted(stage_files(raw_folder), key=lambda x: int(os.path.splitext(x)[0].split("_page_")[1])):
+        df = read_stage(os.path.join(raw_folder, name))
+        df['source_date'] = DATE
+        df_list.append(df)
+    write_stage(pd.concat(df_list, ignore_index=True), output_file)
+
+
+def child(mode, work_dir):
+    """Runs one merge in this process and prints its peak RSS."""
+    logger = logging.getLogger("BenchLogger")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    os.chdir(work_dir)
+    raw_folder = os.path.join("fetched_data", "raw", f"cibil_data_{DEFAULTERS_TYPE}_{DATE}_for_state")
+    if mode == "concat":
+        merge_with_concat(raw_folder, os.path.join(work_dir, "concat_merged.parquet"))
+    elif mode == "streaming":
+        from utilities.merger import merge_data
+        merge_data(logger, incremental=False)
+    print(round(peak_rss_mb(), 1))
+
+
+def measure(mode, work_dir):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_merge_memory", "--child", mode, str(work_dir)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(page_counts=(10, 20, 40), rows_per_page:int = 1000):
+    rng = random.Random(5)
+    print(f"{'pages':>6} {'rows':>8} {'baseline MB':>12} {'concat MB':>10} {'streaming MB':>13}")
+    for page_count in page_counts:
+        with tempfile.TemporaryDirectory() as work_dir:
+            work_dir = Path(work_dir)
+            shutil.copytree(REPO_ROOT / "configurations", work_dir / "configurations")
+            raw_folder = work_dir / "fetched_data" / "raw" / f"cibil_data_{DEFAULTERS_TYPE}_{DATE}_for_state"
+            raw_folder.mkdir(parents=True)
+            for page_no in range(1, page_count + 1):
+                write_stage(synthetic_page(rng, page_no, rows_per_page), str(raw_folder / raw_output_file_name(DATE, DEFAULTERS_TYPE, STATE, page_no)))
+
+            peaks = {mode: measure(mode, work_dir) for mode in MODES}
+            streamed = read_stage(str(work_dir / "fetched_data" / "final" / f"{DATE}_merged" / f"{DATE}_{STATE}_merged.parquet"))
+            concatenated = read_stage(str(work_dir / "concat_merged.parquet"))
+            if not streamed.astype(str).equals(concatenated.astype(str)):
+                print("❌ Streaming and concat merges produced different data!")
+                sys.exit(1)
+        print(f"{page_count:>6} {page_count * rows_per_page:>8} {peaks['baseline']:>12} {peaks['concat']:>10} {peaks['streaming']:>13}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        counts = tuple(int(c) for c in sys.argv[1].split(",")) if len(sys.argv) > 1 else (10, 20, 40)
+        main(counts, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,120 @@
+# bench_name_normalization.py
+#
+# Checks utilities.name_normalizer against the golden outputs for helper.sample_names, then
+# times it against the previous chain of Series.replace(..., regex=True) calls on synthetic
+# names and checks that both give the same result.
+# Run from the repo root:  python -m benchmarks.bench_name_normalization [names] [unique_names]
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import ujson as json
+
+from utilities.helper import sample_names
+from utilities.name_normalizer import normalize_names
+
+GOLDEN = Path(__file__).parent / "fixtures" / "name_normalization_golden.json"
+
+TOKENS = [
+    "Mr.", "Mrs", "Ms", "M/s.", "Dr", "Sh", "Ch.", "Smt", "Smti", "Miss", "Ramesh", "Seema", "Rajinder", "Devi", "Kumar",
+    "Sharma", "ABC", "Pvt", "Ltd", "(P)", "Pvtltd", "Corp", "Soc", "Individual", "Chairman", "Managing Director",
+    "Partner", "Proprietor", "(prop)", "(IND)", "in liquidation", "Erstwhile Promoter", "Co-applicant",
+    "Whole Time Director", "Guarantors of", "(PROMOTER DIRECTOR/ GUARANTOR)", "(co-borrower)", "()",
+    "(Executive Director)", "Director EX", "S/O Dinesh", "W/o. Anil", "Property", "India", ",", "&",
+]
+
+
+def normalize_with_replace_chain(names):
+    """The chain name_normalizer replaced, as it was in cleaner.expand_directors_data."""
+    return (
+        names.astype(str)
+        .str.lower()
+        .str.strip()
+        .str.replace(r'\.', ' ', regex=True)
+        .replace(r'\bm/s\b', '', regex=True)
+        .replace(r'\bmr\b', '', regex=True)
+        .replace(r'\bmrs\b', '', regex=True)
+        .replace(r'\bms\b', '', regex=True)
+        .replace(r'\bdr\b', '', regex=True)
+        .replace(r'\(?p\)?\s*ltd\b', 'private limited', regex=True)
+        .replace(r'\(p\)\s*', 'private', regex=True)
+        .replace(r'\bpvtltd\b', 'private limited', regex=True)
+        .replace(r'\bpvt\b', 'private', regex=True)
+        .replace(r'\bltd\b', 'limited', regex=True)
+        .replace(r'\bsoc\b', 'society', regex=True)
+        .replace(r'\bcorp\b', 'corporation', regex=True)
+        .replace(r'\bsmt\b', '', regex=True)
+        .replace(r'\bsmti\b', '', regex=True)
+        .replace(r'\bmiss\b', '', regex=True)
+        .replace(r'\bindividual\b', '', regex=True)
+        .replace(r'\bchairman\b', '', regex=True)
+        .replace(r'\bmanaging director\b', '', regex=True)
+        .replace(r'\bpartner\b', '', regex=True)
+        .replace(r'\(?\b(b)?prop(riet([oe]r)?)?\)?', '', regex=True)
+        .replace(r'\bin liquidation\b', '', regex=True)
+        .replace(r'\(ind\)\s*', '', regex=True)
+        .replace(r'\berstwhile\s+promoter\b', '', regex=True)
+        .replace(r'^\s*co[-\s]*applicant\s*', '', regex=True)
+        .replace(r'^\s*\(?whole\s*time\s*director\)?\s*', '', regex=True)
+        .replace(r'^\s*guarantors?\s+of\s+', '', regex=True)
+        .replace(r'\bguarantors?\s+of\b', '', regex=True)
+        .replace(r'\(.*promoter.*guarantor.*\)', '', regex=True)
+        .replace(r'\(.*guarantor.*promoter.*\)', '', regex=True)
+        .replace(r'^\s*directors?\s*/\s*corporate\s*', '', regex=True)
+        .replace(r'\berstwhile\s+promoter\b', '', regex=True)
+        .replace(r'\(co-borrower\)\s*', '', regex=True)
+        .replace(r'^\s*(sh|ch)\.?\s+', '', regex=True)
+        .replace(r'^\s*\(\s*\)\s*', '', regex=True)
+        .replace(r'\s*\(?ex(?:ecutive)?\s*director[s]?\)?\s*$', '', regex=True)
+        .replace(r'\s*\(?director\s*(?:ex|\(ex\))?\)?\s*$', '', regex=True)
+        .replace(r'\(?\s*(s|d|w)/o[^,;]*', '', regex=True)
+        .replace(r'\(\s*\)', '', regex=True)
+        .replace(r'\s+', ' ', regex=True)
+        .str.upper()
+        .str.strip()
+    )
+
+
+def check_golden():
+    golden = json.loads(GOLDEN.read_text(encoding="utf-8"))
+    expected = {g["name"]: g["normalized"] for g in golden}
+    normalized = normalize_names(pd.Series(sample_names))
+    mismatches = [(name, got, expected.get(name)) for name, got in zip(sample_names, normalized) if got != expected.get(name)]
+    for name, got, want in mismatches:
+        print(f"❌ {name!r}: got {got!r}, expected {want!r}")
+    return not mismatches
+
+
+def main(count:int = 1000000, unique_count:int = 200000):
+    if not check_golden():
+        sys.exit(1)
+    print(f"Golden check passed for {len(sample_names)} sample names")
+
+    rng = random.Random(11)
+    uniques = sample_names + [" ".join(rng.choices(TOKENS, k=rng.randint(2, 6))) for _ in range(unique_count - len(sample_names))]
+    names = pd.Series(rng.choices(uniques, k=count))
+
+    start_time = time.time()
+    expected = normalize_with_replace_chain(names)
+    chain_time = time.time() - start_time
+
+    start_time = time.time()
+    normalized = normalize_names(names)
+    engine_time = time.time() - start_time
+
+    if not normalized.equals(expected):
+        diff = normalized != expected
+        print(f"❌ {int(diff.sum())} names differ, e.g. {names[diff].head(5).tolist()}")
+        sys.exit(1)
+
+    print(f"Names: {count} ({names.nunique()} unique), output identical")
+    print(f"🕒 replace chain:   {round(chain_time, 2)} seconds")
+    print(f"🕒 name_normalizer: {round(engine_time, 2)} seconds")
+    print(f"⚡ Speedup:         {round(chain_time / max(engine_time, 1e-9), 1)}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
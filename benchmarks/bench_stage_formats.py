@@ -0,0 +1,119 @@
+# bench_stage_formats.py
+#
+# End-to-end merge + clean time on a synthetic dataset, with the stages stored as Excel
+# (the previous layout) and as Parquet.
+# Run from the repo root:  python -m benchmarks.bench_stage_formats [rows] [rows_per_page]
+
+import contextlib
+import io
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utilities.merger import merge_data
+from utilities.cleaner import cleaner
+from utilities.extract_table_data import raw_output_file_name
+from utilities.stage_io import write_stage, stage_extension
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DATE = "31-07-25"
+DEFAULTERS_TYPE = "gt_25_lacs"
+STATE = "GOA"
+
+NAME_PARTS = ["Mr.", "Ms", "M/s", "Dr", "Smt", "Ramesh", "Seema", "Sharma", "Kumar", "ABC", "Pvt", "Ltd", "(P)", "Corp", "(Director)", "S/O Dinesh"]
+
+
+def synthetic_page(rng, page_no, rows):
+    page_rows = []
+    for i in range(rows):
+        row_id = (page_no - 1) * rows + i
+        directors = [
+            {
+                "Directors Reported by Credit Institutions": " ".join(rng.choices(NAME_PARTS, k=4)),
+                "DIN Number": str(rng.randint(10**7, 10**8)),
+                "PAN Number": f"ABCDE{rng.randint(1000, 9999)}F",
+            }
+            for _ in range(rng.randint(0, 3))
+        ]
+        page_rows.append({
+            "bankName": f"BANK {row_id % 40}",
+            "branchName": f"BRANCH {row_id % 300}",
+            "quarterDateStr": "30-06-2025",
+            "borrowerName": " ".join(rng.choices(NAME_PARTS, k=5)),
+            "borrowerName_href": f"javascript:getBorrower({row_id})",
+            "regaddr": f"{row_id} MAIN ROAD, PANAJI",
+            "totalAmount": f"{rng.randint(25, 99999):,}.00",
+            "directorName": "View",
+            "directorName_href": f"javascript:getDirctorList('{row_id}')",
+            "date": DATE,
+            "State": STATE,
+            "directors_presence": "fetched" if directors else "not_fetched",
+            "directors_data": directors,
+        })
+    return pd.DataFrame(page_rows)
+
+
+def run_pipeline(work_dir, pages, stage_format, export_format, logger):
+    raw_folder = work_dir / "fetched_data" / "raw" / f"cibil_data_{DEFAULTERS_TYPE}_{DATE}_for_state"
+    raw_folder.mkdir(parents=True)
+    start_time = time.time()
+    for page_no, df in enumerate(pages, start=1):
+        write_stage(df, str(raw_folder / raw_output_file_name(DATE, DEFAULTERS_TYPE, STATE, page_no, stage_extension(stage_format))))
+    timings = {"raw write": time.time() - start_time}
+
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.time()
+            merge_data(logger, stage_format)
+            timings["merge"] = time.time() - start_time
+            start_time = time.time()
+            cleaner(logger, export_format)
+            timings["clean"] = time.time() - start_time
+    finally:
+        os.chdir(cwd)
+
+    final_folder = work_dir / "fetched_data" / "final_preprocessed"
+    final_file = str(final_folder / os.listdir(final_folder)[0])
+    final_df = pd.read_parquet(final_file) if final_file.endswith(".parquet") else pd.read_excel(final_file, dtype=str)
+    return timings, final_df
+
+
+def main(rows:int = 100000, rows_per_page:int = 1000):
+    logger = logging.getLogger("BenchLogger")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    rng = random.Random(42)
+    pages = [synthetic_page(rng, page_no, min(rows_per_page, rows - (page_no - 1) * rows_per_page)) for page_no in range(1, -(-rows // rows_per_page) + 1)]
+    print(f"Synthetic dataset: {rows} borrowers in {len(pages)} pages, {sum(len(d) for df in pages for d in df['directors_data'])} directors")
+
+    results = {}
+    for label, stage_format, export_format in (("Excel stages", "xlsx", "xlsx"), ("Parquet stages", "parquet", "parquet")):
+        with tempfile.TemporaryDirectory() as work_dir:
+            work_dir = Path(work_dir)
+            shutil.copytree(REPO_ROOT / "configurations", work_dir / "configurations")
+            results[label] = run_pipeline(work_dir, pages, stage_format, export_format, logger)
+
+    (excel_timings, excel_df), (parquet_timings, parquet_df) = results["Excel stages"], results["Parquet stages"]
+    if len(excel_df) != len(parquet_df) or list(excel_df.columns) != list(parquet_df.columns) or not excel_df["Final_DirectorName"].fillna("").equals(parquet_df["Final_DirectorName"].fillna("")):
+        print("❌ Excel and Parquet pipelines produced different final data!")
+        sys.exit(1)
+
+    print(f"Final rows: {len(parquet_df)}")
+    for label, (timings, _) in results.items():
+        total = sum(timings.values())
+        print(f"🕒 {label}: " + ", ".join(f"{step} {round(t, 2)}s" for step, t in timings.items()) + f" → total {round(total, 2)}s")
+    print(f"⚡ Merge + clean speedup: {round((excel_timings['merge'] + excel_timings['clean']) / max(parquet_timings['merge'] + parquet_timings['clean'], 1e-9), 1)}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
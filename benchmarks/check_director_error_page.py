@@ -0,0 +1,59 @@
+# check_director_error_page.py
+#
+# Checks that a director popup showing the site's error page instead of DirectorInfoTable
+# rows counts as a website issue for the throttle and the retry queue, not as an empty but
+# successful lookup. The popup is opened against benchmarks.site_replica twice: once with
+# every director request failing (error_every=1) and once without errors.
+# Run from the repo root:  python -m benchmarks.check_director_error_page [timeout_ms]
+
+import sys
+import tempfile
+
+from benchmarks.site_replica import start_site_replica
+from utilities.logger import setup_logger, stop_logger
+from utilities.browser_session import open_browser_session, close_browser_session
+from utilities.director_lookup import extract_directors_from_href, last_lookup_error
+
+DIRECTOR_HREF = "javascript:getDirctorList(1000000,147,1)"
+
+
+def lookup_once(logger, session, error_every, timeout_ms):
+    """One popup lookup against a fresh replica. Returns (directors, slot outcome, last lookup error)."""
+    server, base_url, _ = start_site_replica(error_every=error_every, director_latency_ms=50)
+    try:
+        page = session["page"]
+        page.goto(base_url, timeout=timeout_ms, wait_until="load")
+        slot = {"outcome": "ok"}
+        directors = extract_directors_from_href(page, logger, DIRECTOR_HREF, timeout_ms, "fast", slot)
+        return directors, slot["outcome"], last_lookup_error()
+    finally:
+        server.shutdown()
+
+
+def main(timeout_ms:int = 5000):
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger = setup_logger("check_director_error_page", log_dir)
+        session = open_browser_session(logger, "headless")
+        try:
+            failed = lookup_once(logger, session, 1, timeout_ms)
+            healthy = lookup_once(logger, session, 0, timeout_ms)
+        finally:
+            close_browser_session(session)
+            stop_logger(logger)
+
+    ok = True
+    directors, outcome, error = failed
+    if directors or outcome != "website_issue" or not error.startswith("website issue"):
+        print(f"❌ error page: {len(directors)} directors, outcome '{outcome}', last error '{error}'")
+        ok = False
+    directors, outcome, _ = healthy
+    if not directors or outcome != "ok":
+        print(f"❌ healthy popup: {len(directors)} directors, outcome '{outcome}'")
+        ok = False
+    if not ok:
+        sys.exit(1)
+    print(f"✅ error page → website issue ('{failed[2]}'); healthy popup → {len(healthy[0])} directors")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
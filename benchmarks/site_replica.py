@@ -0,0 +1,374 @@
+# site_replica.py
+#
+# Local stand-in for suit.cibil.com, for offline end-to-end runs of the scraper. It serves:
+#   /               search form (account type, quarter, Go) and the state form with the
+#                   jqGrid results table, pager, paging info and blockUI loader
+#   /grid           jqGrid JSON for the results, with row count, page size cap and latency
+#   /directors      the getDirctorList popup page with DirectorInfoTable
+#   /directorGrid   jqGrid JSON for the director list
+# Every n-th grid or director request can fail with the site's error page. The grid is a
+# small script that speaks the parts of the jqGrid API the scraper uses (getGridParam,
+# setGridParam, reloadGrid) through a jQuery stub. Data is deterministic per state and row.
+# Run from the repo root:  python -m benchmarks.site_replica [rows] [port]
+
+import random
+import sys
+import threading
+import time
+import ujson as json
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+QUARTERS = ["31-07-25", "30-06-25", "31-03-25"]
+STATES = ["GOA", "MAHARASHTRA", "KARNATAKA", "GUJARAT", "DELHI"]
+BANKS = ["AXIS BANK LTD", "BANK OF MAHARASHTRA", "STATE BANK OF INDIA", "CANARA BANK", "HDFC BANK LTD"]
+COLUMNS = ["suitId", "bankName", "branchName", "quarterDateStr", "borrowerName", "regaddr", "directorName", "totalAmount"]
+ERROR_TEXT = "Web server is returning an unknown error"
+DIRECTOR_LINK_TEXT = "Detail List Of All Directors"
+
+DEFAULT_SETTINGS = {
+    "rows": 3000,                 # result rows per state
+    "page_size": 1000,            # rows per page the grid asks for by default
+    "max_page_size": 5000,        # server cap on the rows parameter
+    "director_every": 30,         # every n-th row has a getDirctorList link
+    "grid_latency_ms": 200,
+    "director_latency_ms": 100,
+    "error_every": 0,             # every n-th grid/director request fails (0 = never)
+}
+
+PAGE_STYLE = """
+<style>
+  .blockUI.blockOverlay { position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: #000; opacity: 0.3; }
+  .blockUI.blockMsg { position: fixed; top: 40%; left: 40%; background: #fff; padding: 10px; }
+  .ui-state-disabled { opacity: 0.35; }
+  #stateForm { display: none; }
+</style>
+"""
+
+BLOCK_UI_JS = """
+function blockPage() {
+  unblockPage();
+  document.body.insertAdjacentHTML("beforeend", '<div class="blockUI blockOverlay"></div><div class="blockUI blockMsg blockPage">Please wait...</div>');
+}
+function unblockPage() { document.querySelectorAll("div.blockUI").forEach(el => el.remove()); }
+function showSiteError() { document.getElementById("siteError").innerText = "ERROR_TEXT"; }
+""".replace("ERROR_TEXT", ERROR_TEXT)
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>Suit Filed Accounts</title>
+  PAGE_STYLE
+</head>
+<body>
+  <div id="siteError"></div>
+  <div id="accountForm">
+    <select id="croreAccount"><option>Select</option><option>Search</option></select>
+    <select id="quarterIdCrore"><option>Select</option>QUARTER_OPTIONS</select>
+    <img id="goForSuitFiledAccounts1CroreId" alt="Go" src="data:," width="24" height="24" onclick="showStateForm('crore')">
+    <select id="lakhAccount"><option>Select</option><option>Search</option></select>
+    <select id="quarterIdLakh"><option>Select</option>QUARTER_OPTIONS</select>
+    <img id="goForSuitFiledAccounts25LacsId" alt="Go" src="data:," width="24" height="24" onclick="showStateForm('lakh')">
+  </div>
+  <div id="stateForm">
+    <select id="stateId"><option>SELECT</option>STATE_OPTIONS</select>
+    <input type="button" id="searchId" value="Search" onclick="startSearch()">
+    <a href="#" onclick="goToBottom()">Bottom</a> <a href="#" onclick="goToTop()">Top</a>
+  </div>
+  <div id="gbox_projectTable" class="ui-jqgrid">
+    <div id="load_projectTable" style="display:none">Loading...</div>
+    <table id="projectTable" class="ui-jqgrid-btable"><tbody></tbody></table>
+    <div id="pagingDiv">
+      <table><tr>
+        <td id="prev_pagingDiv" class="ui-state-disabled" onclick="goToPage(grid.page - 1)">Prev</td>
+        <td><input class="ui-pg-input" type="text" size="4" value="1"></td>
+        <td id="next_pagingDiv" class="ui-state-disabled" onclick="goToPage(grid.page + 1)">Next</td>
+      </tr></table>
+      <div class="ui-paging-info"></div>
+    </div>
+  </div>
+<script>
+BLOCK_UI_JS
+const colModel = COL_MODEL;
+const grid = {rowNum: DEFAULT_ROWS, page: 1, records: 0, total: 0, search: null};
+
+function showStateForm(kind) {
+  const quarter = document.getElementById(kind === "crore" ? "quarterIdCrore" : "quarterIdLakh").value;
+  grid.search = {kind: kind, quarter: quarter};
+  document.getElementById("stateForm").style.display = "block";
+}
+function startSearch() {
+  grid.search.state = document.getElementById("stateId").value;
+  grid.page = 1;
+  loadGrid();
+}
+function goToPage(n) {
+  if (n < 1 || n > grid.total) return;
+  grid.page = n;
+  loadGrid();
+}
+function goToBottom() { window.scrollTo(0, document.body.scrollHeight); return false; }
+function goToTop() { window.scrollTo(0, 0); return false; }
+
+function cell(name, text, hidden, html) {
+  const td = document.createElement("td");
+  td.setAttribute("role", "gridcell");
+  td.setAttribute("aria-describedby", "projectTable_" + name);
+  if (hidden) td.style.display = "none";
+  if (html) { td.innerHTML = html; } else { td.setAttribute("title", text); td.innerText = text; }
+  return td;
+}
+function renderRows(rows) {
+  const body = document.querySelector("#projectTable tbody");
+  body.innerHTML = "";
+  rows.forEach(item => {
+    const r = {};
+    colModel.forEach((c, i) => r[c.name] = item.cell[i]);
+    const tr = document.createElement("tr");
+    tr.id = item.id;
+    tr.className = "ui-widget-content jqgrow ui-row-ltr";
+    tr.appendChild(cell("suitId", r.suitId, true));
+    ["bankName", "branchName", "quarterDateStr"].forEach(n => tr.appendChild(cell(n, r[n])));
+    tr.appendChild(cell("borrowerName", r.borrowerName, false, '<a href="#">' + r.borrowerName + "</a>"));
+    tr.appendChild(cell("regaddr", r.regaddr));
+    tr.appendChild(cell("directorName", "", false, r.directorName ? '<a href="' + r.directorName + '">DIRECTOR_LINK_TEXT</a>' : ""));
+    tr.appendChild(cell("totalAmount", r.totalAmount));
+    body.appendChild(tr);
+  });
+}
+function loadGrid() {
+  blockPage();
+  document.getElementById("load_projectTable").style.display = "block";
+  const params = new URLSearchParams({state: grid.search.state, quarter: grid.search.quarter, kind: grid.search.kind,
+                                      page: grid.page, rows: grid.rowNum, sidx: "", sord: "asc", nd: Date.now()});
+  return fetch("/grid?" + params.toString(), {headers: {"X-Requested-With": "XMLHttpRequest"}})
+    .then(response => response.ok ? response.json() : Promise.reject(response.status))
+    .then(data => {
+      grid.page = data.page; grid.total = data.total; grid.records = data.records;
+      renderRows(data.rows);
+      const start = data.records ? (data.page - 1) * grid.rowNum + 1 : 0;
+      const end = start ? start + data.rows.length - 1 : 0;
+      document.querySelector("div.ui-paging-info").innerText = data.records
+        ? "View " + start.toLocaleString("en-US") + " - " + end.toLocaleString("en-US") + " of " + data.records.toLocaleString("en-US")
+        : "No records";
+      document.querySelector("#pagingDiv input.ui-pg-input").value = data.page;
+      document.getElementById("next_pagingDiv").className = data.page >= data.total ? "ui-state-disabled" : "";
+      document.getElementById("prev_pagingDiv").className = data.page <= 1 ? "ui-state-disabled" : "";
+      sessionStorage.setItem("replicaGrid", JSON.stringify(grid));
+    })
+    .catch(() => showSiteError())
+    .finally(() => { document.getElementById("load_projectTable").style.display = "none"; unblockPage(); });
+}
+
+document.querySelector("#pagingDiv input.ui-pg-input").addEventListener("keydown", e => {
+  if (e.key === "Enter") goToPage(parseInt(e.target.value, 10));
+});
+
+// The parts of jQuery + jqGrid the scraper calls
+window.jQuery = function (selector) {
+  const api = {
+    jqGrid(method, arg) {
+      if (method === "getGridParam") return arg === "colModel" ? colModel : grid[arg];
+      if (method === "setGridParam") Object.assign(grid, arg);
+      return api;
+    },
+    trigger(eventName) {
+      if (eventName === "reloadGrid") loadGrid();
+      return api;
+    },
+  };
+  return api;
+};
+
+function getDirctorList(suitId, bankId, type) {
+  sessionStorage.setItem("replicaGrid", JSON.stringify(grid));
+  location.href = "/directors?" + new URLSearchParams({suitId: suitId, bankId: bankId, type: type}).toString();
+}
+
+// Coming back from the director page without the back/forward cache: rebuild the results
+const navigation = performance.getEntriesByType("navigation")[0];
+const saved = sessionStorage.getItem("replicaGrid");
+if (navigation && navigation.type === "back_forward" && saved) {
+  Object.assign(grid, JSON.parse(saved));
+  if (grid.search && grid.search.state) {
+    document.getElementById("stateForm").style.display = "block";
+    document.getElementById("stateId").value = grid.search.state;
+    loadGrid();
+  }
+}
+</script>
+</body>
+</html>
+"""
+
+DIRECTOR_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>Director List</title>
+  PAGE_STYLE
+</head>
+<body>
+  <div id="siteError"></div>
+  <table id="DirectorInfoTable" class="ui-jqgrid-btable"><tbody></tbody></table>
+<script>
+BLOCK_UI_JS
+blockPage();
+fetch("/directorGrid" + location.search + "&nd=" + Date.now(), {headers: {"X-Requested-With": "XMLHttpRequest"}})
+  .then(response => response.ok ? response.json() : Promise.reject(response.status))
+  .then(data => {
+    const body = document.querySelector("#DirectorInfoTable tbody");
+    data.rows.forEach(item => {
+      const tr = document.createElement("tr");
+      tr.id = item.id;
+      tr.className = "ui-widget-content jqgrow ui-row-ltr";
+      ["directorNames", "dinNumber", "dirPans"].forEach((name, i) => {
+        const td = document.createElement("td");
+        td.setAttribute("role", "gridcell");
+        td.setAttribute("aria-describedby", "DirectorInfoTable_" + name);
+        td.innerText = item.cell[i];
+        tr.appendChild(td);
+      });
+      body.appendChild(tr);
+    });
+  })
+  .catch(() => showSiteError())
+  .finally(() => unblockPage());
+</script>
+</body>
+</html>
+"""
+
+
+# ----------------- Data -----------------
+def result_row(state, index, director_every):
+    """Row `index` (0-based) of a state's results, identical on every call."""
+    rng = random.Random(f"{state}:{index}")
+    suit_id = 1000000 + STATES.index(state) * 100000 + index if state in STATES else 9000000 + index
+    borrower = f"{rng.choice(['SHREE', 'OM', 'NEW', 'GOLDEN', 'SAI'])} {rng.choice(['TRADERS', 'INDUSTRIES', 'HOTELS', 'EXPORTS'])} {index} PVT LTD"
+    has_directors = director_every > 0 and index % director_every == 0
+    return {
+        "suitId": str(suit_id),
+        "bankName": rng.choice(BANKS),
+        "branchName": f"{rng.choice(['MAPUSA', 'PANAJI', 'MARGAO', 'VASCO'])}, {state}",
+        "quarterDateStr": QUARTERS[0],
+        "borrowerName": borrower,
+        "regaddr": f"PLOT NO {rng.randint(1, 500)}, {state}, INDIA",
+        "directorName": f"javascript:getDirctorList({suit_id},147,1)" if has_directors else "",
+        "totalAmount": f"{rng.randint(2500, 900000) / 100:.2f}",
+    }
+
+
+def director_rows(suit_id):
+    rng = random.Random(f"directors:{suit_id}")
+    return [
+        {"id": str(i + 1), "cell": [f"DIRECTOR {suit_id}-{i + 1}", f"{rng.randint(10 ** 7, 10 ** 8 - 1)}", f"ABCDE{rng.randint(1000, 9999)}F"]}
+        for i in range(rng.randint(1, 4))
+    ]
+
+
+def search_page(settings):
+    return (
+        SEARCH_PAGE.replace("PAGE_STYLE", PAGE_STYLE)
+        .replace("BLOCK_UI_JS", BLOCK_UI_JS)
+        .replace("QUARTER_OPTIONS", "".join(f"<option>{q}</option>" for q in QUARTERS))
+        .replace("STATE_OPTIONS", "".join(f"<option>{s}</option>" for s in STATES))
+        .replace("COL_MODEL", json.dumps([{"name": c, "hidden": c == "suitId"} for c in COLUMNS]))
+        .replace("DEFAULT_ROWS", str(settings["page_size"]))
+        .replace("DIRECTOR_LINK_TEXT", DIRECTOR_LINK_TEXT)
+    )
+
+
+def director_page():
+    return DIRECTOR_PAGE.replace("PAGE_STYLE", PAGE_STYLE).replace("BLOCK_UI_JS", BLOCK_UI_JS)
+
+
+# ----------------- Server -----------------
+def make_handler(settings, request_log):
+    lock = threading.Lock()
+    counters = {"requests": 0}
+
+    class ReplicaHandler(BaseHTTPRequestHandler):
+        def send_body(self, status, body, content_type):
+            payload = body.encode() if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def failing(self):
+            """Every error_every-th data request fails with the site's error page."""
+            with lock:
+                counters["requests"] += 1
+                count = counters["requests"]
+            return settings["error_every"] and count % settings["error_every"] == 0
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            start_time = time.time()
+
+            if parts.path == "/":
+                self.send_body(200, search_page(settings), "text/html; charset=utf-8")
+                kind = "search_page"
+            elif parts.path == "/directors":
+                self.send_body(200, director_page(), "text/html; charset=utf-8")
+                kind = "director_page"
+            elif parts.path in ("/grid", "/directorGrid"):
+                is_grid = parts.path == "/grid"
+                time.sleep(settings["grid_latency_ms" if is_grid else "director_latency_ms"] / 1000)
+                kind = "grid" if is_grid else "director_grid"
+                if self.failing():
+                    self.send_body(500, f"<html><body>{ERROR_TEXT}</body></html>", "text/html")
+                    kind += "_error"
+                elif is_grid:
+                    self.send_body(200, json.dumps(self.grid_payload(params)), "application/json")
+                else:
+                    self.send_body(200, json.dumps({"page": 1, "total": 1, "records": 0, "rows": director_rows(params.get("suitId", ""))}), "application/json")
+            else:
+                self.send_body(404, f"<html><body>{ERROR_TEXT}</body></html>", "text/html")
+                kind = "not_found"
+
+            with lock:
+                request_log.append({"kind": kind, "path": parts.path, "params": params, "start": start_time, "end": time.time()})
+
+        def grid_payload(self, params):
+            records = settings["rows"] if params.get("state") in STATES else 0
+            page_size = max(1, min(int(params.get("rows") or settings["page_size"]), settings["max_page_size"]))
+            total_pages = -(-records // page_size) if records else 0
+            page_no = min(max(int(params.get("page") or 1), 1), max(total_pages, 1))
+            first = (page_no - 1) * page_size
+            rows = []
+            for index in range(first, min(first + page_size, records)):
+                row = result_row(params["state"], index, settings["director_every"])
+                rows.append({"id": str(index + 1), "cell": [row[c] for c in COLUMNS]})
+            return {"page": page_no, "total": total_pages, "records": records, "rows": rows}
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplicaHandler
+
+
+def start_site_replica(port:int = 0, **settings):
+    """Starts the replica in a background thread. Returns (server, base_url, request_log)."""
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown replica settings: {sorted(unknown)}")
+    settings = {**DEFAULT_SETTINGS, **settings}
+    request_log = []
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(settings, request_log))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/", request_log
+
+
+if __name__ == "__main__":
+    server, base_url, _ = start_site_replica(int(sys.argv[2]) if len(sys.argv) > 2 else 8766, rows=int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
+    print(f"▶ Site replica at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,74 @@
+# browser_profile.py
+#
+# Browser launch profiles, selected with "browser_profile" in search_details.json:
+#   visible  - headed Chromium with slow_mo 200, as the scraper always ran (watchable, slowest)
+#   headless - no window and no slow_mo
+#   fast     - headless plus a smaller viewport, with images, fonts, stylesheets, media and
+#              analytics requests aborted through a context route. Nothing the scraper reads
+#              comes from those requests.
+
+import threading
+from urllib.parse import urlsplit
+
+BROWSER_PROFILES = {
+    "visible": {"headless": False, "slow_mo": 200, "viewport": None, "block_resource_types": [], "block_analytics": False},
+    "headless": {"headless": True, "slow_mo": 0, "viewport": None, "block_resource_types": [], "block_analytics": False},
+    "fast": {
+        "headless": True, "slow_mo": 0, "viewport": {"width": 1024, "height": 768},
+        "block_resource_types": ["image", "font", "stylesheet", "media"], "block_analytics": True,
+    },
+}
+
+ANALYTICS_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "hotjar.com", "clarity.ms", "newrelic.com", "nr-data.net",
+)
+
+_stats_lock = threading.Lock()
+blocked_stats = {}
+
+
+def get_browser_profile(name):
+    return BROWSER_PROFILES.get(str(name).strip().lower(), BROWSER_PROFILES["visible"])
+
+
+def is_analytics_url(url):
+    host = urlsplit(url).hostname or ""
+    return any(host == h or host.endswith("." + h) for h in ANALYTICS_HOSTS)
+
+
+def launch_browser(playwright, profile):
+    return playwright.chromium.launch(headless=profile["headless"], slow_mo=profile["slow_mo"])
+
+
+def new_browser_context(browser, profile, storage_state=None):
+    """New context with the profile's viewport and request blocking, optionally from a storage_state snapshot."""
+    options = {"storage_state": storage_state} if storage_state else {}
+    if profile["viewport"]:
+        options["viewport"] = profile["viewport"]
+    context = browser.new_context(**options)
+    blocked_types = set(profile["block_resource_types"])
+    if blocked_types or profile["block_analytics"]:
+        # Routing turns off the HTTP cache, so it is only installed when something is blocked
+        def block_request(route):
+            request = route.request
+            if request.resource_type in blocked_types:
+                reason = request.resource_type
+            elif profile["block_analytics"] and is_analytics_url(request.url):
+                reason = "analytics"
+            else:
+                route.continue_()
+                return
+            with _stats_lock:
+                blocked_stats[reason] = blocked_stats.get(reason, 0) + 1
+            route.abort()
+
+        context.route("**/*", block_request)
+    return context
+
+
+def log_blocked_requests(logger):
+    with _stats_lock:
+        if blocked_stats:
+            logger.info(f"🚫 Blocked requests: {', '.join(f'{reason} {count}' for reason, count in sorted(blocked_stats.items()))}")
+        blocked_stats.clear()
@@ -0,0 +1,97 @@
+# browser_session.py
+#
+# A browser session is one Playwright instance, browser, context and page. With
+# "warm_browser" on, data_search keeps a single session for all states: the first state
+# pays for the launch, goto and the full search form walk, every following state with the
+# same date and defaulters type only changes #stateId and searches again. After each full
+# search the context's storage_state (cookies and local storage) is saved, and a relaunched
+# session (next run, or after a browser crash) starts from that snapshot.
+
+import os
+import time
+from playwright.sync_api import sync_playwright
+
+from utilities.browser_profile import get_browser_profile, launch_browser, new_browser_context
+from utilities.perform_search import perform_search, search_state
+
+
+def open_browser_session(logger, browser_profile:str = "visible", storage_state_file:str = ""):
+    start_time = time.time()
+    playwright = sync_playwright().start()
+    profile = get_browser_profile(browser_profile)
+    browser = launch_browser(playwright, profile)
+    restored = bool(storage_state_file) and os.path.exists(storage_state_file)
+    context = new_browser_context(browser, profile, storage_state_file if restored else None)
+    page = context.new_page()
+    logger.info(f"Browser launched ({browser_profile} profile{', storage state restored' if restored else ''}).")
+    return {
+        "playwright": playwright, "browser": browser, "profile": profile, "context": context, "page": page,
+        "browser_profile": browser_profile, "storage_state_file": storage_state_file,
+        "search": None,            # (date, defaulters_type) of the search the page currently shows
+        "launch_s": time.time() - start_time,
+        "cold_start_s": None,      # launch + goto + full search of the first state
+        "saved_s": 0.0,
+        "warm_switches": 0,
+    }
+
+
+def close_browser_session(session, logger=None):
+    if logger is not None and session["warm_switches"]:
+        logger.info(f"⏱ Warm browser: {session['warm_switches']} state switches, {round(session['saved_s'], 1)}s of startup and navigation saved in total")
+    try:
+        session["browser"].close()
+    finally:
+        session["playwright"].stop()
+
+
+def ensure_browser_session(session, logger):
+    """Returns the session, or a fresh one when its browser is gone."""
+    if session["browser"].is_connected():
+        return session
+    logger.warning("⚠️ Shared browser disconnected, launching a new one.")
+    try:
+        session["playwright"].stop()
+    except Exception:
+        pass
+    fresh = open_browser_session(logger, session["browser_profile"], session["storage_state_file"])
+    fresh.update(cold_start_s=session["cold_start_s"], saved_s=session["saved_s"], warm_switches=session["warm_switches"])
+    return fresh
+
+
+def search_form_ready(page):
+    try:
+        return page.locator("select#stateId").count() > 0 and page.locator("input#searchId").count() > 0
+    except Exception:
+        return False
+
+
+def start_search(session, logger, site_url, date, state, defaulters_type, timeout_ms:int = 60000, wait_profile:str = "safe"):
+    """
+    Shows the results for `state` on the session page and returns the pagination limit.
+    Reuses the current search when it is for the same date and defaulters type.
+    """
+    page = session["page"]
+    start_time = time.time()
+    if session["search"] == (date, defaulters_type) and search_form_ready(page):
+        try:
+            pagination_limit = search_state(page, logger, state, timeout_ms, wait_profile)
+            switch_s = time.time() - start_time
+            saved_s = max(session["cold_start_s"] - switch_s, 0.0) if session["cold_start_s"] else 0.0
+            session["saved_s"] += saved_s
+            session["warm_switches"] += 1
+            logger.info(f"⏱ Warm switch to {state} in {round(switch_s, 1)}s (cold start {round(session['cold_start_s'] or 0, 1)}s) → {round(saved_s, 1)}s saved")
+            return pagination_limit
+        except Exception as e:
+            logger.warning(f"⚠️ Warm switch to {state} failed ({e}), running the full search.")
+            start_time = time.time()
+
+    session["search"] = None
+    page.goto(site_url, timeout=timeout_ms, wait_until="load")
+    logger.info("Page loaded.")
+    pagination_limit = perform_search(page, logger, date, state, defaulters_type, timeout_ms, wait_profile)
+    session["search"] = (date, defaulters_type)
+    if session["cold_start_s"] is None:
+        session["cold_start_s"] = session["launch_s"] + time.time() - start_time
+    if session["storage_state_file"]:
+        session["context"].storage_state(path=session["storage_state_file"])
+    return pagination_limit
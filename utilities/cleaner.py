@@ -3,11 +3,29 @@ import ast  # to safely parse stringified lists/dicts
 import time
 import os
 from pathlib import Path
-import re
-
-def expand_directors_data(file_path, output_folder, logger):
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from utilities.stage_io import stage_files, read_stage, stage_row_count
+from utilities.stage_manifest import load_stage_manifest, clean_is_current, record_clean
+from utilities.name_normalizer import normalize_names
+
+def explode_directors(df):
+    """
+    One output row per director: the borrower row is repeated (original index kept) and
+    'Director Name', 'DIN Number' and 'PAN Number' are appended. Rows without directors are dropped.
+    """
+    directors = df["directors_data"].explode().dropna()
+    director_dicts = directors.tolist()
+    return df.loc[directors.index].assign(**{
+        "Director Name": [d.get("Directors Reported by Credit Institutions", "") for d in director_dicts],
+        "DIN Number": [d.get("DIN Number", "") for d in director_dicts],
+        "PAN Number": [d.get("PAN Number", "") for d in director_dicts],
+    })
+
+def expand_directors_data(file_path, output_folder, logger, export_format:str = "xlsx"):
     start_time = time.time()
-    df = pd.read_excel(file_path, dtype=str, engine="openpyxl")
+    df = read_stage(file_path, dtype=str)
     logger.info(f"Loaded Excel file successfully with {len(df)} rows")
 
     if len(df) == 0:
@@ -20,26 +38,26 @@ def expand_directors_data(file_path, output_folder, logger):
         print(f"❌ 'directors_data' column missing in {file_path}")
         return
 
-    df.drop(['borrowerName_href', 'directorName', 'directorName_href', 'source_date'], axis=1, inplace=True, errors='ignore')
+    df_expanded = preprocess_rows(df, file_path, logger)
+    output_file = export_preprocessed(df_expanded, file_path, output_folder, logger, export_format)
+
+    # print(f"✅ Expanded rows: {len(df_expanded)} -> Saved to: {output_file}")
+    print(df_expanded.head())
+    end_time = time.time()
+    print(f"🕒 Time taken: {round(end_time - start_time, 2)} seconds\n")
+    logger.info(f"🕒 Time taken: {round(end_time - start_time, 2)} seconds\n")
+    return len(df), len(df_expanded)
+
+def preprocess_rows(df, file_path, logger):
+    """Expands directors, renames and normalizes the columns of merged rows. Works on any row chunk."""
+    df = df.drop(['borrowerName_href', 'directorName', 'directorName_href', 'source_date'], axis=1, errors='ignore')
 
     # Parse the JSON-like 'directors' column (string → list of dicts)
     # df["directors_data"] = df["directors_data"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
     df["directors_data"] = df["directors_data"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x if isinstance(x, list) else [])
 
     # Expand each director into its own row
-    expanded_rows = []
-    for _, row in df.iterrows():
-        # directors_list = row["directors_data"] if isinstance(row["directors_data"], list) else []
-        directors_list = row["directors_data"] if isinstance(row["directors_data"], list) else []
-        # for director in row["directors_data"]:
-        for director in directors_list:
-            new_row = row.copy()
-            new_row["Director Name"] = director.get("Directors Reported by Credit Institutions", "")
-            new_row["DIN Number"] = director.get("DIN Number", "")
-            new_row["PAN Number"] = director.get("PAN Number", "")
-            expanded_rows.append(new_row)
-
-    df_expanded = pd.DataFrame(expanded_rows)
+    df_expanded = explode_directors(df)
     logger.info(f"Expanded {len(df_expanded)} rows from {len(df)} original rows")
 
     df_expanded.rename(columns={
@@ -71,141 +89,11 @@ def expand_directors_data(file_path, output_folder, logger):
     df_expanded['Final_DirectorName'] = df_expanded['Ind _Director Name']
 
     if 'Final Borrower Name' in df_expanded.columns:
-        df_expanded['Final Borrower Name'] = (
-            df_expanded['Final Borrower Name'].astype(str)
-            .str.lower()
-            .str.strip()
-
-            # Remove dots
-            .str.replace(r'\.', ' ', regex=True)
-
-            # Remove honorifics
-            .replace(r'\bm/s\b', '', regex=True)
-            .replace(r'\bmr\b', '', regex=True)
-            .replace(r'\bmrs\b', '', regex=True)
-            .replace(r'\bms\b', '', regex=True)
-            .replace(r'\bdr\b', '', regex=True)
-
-            # Company type replacements
-            .replace(r'\(?p\)?\s*ltd\b', 'private limited', regex=True)
-            .replace(r'\(p\)\s*', 'private', regex=True)
-            .replace(r'\bpvtltd\b', 'private limited', regex=True)
-            .replace(r'\bpvt\b', 'private', regex=True)
-            .replace(r'\bltd\b', 'limited', regex=True)
-            .replace(r'\bsoc\b', 'society', regex=True)
-            .replace(r'\bcorp\b', 'corporation', regex=True)
-
-            # Unwanted words / suffixes
-            .replace(r'\bsmt\b', '', regex=True)
-            .replace(r'\bsmti\b', '', regex=True)
-            .replace(r'\bmiss\b', '', regex=True)
-            .replace(r'\bindividual\b', '', regex=True)
-            .replace(r'\bchairman\b', '', regex=True)
-            .replace(r'\bmanaging director\b', '', regex=True)
-            .replace(r'\bpartner\b', '', regex=True)
-            .replace(r'\(?\b(b)?prop(riet([oe]r)?)?\)?', '', regex=True)   # handles (prop), bprop, proprietor, etc.
-            .replace(r'\bin liquidation\b', '', regex=True)
-            .replace(r'\(ind\)\s*', '', regex=True)
-            .replace(r'\berstwhile\s+promoter\b', '', regex=True)
-
-            # Remove titles before name (start only)
-            .replace(r'^\s*co[-\s]*applicant\s*', '', regex=True)
-            .replace(r'^\s*\(?whole\s*time\s*director\)?\s*', '', regex=True)
-            .replace(r'^\s*guarantors?\s+of\s+', '', regex=True)        # e.g., "Guarantors of Rajesh Kumar"
-            .replace(r'\bguarantors?\s+of\b', '', regex=True)
-            .replace(r'\(.*promoter.*guarantor.*\)', '', regex=True)    # e.g., (PROMOTER DIRECTOR/ GUARANTOR)
-            .replace(r'\(.*guarantor.*promoter.*\)', '', regex=True)
-            .replace(r'^\s*directors?\s*/\s*corporate\s*', '', regex=True)
-            .replace(r'\berstwhile\s+promoter\b', '', regex=True)
-            .replace(r'\(co-borrower\)\s*', '', regex=True)
-            .replace(r'^\s*(sh|ch)\.?\s+', '', regex=True)
-            .replace(r'^\s*\(\s*\)\s*', '', regex=True)
-
-            # Remove director variants at END
-            .replace(r'\s*\(?ex(?:ecutive)?\s*director[s]?\)?\s*$', '', regex=True)
-            .replace(r'\s*\(?director\s*(?:ex|\(ex\))?\)?\s*$', '', regex=True)  # handles Director EX or (EX)
-
-            # Remove parent info
-            .replace(r'\(?\s*(s|d|w)/o[^,;]*', '', regex=True)
-
-            # Remove leftover empty parentheses
-            .replace(r'\(\s*\)', '', regex=True)
-
-            # Normalize spaces and format
-            .replace(r'\s+', ' ', regex=True)
-            .str.upper()
-            .str.strip()
-
-        ) 
+        df_expanded['Final Borrower Name'] = normalize_names(df_expanded['Final Borrower Name'])
     logger.info("Cleaned and standardized text/numeric fields for 'Final Borrower Name'")
     
     if 'Final_DirectorName' in df_expanded.columns:
-        df_expanded['Final_DirectorName'] = (
-            df_expanded['Final_DirectorName'].astype(str)
-            .str.lower()
-            .str.strip()
-
-            # Remove dots
-            .str.replace(r'\.', ' ', regex=True)
-
-            # Remove honorifics
-            .replace(r'\bm/s\b', '', regex=True)
-            .replace(r'\bmr\b', '', regex=True)
-            .replace(r'\bmrs\b', '', regex=True)
-            .replace(r'\bms\b', '', regex=True)
-            .replace(r'\bdr\b', '', regex=True)
-
-            # Company type replacements
-            .replace(r'\(?p\)?\s*ltd\b', 'private limited', regex=True)
-            .replace(r'\(p\)\s*', 'private', regex=True)
-            .replace(r'\bpvtltd\b', 'private limited', regex=True)
-            .replace(r'\bpvt\b', 'private', regex=True)
-            .replace(r'\bltd\b', 'limited', regex=True)
-            .replace(r'\bsoc\b', 'society', regex=True)
-            .replace(r'\bcorp\b', 'corporation', regex=True)
-
-            # Unwanted words / suffixes
-            .replace(r'\bsmt\b', '', regex=True)
-            .replace(r'\bsmti\b', '', regex=True)
-            .replace(r'\bmiss\b', '', regex=True)
-            .replace(r'\bindividual\b', '', regex=True)
-            .replace(r'\bchairman\b', '', regex=True)
-            .replace(r'\bmanaging director\b', '', regex=True)
-            .replace(r'\bpartner\b', '', regex=True)
-            .replace(r'\(?\b(b)?prop(riet([oe]r)?)?\)?', '', regex=True)   # handles (prop), bprop, proprietor, etc.
-            .replace(r'\(ind\)\s*', '', regex=True)
-            .replace(r'\bin liquidation\b', '', regex=True)
-            .replace(r'\berstwhile\s+promoter\b', '', regex=True)
-
-            # Remove titles before name (start only)
-            .replace(r'^\s*co[-\s]*applicant\s*', '', regex=True)
-            .replace(r'^\s*\(?whole\s*time\s*director\)?\s*', '', regex=True)
-            .replace(r'^\s*guarantors?\s+of\s+', '', regex=True)        # e.g., "Guarantors of Rajesh Kumar"
-            .replace(r'\bguarantors?\s+of\b', '', regex=True)
-            .replace(r'\(.*promoter.*guarantor.*\)', '', regex=True)    # e.g., (PROMOTER DIRECTOR/ GUARANTOR)
-            .replace(r'\(.*guarantor.*promoter.*\)', '', regex=True)
-            .replace(r'^\s*directors?\s*/\s*corporate\s*', '', regex=True)
-            .replace(r'\berstwhile\s+promoter\b', '', regex=True)
-            .replace(r'\(co-borrower\)\s*', '', regex=True)
-            .replace(r'^\s*(sh|ch)\.?\s+', '', regex=True)
-            .replace(r'^\s*\(\s*\)\s*', '', regex=True)
-
-            # Remove director variants at END
-            .replace(r'\s*\(?ex(?:ecutive)?\s*director[s]?\)?\s*$', '', regex=True)
-            .replace(r'\s*\(?director\s*(?:ex|\(ex\))?\)?\s*$', '', regex=True)  # handles Director EX or (EX)
-
-            # Remove parent info
-            .replace(r'\(?\s*(s|d|w)/o[^,;]*', '', regex=True)
-
-            # Remove leftover empty parentheses
-            .replace(r'\(\s*\)', '', regex=True)
-
-            # Normalize spaces and format
-            .replace(r'\s+', ' ', regex=True)
-            .str.upper()
-            .str.strip()
-
-        ) 
+        df_expanded['Final_DirectorName'] = normalize_names(df_expanded['Final_DirectorName'])
     logger.info("Cleaned and standardized text/numeric fields for 'Final_DirectorName'")
 
     extra_cols = ['Borrower PAN','CIN NO','Order Type','Remarks']
@@ -220,32 +108,104 @@ def expand_directors_data(file_path, output_folder, logger):
     # df_expanded = df_expanded[new_order]
     df_expanded = df_expanded[existing_cols]
     logger.info(f"Added extra columns: {extra_cols}")
+    return df_expanded
+
+def preprocessed_output_path(file_path, output_folder, export_format:str = "xlsx"):
+    extension = ".parquet" if export_format == "parquet" else ".xlsx"
+    return os.path.join(output_folder, f"final_preprocessed_{os.path.splitext(os.path.basename(file_path))[0]}{extension}")
 
-    folder, filename = os.path.split(file_path)
-    output_file = os.path.join(output_folder, f"final_preprocessed_{filename}")
-    df_expanded.to_excel(output_file, index=False)
+def export_preprocessed(df_expanded, file_path, output_folder, logger, export_format:str = "xlsx"):
+    output_file = preprocessed_output_path(file_path, output_folder, export_format)
+    if export_format == "parquet":
+        df_expanded.assign(**{'Director Name--DIN no. Detail': df_expanded['Director Name--DIN no. Detail'].astype(str)}).to_parquet(output_file, index=False)
+    else:
+        df_expanded.to_excel(output_file, index=False)
     logger.info(f"Saved expanded file: {output_file} ({len(df_expanded)} rows)")
+    return output_file
 
-    # print(f"✅ Expanded rows: {len(df_expanded)} -> Saved to: {output_file}")
-    print(df_expanded.head())
-    end_time = time.time()
-    print(f"🕒 Time taken: {round(end_time - start_time, 2)} seconds\n")
-    logger.info(f"🕒 Time taken: {round(end_time - start_time, 2)} seconds\n")
+# ----------------- Parallel cleaning -----------------
+def clean_file(file_path, output_folder, logger, export_format:str = "xlsx"):
+    """Worker task for a whole file. Returns ((rows_in, rows_out) or None when nothing was written, seconds)."""
+    start_time = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = expand_directors_data(file_path, output_folder, logger, export_format)
+    return rows, time.time() - start_time
 
-def cleaner(logger):
+
+def clean_chunk(df, file_path, logger):
+    """Worker task for a row chunk of a large file. Returns (chunk_expanded, seconds)."""
+    start_time = time.time()
+    df_expanded = preprocess_rows(df, file_path, logger)
+    return df_expanded, time.time() - start_time
+
+
+def clean_files_parallel(logger, file_paths, output_folder, export_format:str = "xlsx", workers:int = 2, chunk_rows:int = 50000):
+    """
+    Cleans files across `workers` processes. Files up to `chunk_rows` rows are cleaned whole by a
+    worker; larger files are read here, split into row chunks for the workers and their chunks
+    concatenated back in order before the export. Reports per-file timings in file order.
+    Returns the files that were cleaned and exported.
+    """
+    start_time = time.time()
+    tasks = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_path in file_paths:
+            row_count = stage_row_count(file_path)
+            if not chunk_rows or row_count <= chunk_rows:
+                tasks[file_path] = executor.submit(clean_file, file_path, output_folder, logger, export_format)
+                continue
+            read_start = time.time()
+            df = read_stage(file_path, dtype=str)
+            if 'directors_data' not in df.columns:
+                logger.error(f"'directors_data' column missing in {file_path}")
+                continue
+            chunks = [df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows)]
+            tasks[file_path] = (len(df), time.time() - read_start, [executor.submit(clean_chunk, chunk, file_path, logger) for chunk in chunks])
+            logger.info(f"Split {os.path.basename(file_path)} ({len(df)} rows) into {len(chunks)} chunks")
+
+        report = []
+        cleaned_files = []
+        for file_path, task in tasks.items():
+            name = os.path.basename(file_path)
+            try:
+                if isinstance(task, tuple):
+                    rows_in, read_seconds, chunk_futures = task
+                    results = [future.result() for future in chunk_futures]
+                    export_start = time.time()
+                    df_expanded = pd.concat([chunk_df for chunk_df, _ in results])
+                    export_preprocessed(df_expanded, file_path, output_folder, logger, export_format)
+                    seconds = read_seconds + sum(t for _, t in results) + time.time() - export_start
+                    report.append((name, rows_in, len(df_expanded), seconds, len(results)))
+                else:
+                    rows, seconds = task.result()
+                    if rows is None:
+                        continue
+                    report.append((name, rows[0], rows[1], seconds, 1))
+                cleaned_files.append(file_path)
+            except Exception as e:
+                logger.error(f"❌ Cleaning failed for {name}: {e}", exc_info=True)
+
+    for name, rows_in, rows_out, seconds, chunk_count in report:
+        logger.info(f"🕒 {name}: {rows_in} rows → {rows_out} rows in {round(seconds, 2)}s ({chunk_count} chunk{'s' if chunk_count > 1 else ''})")
+    logger.info(f"🕒 Cleaned {len(report)}/{len(file_paths)} files with {workers} workers in {round(time.time() - start_time, 2)} seconds")
+    return cleaned_files
+
+
+def cleaner(logger, export_format:str = "xlsx", workers:int = 1, chunk_rows:int = 50000, incremental:bool = True):
     try:
         current_path = Path.cwd() / "fetched_data" / "final" 
         output_folder = current_path.parent / "final_preprocessed"
         os.makedirs(output_folder, exist_ok=True)  # create folder if it doesn't exist
         print(f'📂 Current folder path: {current_path}\n')
         logger.info(f"Current folder path: {current_path}")
-        folder_list = [f for f in current_path.iterdir() if f.is_dir()]
+        folder_list = sorted(f for f in current_path.iterdir() if f.is_dir())
         print(f'📁 Folders found for processing: {folder_list}\n')
         logger.info(f"Folders found for processing: {folder_list}")
+        file_paths = []
         for folder in folder_list:
             
             print(f'--- Opening folder: {folder} ---')
-            xlsx_files = [f for f in os.listdir(folder) if f.endswith('.xlsx')]
+            xlsx_files = stage_files(folder)
             print(f'Files found: {xlsx_files}\n')
             logger.info(f'Files found: {xlsx_files}\n')
 
@@ -254,10 +214,29 @@ def cleaner(logger):
                     print(f"Ignoring temporary file: {item}")
                     logger.info(f"Ignoring temporary file: {item}")
                     continue
-                file_path = os.path.join(folder, item)
-                print(f'Processing file: {file_path}')
-                logger.info(f'Processing file: {file_path}')
-                expand_directors_data(file_path, output_folder, logger)
+                file_paths.append(os.path.join(folder, item))
+
+        # Skip merged files already cleaned from the same content (see stage_manifest)
+        manifest = load_stage_manifest(logger, current_path)
+        pending = {}
+        for file_path in file_paths:
+            is_current, fingerprint = clean_is_current(manifest, file_path, preprocessed_output_path(file_path, output_folder, export_format))
+            if incremental and is_current:
+                logger.info(f"⏭ {os.path.basename(file_path)} unchanged since it was last cleaned. Skipping.")
+                continue
+            pending[file_path] = fingerprint
+        logger.info(f"Files to clean: {len(pending)}, up to date: {len(file_paths) - len(pending)}")
+
+        if workers > 1:
+            for file_path in clean_files_parallel(logger, list(pending), output_folder, export_format, workers, chunk_rows):
+                record_clean(manifest, file_path, pending[file_path], preprocessed_output_path(file_path, output_folder, export_format))
+            return
+
+        for file_path, fingerprint in pending.items():
+            print(f'Processing file: {file_path}')
+            logger.info(f'Processing file: {file_path}')
+            if expand_directors_data(file_path, output_folder, logger, export_format):
+                record_clean(manifest, file_path, fingerprint, preprocessed_output_path(file_path, output_folder, export_format))
     except Exception as e:
         logger.error(f"Unexpected error in cleaner: {e}", exc_info=True)
         print(f"❌ Unexpected error in cleaner: {e}")
\ No newline at end of file
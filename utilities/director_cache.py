@@ -0,0 +1,194 @@
+# director_cache.py
+#
+# Director lists keyed by the getDirctorList href arguments. The same borrower shows up
+# under several banks, branches, pages and states with identical href arguments, so a list
+# fetched once can be reused everywhere. The cache is a SQLite file shared by all raw
+# output folders (and state worker processes) plus an in-memory layer for the current run.
+# Entries expire after ttl_days (0 = never). Each search date keeps its own entry for an
+# href: with scope "quarter" only the entry of the run's date is reused, with scope "any"
+# the most recently fetched one.
+
+import sqlite3
+import threading
+import time
+import ujson as json
+
+from utilities.grid_client import parse_href_args
+from utilities.run_state_store import record_director_batch, export_page
+
+CACHE_FILE_NAME = "director_cache.sqlite"
+CACHE_SCOPES = ("quarter", "any")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS director_cache (
+    href_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    directors_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (href_key, date)
+);
+"""
+
+# Caches created before entries were kept per date have href_key alone as the primary key
+MIGRATE_SCHEMA = """
+BEGIN IMMEDIATE;
+ALTER TABLE director_cache RENAME TO director_cache_by_href;
+""" + SCHEMA + """
+INSERT OR IGNORE INTO director_cache SELECT href_key, date, directors_json, fetched_at FROM director_cache_by_href;
+DROP TABLE director_cache_by_href;
+COMMIT;
+"""
+
+
+def director_cache_key(href_js):
+    """'javascript:getDirctorList(1356472,147,1)' -> '1356472,147,1', or None for other links."""
+    args = parse_href_args(href_js)
+    return ",".join(args) if args else None
+
+
+def open_director_cache(cache_file, date, ttl_days:int = 0, scope:str = "quarter"):
+    """
+    Returns the cache for this run. With an empty cache_file only the in-memory layer is
+    used, which still coalesces duplicate hrefs within the run.
+    """
+    if scope not in CACHE_SCOPES:
+        raise ValueError(f"Unknown director cache scope '{scope}'. Choose from {CACHE_SCOPES}.")
+    return {
+        "file": str(cache_file) if cache_file else "",
+        "date": date,
+        "ttl_days": ttl_days,
+        "scope": scope,
+        "memory": {},
+        "local": threading.local(),  # one SQLite connection per thread
+        "lock": threading.Lock(),
+        "hits": 0,
+        "misses": 0,
+        "stored": 0,
+    }
+
+
+def cache_connection(cache):
+    conn = getattr(cache["local"], "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(cache["file"], timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        primary_key = [r[1] for r in sorted(conn.execute("PRAGMA table_info(director_cache)"), key=lambda r: r[5]) if r[5]]
+        if primary_key == ["href_key"]:
+            conn.executescript(MIGRATE_SCHEMA)
+        cache["local"].conn = conn
+    return conn
+
+
+def find_cached(cache, key):
+    """Directors for a key when a valid entry exists, else None. Does not touch the counters."""
+    with cache["lock"]:
+        if key in cache["memory"]:
+            return cache["memory"][key]
+    if not cache["file"]:
+        return None
+
+    query = "SELECT directors_json FROM director_cache WHERE href_key = ?"
+    params = [key]
+    if cache["scope"] == "quarter":
+        query += " AND date = ?"
+        params.append(cache["date"])
+    if cache["ttl_days"] > 0:
+        query += " AND fetched_at >= ?"
+        params.append(time.time() - cache["ttl_days"] * 86400)
+    query += " ORDER BY fetched_at DESC LIMIT 1"
+    row = cache_connection(cache).execute(query, params).fetchone()
+    if row is None:
+        return None
+    directors = json.loads(row[0])
+    with cache["lock"]:
+        cache["memory"][key] = directors
+    return directors
+
+
+def cached_directors(cache, href_js):
+    """Directors for an href from the cache (None on a miss), counting hits and misses."""
+    key = director_cache_key(href_js)
+    directors = find_cached(cache, key) if key else None
+    with cache["lock"]:
+        cache["hits" if directors is not None else "misses"] += 1
+    return directors
+
+
+def store_directors(cache, href_js, directors):
+    """Caches a fetched list. Empty lists are failed lookups and are never cached."""
+    key = director_cache_key(href_js)
+    if not key or not directors:
+        return
+    with cache["lock"]:
+        cache["memory"][key] = directors
+        cache["stored"] += 1
+    if cache["file"]:
+        conn = cache_connection(cache)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO director_cache (href_key, date, directors_json, fetched_at) VALUES (?, ?, ?, ?)",
+                (key, cache["date"], json.dumps(directors), time.time()),
+            )
+
+
+def count_misses(cache, count):
+    with cache["lock"]:
+        cache["misses"] += count
+
+
+def close_director_cache(cache):
+    """Closes the calling thread's connection; every thread that used the cache calls it."""
+    conn = getattr(cache["local"], "conn", None)
+    if conn is not None:
+        conn.close()
+        cache["local"].conn = None
+
+
+# ----------------- Pending rows -----------------
+def apply_cached_directors(logger, cache, conn, search_id, raw_output_folder, pending):
+    """
+    Fills pending rows [(page_no, row_idx, href, borrower_name), ...] whose href is cached,
+    re-exports the touched pages and returns the rows still pending.
+    """
+    resolved, remaining = [], []
+    for job in pending:
+        key = director_cache_key(job[2])
+        directors = find_cached(cache, key) if key else None
+        if directors is not None:
+            resolved.append((job[0], job[1], directors))
+        else:
+            remaining.append(job)
+    if not resolved:
+        return remaining
+
+    with cache["lock"]:
+        cache["hits"] += len(resolved)
+    record_director_batch(conn, search_id, resolved)
+    for page_no in sorted({page_no for page_no, _, _ in resolved}):
+        logger.info(f"✅ Updated raw file saved with director info → {export_page(conn, search_id, page_no, raw_output_folder)}")
+    return remaining
+
+
+def coalesce_pending(pending):
+    """
+    One pending row per href; the duplicates are filled from the cache afterwards. When the
+    lookup fails, retry_pass.queue_href_duplicates queues them along with the failed row.
+    """
+    seen = set()
+    unique = []
+    for job in pending:
+        key = director_cache_key(job[2])
+        if key in seen:
+            continue
+        if key:
+            seen.add(key)
+        unique.append(job)
+    return unique
+
+
+def log_director_cache_stats(logger, cache, state):
+    lookups = cache["hits"] + cache["misses"]
+    hit_rate = round(100 * cache["hits"] / lookups, 1) if lookups else 0
+    logger.info(f"🗂 Director cache for {state}: {cache['hits']} hits, {cache['misses']} misses ({hit_rate}% hit rate), {cache['stored']} lists stored")
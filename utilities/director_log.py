@@ -0,0 +1,88 @@
+# director_log.py
+#
+# Append-only checkpoint log for director results. Every lookup result is appended as one
+# JSON line to a per-page delta log next to the raw page file; the log is fsynced and the
+# run-state store committed every `checkpoint_every` results instead of rewriting the page
+# file. When a page is finished the log is compacted: remaining results go to the store,
+# the Parquet page file is exported once and the log is removed. Logs left behind by a
+# crash are replayed into the store at startup.
+
+import os
+import ujson as json
+
+from utilities.run_state_store import page_file_name, page_files, record_director_batch, export_page
+
+DIRECTOR_LOG_SUFFIX = ".directors.jsonl"
+
+
+def director_log_path(raw_output_folder, page_file):
+    return os.path.join(raw_output_folder, os.path.splitext(os.path.basename(page_file))[0] + DIRECTOR_LOG_SUFFIX)
+
+
+def read_director_log(path):
+    """Returns [(page_no, row_idx, directors), ...]. A torn last line from a crash is ignored."""
+    results = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            results.append((entry["page_no"], entry["row_idx"], entry["directors"]))
+    return results
+
+
+def replay_director_logs(conn, logger, search_id, raw_output_folder):
+    """Compacts director logs left by an interrupted run into the store and the page files."""
+    for file_path in page_files(conn, search_id, raw_output_folder):
+        log_path = director_log_path(raw_output_folder, file_path)
+        if not os.path.exists(log_path):
+            continue
+        results = read_director_log(log_path)
+        record_director_batch(conn, search_id, results)
+        if results:
+            export_page(conn, search_id, results[0][0], raw_output_folder)
+        os.remove(log_path)
+        logger.info(f"Replayed {len(results)} director results from {os.path.basename(log_path)}")
+
+
+# ----------------- Checkpointing -----------------
+def open_director_checkpoints(conn, search_id, raw_output_folder, checkpoint_every:int = 20):
+    return {"conn": conn, "search_id": search_id, "raw_output_folder": raw_output_folder, "checkpoint_every": max(1, checkpoint_every), "pages": {}}
+
+
+def flush_page_log(checkpoints, log):
+    """fsyncs the page log, then commits the results not yet in the store as one transaction."""
+    log["file"].flush()
+    os.fsync(log["file"].fileno())
+    record_director_batch(checkpoints["conn"], checkpoints["search_id"], log["unstored"])
+    log["unstored"] = []
+
+
+def checkpoint_directors(checkpoints, page_no, row_idx, directors):
+    """Appends one director result to its page log."""
+    log = checkpoints["pages"].get(page_no)
+    if log is None:
+        page_file = page_file_name(checkpoints["conn"], checkpoints["search_id"], page_no)
+        log_file = open(director_log_path(checkpoints["raw_output_folder"], page_file), "a", encoding="utf-8")
+        log = checkpoints["pages"][page_no] = {"file": log_file, "unstored": []}
+
+    log["file"].write(json.dumps({"page_no": page_no, "row_idx": row_idx, "directors": directors}) + "\n")
+    log["unstored"].append((page_no, row_idx, directors))
+    if len(log["unstored"]) >= checkpoints["checkpoint_every"]:
+        flush_page_log(checkpoints, log)
+
+
+def finish_director_page(checkpoints, page_no):
+    """Compacts a page: flushes its log into the store, exports the Parquet page file once and removes the log."""
+    log = checkpoints["pages"].pop(page_no, None)
+    if log is not None:
+        flush_page_log(checkpoints, log)
+        log["file"].close()
+        os.remove(log["file"].name)
+    return export_page(checkpoints["conn"], checkpoints["search_id"], page_no, checkpoints["raw_output_folder"])
+
+
+def close_director_checkpoints(checkpoints):
+    """Finishes every page still open. Returns the exported page files."""
+    return [finish_director_page(checkpoints, page_no) for page_no in sorted(checkpoints["pages"])]
@@ -0,0 +1,148 @@
+# director_lookup.py
+#
+# Lookup modes:
+#   navigate - the popup replaces the results page, which is restored with go_back (or a reload)
+#   tab      - lookups run in a second page of the same context that holds its own copy of the
+#              search, so the main page and its grid are never navigated
+
+import threading
+
+from utilities.wait_for_loader_to_disappear import wait_for_loader_to_disappear
+from utilities.extract_directors import extract_directors
+from utilities.wait_strategy import get_wait_profile, wait_for_director_rows, wait_for_results_grid
+from utilities.is_website_issue import is_website_issue, WebsiteIssueError
+from utilities.director_cache import cached_directors, store_directors
+from utilities.perform_search import perform_search
+from utilities.run_metrics import timed
+from utilities.throttle import throttle_slot
+
+DIRECTOR_LOOKUP_MODES = ("navigate", "tab")
+
+# Why the last lookup of this thread came back empty, for the retry queue
+_last_lookup = threading.local()
+
+
+def last_lookup_error():
+    return getattr(_last_lookup, "error", "") or "empty director list"
+
+# ----------------- Director Extraction -----------------
+def extract_directors_from_href(page, logger, href_js, timeout_ms:int = 60000, wait_profile:str = "safe", slot=None):
+    try:
+        page.evaluate(href_js)
+        wait_for_director_rows(page, logger, get_wait_profile(wait_profile), timeout_ms)
+        director_data = extract_directors(page, logger, wait_timeout_ms=0)
+        # extract_directors returns [] instead of raising, so an error page in place of the rows is caught here
+        if not director_data and is_website_issue(page.content()):
+            raise WebsiteIssueError("the site returned its error page instead of the director list")
+        logger.debug("Successfully extracted director data.")
+        return director_data
+    except Exception as e:
+        logger.error(f"⚠️ Error parsing or fetching directors: {e}", exc_info=True)
+        website_issue = is_website_issue(page.content())
+        if website_issue:
+            logger.info("Website crashed, throttling lookups; the row stays pending for a retry.")
+        else:
+            logger.info("Website response looks fine, the row stays pending for a retry.")
+        if slot is not None:
+            slot["outcome"] = "website_issue" if website_issue else "error"
+        _last_lookup.error = f"{'website issue' if website_issue else 'error'}: {e}"
+        return []
+
+# ----------------- Director Tab -----------------
+def open_director_tab(context, logger, site_url, date, state, defaulters_type, timeout_ms:int = 60000, wait_profile:str = "safe"):
+    """Opens a second page in `context` and runs the search there once."""
+    tab = context.new_page()
+    tab.goto(site_url, timeout=timeout_ms, wait_until="load")
+    perform_search(tab, logger, date, state, defaulters_type, timeout_ms, wait_profile)
+    logger.info("Director tab ready.")
+    return {
+        "page": tab, "context": context, "site_url": site_url, "search": (date, state, defaulters_type),
+        "on_results": True, "timeout_ms": timeout_ms, "wait_profile": wait_profile,
+    }
+
+
+def reset_director_tab(director_tab, logger):
+    """Replaces a broken director tab with a fresh one. The main page is left alone."""
+    try:
+        director_tab["page"].close()
+    except Exception:
+        pass
+    date, state, defaulters_type = director_tab["search"]
+    director_tab.update(open_director_tab(director_tab["context"], logger, director_tab["site_url"], date, state, defaulters_type, director_tab["timeout_ms"], director_tab["wait_profile"]))
+
+
+def close_director_tab(director_tab):
+    if director_tab is not None:
+        director_tab["page"].close()
+
+
+def director_function_available(page):
+    try:
+        return bool(page.evaluate("() => typeof getDirctorList === 'function'"))
+    except Exception:
+        return False
+
+
+def extract_directors_in_tab(director_tab, logger, href_js, timeout_ms:int = 60000, wait_profile:str = "safe", slot=None):
+    """
+    Runs one lookup in the director tab. When the popup page defines getDirctorList itself
+    the next lookup starts from there; otherwise the tab goes back to its results first.
+    """
+    tab = director_tab["page"]
+    try:
+        if not director_tab["on_results"] and not director_function_available(tab):
+            with timed("go_back"):
+                tab.go_back(timeout=timeout_ms)
+                wait_for_results_grid(tab, logger, get_wait_profile(wait_profile), timeout_ms)
+            director_tab["on_results"] = True
+    except Exception:
+        logger.info("⚠️ Director tab could not go back, opening a fresh one...")
+        reset_director_tab(director_tab, logger)
+        tab = director_tab["page"]
+
+    director_tab["on_results"] = False
+    return extract_directors_from_href(tab, logger, href_js, timeout_ms, wait_profile, slot)
+
+
+# ----------------- Cached Lookup -----------------
+def lookup_directors(page, logger, href_js, cache=None, timeout_ms:int = 60000, wait_profile:str = "safe", director_tab=None, throttle=None):
+    """
+    Director list for one href: from the cache when possible, otherwise through the popup,
+    in the director tab when one is given or on `page` followed by a return to the results.
+    Popup lookups take a slot of `throttle`. Fetched lists are added to the cache.
+    """
+    _last_lookup.error = ""
+    if cache is not None:
+        directors = cached_directors(cache, href_js)
+        if directors is not None:
+            logger.debug("Director data taken from the cache.")
+            return directors
+    if director_tab is not None:
+        with timed("director_lookup (tab)"), throttle_slot(throttle) as slot:
+            directors = extract_directors_in_tab(director_tab, logger, href_js, timeout_ms, wait_profile, slot)
+    else:
+        with timed("director_lookup (navigate)"), throttle_slot(throttle) as slot:
+            directors = extract_directors_from_href(page, logger, href_js, timeout_ms, wait_profile, slot)
+            with timed("go_back"):
+                return_to_results(page, logger, timeout_ms, wait_profile)
+    if cache is not None:
+        store_directors(cache, href_js, directors)
+    return directors
+
+# ----------------- Back to Results -----------------
+def return_to_results(page, logger, timeout_ms:int = 60000, wait_profile:str = "safe"):
+    """
+    Navigates back from the director list to the search results.
+    Falls back to a page reload when history navigation fails.
+    """
+    profile = get_wait_profile(wait_profile)
+    try:
+        page.go_back(timeout=60000)
+        wait_for_results_grid(page, logger, profile, timeout_ms)
+    except Exception:
+        logger.info("⚠️ Could not navigate back, reloading page...")
+        # Reload the page and re-perform the search to restore state
+        page.reload()
+        page.wait_for_load_state("networkidle")
+        wait_for_loader_to_disappear(page, logger, timeout_ms)
+        logger.info("🔄 Page reloaded successfully.")
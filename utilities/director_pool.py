@@ -0,0 +1,128 @@
+# director_pool.py
+#
+# Runs the director phase on N isolated browsers. Playwright's sync API is bound to the
+# thread that started it, so every worker owns its own sync_playwright instance, restores
+# the search results once, then pulls pending rows from a shared queue. Results flow back
+# to the calling thread, which is the only one writing to the run-state store.
+
+import queue
+import threading
+import time
+from playwright.sync_api import sync_playwright
+
+from utilities.perform_search import perform_search
+from utilities.browser_profile import launch_browser, new_browser_context
+from utilities.director_lookup import lookup_directors, last_lookup_error
+from utilities.director_cache import close_director_cache
+from utilities.run_state_store import queue_failure
+from utilities.logger import open_progress, log_progress, close_progress
+from utilities.director_log import open_director_checkpoints, checkpoint_directors, finish_director_page, close_director_checkpoints
+
+
+def director_worker(worker_id, jobs, results, all_stats, logger, browser_profile, site_url, date, state, defaulters_type, timeout_ms:int = 60000, wait_profile:str = "safe", cache=None, throttle=None):
+    stats = {"worker": worker_id, "lookups": 0, "fetched": 0, "failed": 0, "seconds": 0.0}
+    try:
+        with sync_playwright() as p:
+            browser = launch_browser(p, browser_profile)
+            context = new_browser_context(browser, browser_profile)
+            page = context.new_page()
+            page.goto(site_url, timeout=timeout_ms, wait_until="load")
+            perform_search(page, logger, date, state, defaulters_type, timeout_ms, wait_profile)
+            logger.info(f"Director worker {worker_id} ready.")
+
+            while True:
+                try:
+                    page_no, row_idx, href, borrower_name = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                start_time = time.time()
+                directors = lookup_directors(page, logger, href, cache, timeout_ms, wait_profile, throttle=throttle)
+                results.put((page_no, row_idx, directors, "" if directors else last_lookup_error()))
+                logger.debug(f"[worker {worker_id}] Directors for page {page_no}, row {row_idx+1}: {borrower_name} ({len(directors)})")
+
+                stats["lookups"] += 1
+                stats["fetched" if directors else "failed"] += 1
+                stats["seconds"] += time.time() - start_time
+            browser.close()
+    except Exception as e:
+        logger.error(f"❌ Director worker {worker_id} stopped: {e}", exc_info=True)
+    finally:
+        if cache is not None:
+            close_director_cache(cache)  # this worker's own SQLite connection
+        all_stats.append(stats)
+        results.put(None)  # tells the collector this worker is done
+
+
+def fetch_directors_concurrently(logger, conn, search_id, raw_output_folder, pending, concurrency, browser_profile, site_url, date, state, defaulters_type, timeout_ms:int = 60000, wait_profile:str = "safe", checkpoint_every:int = 20, cache=None, throttle=None, max_attempts:int = 3):
+    """
+    Fetches directors for the pending rows [(page_no, row_idx, href, borrower_name), ...]
+    with `concurrency` browsers. Results are appended to the page checkpoint logs as they
+    arrive and each page file is exported once all of its pending rows are back.
+    """
+    if not pending:
+        logger.info(f"Directors already extracted for all rows of {state}.")
+        return
+
+    worker_count = max(1, min(concurrency, len(pending)))
+    logger.info(f"▶ Fetching {len(pending)} director lists for {state} with {worker_count} workers")
+
+    jobs = queue.Queue()
+    for job in pending:
+        jobs.put(job)
+    results = queue.Queue()
+    all_stats = []
+
+    start_time = time.time()
+    workers = [
+        threading.Thread(
+            target=director_worker,
+            args=(worker_id, jobs, results, all_stats, logger, browser_profile, site_url, date, state, defaulters_type, timeout_ms, wait_profile, cache, throttle),
+            daemon=True,
+        )
+        for worker_id in range(1, worker_count + 1)
+    ]
+    for worker in workers:
+        worker.start()
+
+    checkpoints = open_director_checkpoints(conn, search_id, raw_output_folder, checkpoint_every)
+    remaining_rows = {}
+    for page_no, _, _, _ in pending:
+        remaining_rows[page_no] = remaining_rows.get(page_no, 0) + 1
+    unanswered = {(page_no, row_idx) for page_no, row_idx, _, _ in pending}
+    finished_workers = 0
+    progress = open_progress(logger, f"Director lookups for {state}", len(pending))
+    while finished_workers < worker_count:
+        item = results.get()
+        if item is None:
+            finished_workers += 1
+            continue
+        page_no, row_idx, directors, error = item
+        unanswered.discard((page_no, row_idx))
+        checkpoint_directors(checkpoints, page_no, row_idx, directors)
+        if not directors:
+            queue_failure(conn, search_id, "director", page_no, row_idx, error, max_attempts)
+        log_progress(progress, "fetched" if directors else "empty")
+        remaining_rows[page_no] -= 1
+        if remaining_rows[page_no] == 0:
+            logger.info(f"✅ Updated raw file saved with director info → {finish_director_page(checkpoints, page_no)}")
+
+    for worker in workers:
+        worker.join()
+    close_progress(progress)
+
+    # Rows no worker got to because every worker stopped early
+    if unanswered:
+        logger.warning(f"⚠️ {len(unanswered)} of {len(pending)} director rows for {state} were never looked up because all workers stopped; queued for the retry pass.")
+        for page_no, row_idx in sorted(unanswered):
+            queue_failure(conn, search_id, "director", page_no, row_idx, "director worker stopped", max_attempts)
+
+    # pages left open when a worker stopped early
+    for file_name in close_director_checkpoints(checkpoints):
+        logger.info(f"✅ Updated raw file saved with director info → {file_name}")
+
+    elapsed = time.time() - start_time
+    for stats in sorted(all_stats, key=lambda s: s["worker"]):
+        per_minute = stats["lookups"] / (stats["seconds"] / 60) if stats["seconds"] else 0
+        logger.info(f"Worker {stats['worker']}: {stats['lookups']} lookups ({stats['fetched']} fetched, {stats['failed']} failed) in {round(stats['seconds'], 1)}s → {round(per_minute, 1)}/min")
+    total_lookups = sum(s["lookups"] for s in all_stats)
+    logger.info(f"🕒 Director phase for {state}: {total_lookups}/{len(pending)} lookups in {round(elapsed, 1)}s with {worker_count} workers")
@@ -1,7 +1,9 @@
-def extract_directors(page, logging):
+def extract_directors(page, logging, wait_timeout_ms:int = 60000):
+    # wait_timeout_ms=0 when the caller has already waited for the rows (wait_for_director_rows)
     directors = []
     try:
-        page.wait_for_selector("table#DirectorInfoTable tr.jqgrow", timeout=60000)
+        if wait_timeout_ms:
+            page.wait_for_selector("table#DirectorInfoTable tr.jqgrow", timeout=wait_timeout_ms)
         rows = page.locator("table#DirectorInfoTable tr.jqgrow")
         row_count = rows.count()
         if row_count == 0:
@@ -3,7 +3,63 @@
 import os
 import pandas as pd
 
-def extract_table_data(page, logging, date, defaulters_type, state, page_no, cibil_link_files, raw_output_folder, timeout_ms:int = 60000):
+from utilities.stage_io import write_stage
+
+# Serializes every jqGrid row in a single round-trip. Mirrors the per-cell logic below:
+# hidden cells are skipped, the header comes from aria-describedby (col_{j} as fallback),
+# the text is the title attribute or the trimmed inner text, and the first link's href is kept.
+BULK_EXTRACT_JS = """
+() => Array.from(document.querySelectorAll("table.ui-jqgrid-btable tr.jqgrow")).map(row => {
+    const rowDict = {};
+    Array.from(row.querySelectorAll("td")).forEach((cell, j) => {
+        if (getComputedStyle(cell).display === "none") return;
+        const headerId = cell.getAttribute("aria-describedby");
+        const header = headerId ? headerId.replaceAll("projectTable_", "") : `col_${j}`;
+        rowDict[header] = cell.getAttribute("title") || cell.innerText.trim();
+        const link = cell.querySelector("a");
+        if (link) {
+            const href = link.getAttribute("href");
+            if (href) rowDict[`${header}_href`] = href;
+        }
+    });
+    return rowDict;
+})
+"""
+
+def raw_output_file_name(date, defaulters_type, state, page_no, extension:str = ".parquet"):
+    return f"cibil_data_{date}_{defaulters_type}_{state}_state_page_{page_no}{extension}"
+
+def extract_table_rows_bulk(page):
+    """
+    Reads all rows of the results grid with one page.evaluate call.
+    Returns a list of dicts keyed by column header (plus '<header>_href' for links).
+    """
+    return page.evaluate(BULK_EXTRACT_JS)
+
+def extract_table_row(row):
+    """Per-cell version of BULK_EXTRACT_JS for a single grid row locator."""
+    cells = row.locator("td")
+    cell_count = cells.count()
+    row_dict = {}
+
+    for j in range(cell_count):
+        cell = cells.nth(j)
+        if cell.evaluate("el => getComputedStyle(el).display") == "none":
+            continue
+
+        header_id = cell.get_attribute("aria-describedby")
+        header = header_id.replace("projectTable_", "") if header_id else f"col_{j}"
+        text = cell.get_attribute("title") or cell.inner_text().strip()
+        row_dict[header] = text
+
+        link_locator = cell.locator("a")
+        if link_locator.count() > 0:
+            href = link_locator.first.get_attribute("href")
+            if href:
+                row_dict[f"{header}_href"] = href
+    return row_dict
+
+def extract_table_data(page, logging, date, defaulters_type, state, page_no, cibil_link_files, raw_output_folder, timeout_ms:int = 60000, bulk:bool = True):
     logging.info("▶ Extracting table data...")
     try:
         page.wait_for_selector("table.ui-jqgrid-btable tr.jqgrow", timeout=timeout_ms)
@@ -20,41 +76,40 @@ def extract_table_data(page, logging, date, defaulters_type, state, page_no, cib
             logging.info(f"Screenshot saved for state {state}, page {page_no}.")
         except Exception as ss_err:
             logging.error(f"❌ Failed to capture screenshot: {ss_err}", exc_info=True)
-        return None, pd.DataFrame()
+        return pd.DataFrame()
 
     all_rows = []
-    # for i in range(min(row_count,11)):  # Limit rows for speed
-    for i in range(row_count):
+    if bulk:
         try:
-            row = rows.nth(i)
-            cells = row.locator("td")
-            cell_count = cells.count()
-            row_dict = {}
-
-            for j in range(cell_count):
-                cell = cells.nth(j)
-                if cell.evaluate("el => getComputedStyle(el).display") == "none":
-                    continue
-
-                header_id = cell.get_attribute("aria-describedby")
-                header = header_id.replace("projectTable_", "") if header_id else f"col_{j}"
-                text = cell.get_attribute("title") or cell.inner_text().strip()
-                row_dict[header] = text
-
-                link_locator = cell.locator("a")
-                if link_locator.count() > 0:
-                    href = link_locator.first.get_attribute("href")
-                    if href:
-                        row_dict[f"{header}_href"] = href
+            for row_dict in extract_table_rows_bulk(page):
+                row_dict["date"] = date
+                row_dict["State"] = state
+                row_dict['directors_presence'] = 'not_fetched'
+                all_rows.append(row_dict)
+            logging.info(f"Bulk extracted {len(all_rows)}/{row_count} rows for {state}.")
+        except Exception as bulk_err:
+            # One bad row should not cost the page: read it row by row instead
+            logging.warning(f"Bulk extraction failed ({bulk_err}), extracting page {page_no} row by row.")
+            bulk = False
+            all_rows = []
+    if not bulk:
+        # for i in range(min(row_count,11)):  # Limit rows for speed
+        for i in range(row_count):
+            try:
+                row_dict = extract_table_row(rows.nth(i))
+            except Exception as row_err:
+                # Retried once; the rows are positional, so a row that still fails sends the page to the retry queue
+                logging.warning(f"Row {i+1} of page {page_no} failed ({row_err}), retrying it once.")
+                try:
+                    row_dict = extract_table_row(rows.nth(i))
+                except Exception as retry_err:
+                    raise Exception(f"Scraping failed for row {i+1} of page {page_no}: {retry_err}")
 
             row_dict["date"] = date
             row_dict["State"] = state
             row_dict['directors_presence'] = 'not_fetched'
             all_rows.append(row_dict)
             logging.info(f"Row {i+1}/{row_count} extracted for {state}.")
-        except Exception as row_err:
-            logging.warning(f"Skipped a table row due to error: {row_err}")
-            raise Exception(f"Scraping failed for current record: {row_err}")
 
     if len(all_rows) < row_count:
         msg = f"⚠️ Incomplete data: captured {len(all_rows)} of {row_count} rows for {state} (page {page_no})."
@@ -62,9 +117,9 @@ def extract_table_data(page, logging, date, defaulters_type, state, page_no, cib
         raise Exception(msg)
     
     df = pd.DataFrame(all_rows)
-    output_file = f"cibil_data_{date}_{defaulters_type}_{state}_state_page_{page_no}.xlsx"
+    output_file = raw_output_file_name(date, defaulters_type, state, page_no)
     raw_output_file = os.path.join(raw_output_folder, output_file)
-    df.to_excel(raw_output_file, index=False)
+    write_stage(df, raw_output_file)
 
     logging.info(f"Saved {len(df)} rows to {output_file}")
     cibil_link_files.append(raw_output_file)
@@ -0,0 +1,416 @@
+# grid_client.py
+#
+# Direct fetch mode: the jqGrid results table and the getDirctorList popup are filled by
+# XHR/JSON calls. We capture one example of each request through Playwright, then replay
+# them for every page and every director list over a pooled HTTP session that carries the
+# browser's cookies. No navigation, loaders or sleeps are needed in the hot loop.
+
+import os
+import re
+import math
+import time
+import ujson as json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from utilities.extract_table_data import extract_table_rows_bulk, raw_output_file_name
+from utilities.stage_io import write_stage
+from utilities.wait_for_loader_to_disappear import wait_for_loader_to_disappear
+from utilities.is_website_issue import is_website_issue, WebsiteIssueError
+from utilities.throttle import throttle_slot
+
+# Headers that the HTTP client computes on its own
+SKIPPED_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+PAGING_PARAMS = {"page", "rows", "sidx", "sord", "_search", "nd", "_"}
+
+# id(captured list) -> (page, response listener) for stop_grid_recording
+_grid_recorders = {}
+
+READ_COL_MODEL_JS = """
+(tableId) => {
+    if (!window.jQuery) return [];
+    const colModel = jQuery('#' + tableId).jqGrid('getGridParam', 'colModel') || [];
+    return colModel.map(c => ({name: c.name, hidden: !!c.hidden}));
+}
+"""
+
+
+# ----------------- Capture -----------------
+def is_grid_response(response):
+    """True for XHR/fetch responses whose JSON body looks like a jqGrid payload."""
+    if response.request.resource_type not in ("xhr", "fetch"):
+        return False
+    try:
+        body = response.json()
+    except Exception:
+        return False
+    return isinstance(body, dict) and isinstance(body.get("rows"), list)
+
+
+def record_grid_requests(page, logger):
+    """
+    Starts recording the jqGrid XHR calls made by the page.
+    Returns a list that fills with {'url', 'method', 'headers', 'post_data', 'status', 'body'} entries.
+    """
+    captured = []
+
+    def on_response(response):
+        try:
+            if not is_grid_response(response):
+                return
+            request = response.request
+            captured.append({
+                "url": request.url,
+                "method": request.method,
+                "headers": {k: v for k, v in request.headers.items() if k.lower() not in SKIPPED_HEADERS and not k.startswith(":")},
+                "post_data": request.post_data,
+                "status": response.status,
+                "body": response.json(),
+            })
+            logger.info(f"Captured grid request: {request.method} {request.url}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record grid response: {e}")
+
+    page.on("response", on_response)
+    _grid_recorders[id(captured)] = (page, on_response)
+    return captured
+
+
+def stop_grid_recording(captured):
+    """Removes the listener added by record_grid_requests, for pages reused by the next state."""
+    page, on_response = _grid_recorders.pop(id(captured), (None, None))
+    if page is not None:
+        page.remove_listener("response", on_response)
+
+
+def read_col_model(page, table_id):
+    """Returns the jqGrid colModel of the given table as a list of {'name', 'hidden'} dicts."""
+    try:
+        return page.evaluate(READ_COL_MODEL_JS, table_id)
+    except Exception:
+        return []
+
+
+# ----------------- Request rewriting -----------------
+def split_params(entry):
+    """Returns (kind, params) where kind is 'query', 'form' or 'json'."""
+    post_data = entry.get("post_data")
+    if entry["method"].upper() == "POST" and post_data:
+        try:
+            body = json.loads(post_data)
+            if isinstance(body, dict):
+                return "json", body
+        except ValueError:
+            pass
+        return "form", dict(parse_qsl(post_data, keep_blank_values=True))
+    return "query", dict(parse_qsl(urlsplit(entry["url"]).query, keep_blank_values=True))
+
+
+def build_request(entry, overrides):
+    """Returns (method, url, data) for the captured request with the given params overridden."""
+    kind, params = split_params(entry)
+    params = dict(params)
+    params.update({k: str(v) for k, v in overrides.items()})
+    if "nd" in params:
+        params["nd"] = str(int(time.time() * 1000))  # jqGrid cache buster
+
+    parts = urlsplit(entry["url"])
+    if kind == "query":
+        return entry["method"], urlunsplit(parts._replace(query=urlencode(params))), None
+    data = json.dumps(params) if kind == "json" else urlencode(params)
+    return entry["method"], entry["url"], data
+
+
+def parse_href_args(href_js):
+    """'javascript:getDirctorList(1356472,147,1)' -> ['1356472', '147', '1']"""
+    match = re.search(r'\((.*)\)', href_js or "")
+    if not match:
+        return []
+    return [a.strip().strip("'\"") for a in match.group(1).split(",") if a.strip()]
+
+
+def learn_director_request(entry, href_js):
+    """
+    Maps the arguments of the getDirctorList href that triggered `entry` onto the
+    request params (or URL path segments) carrying them. Returns the template or None.
+    """
+    args = parse_href_args(href_js)
+    if not args:
+        return None
+    kind, params = split_params(entry)
+    arg_params = {}
+    for name, value in params.items():
+        if name in PAGING_PARAMS:
+            continue
+        if str(value) in args:
+            arg_params[name] = args.index(str(value))
+
+    path_segments = urlsplit(entry["url"]).path.split("/")
+    arg_segments = {i: args.index(seg) for i, seg in enumerate(path_segments) if seg and seg in args}
+
+    if not arg_params and not arg_segments:
+        return None
+    return {"entry": entry, "arg_params": arg_params, "arg_segments": arg_segments}
+
+
+def build_director_request(template, href_js):
+    args = parse_href_args(href_js)
+    overrides = {name: args[i] for name, i in template["arg_params"].items() if i < len(args)}
+    method, url, data = build_request(template["entry"], overrides)
+    if template["arg_segments"]:
+        parts = urlsplit(url)
+        segments = parts.path.split("/")
+        for pos, i in template["arg_segments"].items():
+            if i < len(args):
+                segments[pos] = args[i]
+        url = urlunsplit(parts._replace(path="/".join(segments)))
+    return method, url, data
+
+
+# ----------------- Row templates -----------------
+def grid_rows(body, col_model):
+    """Normalizes jqGrid JSON rows (dict rows, {'id','cell'} rows or plain lists) into dicts."""
+    names = [c["name"] for c in col_model]
+    rows = []
+    for item in body.get("rows", []):
+        if isinstance(item, dict) and isinstance(item.get("cell"), list):
+            row = dict(zip(names, item["cell"]))
+            row.setdefault("id", item.get("id"))
+        elif isinstance(item, list):
+            row = dict(zip(names, item))
+        else:
+            row = dict(item)
+        rows.append({k: "" if v is None else str(v).strip() for k, v in row.items()})
+    return rows
+
+
+def learn_template(dom_value, raw_row):
+    """
+    Rewrites a value read from the DOM as a str.format template over the raw JSON fields,
+    e.g. 'javascript:getDirctorList(1356472,147,1)' -> 'javascript:getDirctorList({suitId},{bankId},1)'.
+    """
+    spans = []
+    for field, value in sorted(raw_row.items(), key=lambda kv: -len(kv[1])):
+        if not value:
+            continue
+        for m in re.finditer(rf'(?<!\w){re.escape(value)}(?!\w)', dom_value):
+            if all(m.end() <= s or m.start() >= e for s, e, _ in spans):
+                spans.append((m.start(), m.end(), field))
+
+    template, pos = "", 0
+    for s, e, field in sorted(spans):
+        template += dom_value[pos:s].replace("{", "{{").replace("}", "}}") + "{" + field + "}"
+        pos = e
+    return template + dom_value[pos:].replace("{", "{{").replace("}", "}}")
+
+
+def render_template(template, raw_row):
+    return template.format_map(defaultdict(str, raw_row))
+
+
+def learn_row_templates(dom_rows, raw_rows, logger):
+    """
+    Learns how each DOM column (text and *_href) is built from the JSON row, using the
+    first grid page fetched by the browser. Returns {column: template} or None if any
+    column cannot be reproduced for every row.
+    """
+    if not dom_rows or len(dom_rows) != len(raw_rows):
+        logger.warning(f"⚠️ Cannot pair DOM rows ({len(dom_rows)}) with JSON rows ({len(raw_rows)}).")
+        return None
+
+    templates = {}
+    for column in dom_rows[0].keys():
+        candidates = []
+        for dom_row, raw_row in zip(dom_rows[:5], raw_rows[:5]):
+            candidate = learn_template(str(dom_row.get(column, "")), raw_row)
+            if candidate not in candidates:
+                candidates.append(candidate)
+        for candidate in candidates:
+            if all(render_template(candidate, raw) == str(dom.get(column, "")) for dom, raw in zip(dom_rows, raw_rows)):
+                templates[column] = candidate
+                break
+        else:
+            logger.warning(f"⚠️ Could not reproduce column '{column}' from grid JSON.")
+            return None
+    logger.info(f"Learned row templates: {templates}")
+    return templates
+
+
+# ----------------- HTTP client -----------------
+def create_grid_session(page, entry, pool_size:int = 8):
+    """
+    Builds a pooled requests.Session carrying the browser's cookies and the captured
+    request headers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(entry.get("headers", {}))
+    for cookie in page.context.cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+    return session
+
+
+def fetch_json(session, method, url, data, timeout_ms:int = 60000):
+    headers = {}
+    if data is not None and not data.startswith("{"):
+        headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
+    response = session.request(method, url, data=data, headers=headers, timeout=timeout_ms / 1000)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise WebsiteIssueError(f"HTTP {response.status_code} from {url}")
+    if response.status_code != 200:
+        raise Exception(f"HTTP {response.status_code} from {url}")
+    try:
+        return response.json()
+    except ValueError:
+        if is_website_issue(response.text):
+            raise WebsiteIssueError("Website issue detected in grid response")
+        raise Exception(f"Non-JSON grid response from {url}")
+
+
+# ----------------- Results pages -----------------
+def direct_page_plan(grid_entry, page_size:int = 0):
+    """Returns (page_size, page_count, records) for the captured grid call."""
+    first_body = grid_entry["body"]
+    records = int(first_body.get("records") or 0)
+    kind, params = split_params(grid_entry)
+    page_size = page_size or int(params.get("rows") or len(first_body.get("rows", [])) or 1)
+    page_count = math.ceil(records / page_size) if records else 0
+    return page_size, page_count, records
+
+
+def fetch_pages_direct(session, logger, grid_entry, templates, col_model, date, defaulters_type, state, raw_output_folder, page_numbers, page_size:int = 0, pool_size:int = 8, timeout_ms:int = 60000, throttle=None):
+    """
+    Pulls the given results pages through the HTTP session and saves them in the same layout
+    as extract_table_data.
+    Returns ({page_no: (file_name, DataFrame)} for the saved pages, failed flag).
+    """
+    page_size, page_count, records = direct_page_plan(grid_entry, page_size)
+    logger.info(f"Direct fetch: {records} records in {page_count} pages of {page_size} rows for {state}, {len(page_numbers)} pages to fetch")
+
+    def save_page(page_no):
+        raw_output_file = os.path.join(raw_output_folder, raw_output_file_name(date, defaulters_type, state, page_no))
+        method, url, data = build_request(grid_entry, {"page": page_no, "rows": page_size})
+        with throttle_slot(throttle):
+            body = fetch_json(session, method, url, data, timeout_ms)
+        all_rows = []
+        for raw_row in grid_rows(body, col_model):
+            row_dict = {column: render_template(template, raw_row) for column, template in templates.items()}
+            row_dict["date"] = date
+            row_dict["State"] = state
+            row_dict['directors_presence'] = 'not_fetched'
+            all_rows.append(row_dict)
+        if not all_rows:
+            raise Exception(f"No rows returned for page {page_no}")
+        df = pd.DataFrame(all_rows)
+        write_stage(df, raw_output_file)
+        logger.info(f"Saved {len(all_rows)} rows to {os.path.basename(raw_output_file)}")
+        return raw_output_file, df
+
+    saved_pages = {}
+    failed = False
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        futures = {page_no: executor.submit(save_page, page_no) for page_no in page_numbers}
+        for page_no, future in futures.items():
+            try:
+                saved_pages[page_no] = future.result()
+            except Exception as e:
+                failed = True
+                logger.error(f"❌ Direct fetch failed for {state}, page {page_no}: {e}")
+    return saved_pages, failed
+
+
+def prepare_direct_fetch(page, logger, grid_capture):
+    """
+    Turns the grid call captured during perform_search into (grid_entry, templates, col_model).
+    Returns None when the page did not expose a usable jqGrid endpoint.
+    """
+    if not grid_capture:
+        logger.warning("⚠️ No jqGrid XHR captured during search, direct fetch unavailable.")
+        return None
+    grid_entry = grid_capture[-1]
+    col_model = read_col_model(page, "projectTable")
+    if not col_model:
+        logger.warning("⚠️ Could not read jqGrid colModel, direct fetch unavailable.")
+        return None
+    raw_rows = grid_rows(grid_entry["body"], col_model)
+    templates = learn_row_templates(extract_table_rows_bulk(page), raw_rows, logger)
+    if templates is None:
+        return None
+    return grid_entry, templates, col_model
+
+
+# ----------------- Director lists -----------------
+def capture_director_request(page, logger, href_js, timeout_ms:int = 60000):
+    """
+    Runs one getDirctorList lookup in the browser to capture the director grid request.
+    Returns (template, col_model) or None. The page is navigated back afterwards.
+    """
+    template, col_model = None, []
+    try:
+        with page.expect_response(is_grid_response, timeout=timeout_ms) as response_info:
+            page.evaluate(href_js)
+        response = response_info.value
+        request = response.request
+        entry = {
+            "url": request.url,
+            "method": request.method,
+            "headers": {k: v for k, v in request.headers.items() if k.lower() not in SKIPPED_HEADERS and not k.startswith(":")},
+            "post_data": request.post_data,
+            "body": response.json(),
+        }
+        page.wait_for_selector("table#DirectorInfoTable", timeout=timeout_ms)
+        col_model = read_col_model(page, "DirectorInfoTable")
+        template = learn_director_request(entry, href_js)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not capture director request: {e}")
+    finally:
+        try:
+            page.go_back(timeout=timeout_ms)
+            wait_for_loader_to_disappear(page, logger, timeout_ms)
+        except Exception:
+            logger.info("⚠️ Could not navigate back after director capture.")
+
+    if template is None or not col_model:
+        logger.warning("⚠️ Director list endpoint not usable, falling back to browser lookups.")
+        return None
+    logger.info(f"Captured director request: {template['entry']['method']} {template['entry']['url']}")
+    return template, col_model
+
+
+def fetch_directors(session, template, col_model, href_js, timeout_ms:int = 60000, throttle=None):
+    method, url, data = build_director_request(template, href_js)
+    with throttle_slot(throttle):
+        body = fetch_json(session, method, url, data, timeout_ms)
+    return [
+        {
+            "Directors Reported by Credit Institutions": row.get("directorNames", ""),
+            "DIN Number": row.get("dinNumber", ""),
+            "PAN Number": row.get("dirPans", ""),
+        }
+        for row in grid_rows(body, col_model)
+    ]
+
+
+def fetch_directors_direct(session, logger, template, col_model, pending, pool_size:int = 8, timeout_ms:int = 60000, throttle=None):
+    """
+    Fetches director lists for the pending rows [(page_no, row_idx, href, borrower_name), ...]
+    over HTTP. Returns [(page_no, row_idx, directors), ...] for the rows that succeeded;
+    failed rows stay pending so the browser loop can retry them.
+    """
+    logger.info(f"Direct fetch of {len(pending)} director lists")
+    results = []
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        futures = {(page_no, row_idx): executor.submit(fetch_directors, session, template, col_model, href, timeout_ms, throttle) for page_no, row_idx, href, _ in pending}
+        for (page_no, row_idx), future in futures.items():
+            try:
+                results.append((page_no, row_idx, future.result()))
+            except Exception as e:
+                logger.error(f"⚠️ Direct director fetch failed for page {page_no}, row {row_idx+1}: {e}")
+    return results
@@ -1,5 +1,9 @@
 # is_website_issue.py
 
+
+class WebsiteIssueError(Exception):
+    """The site answered with one of its error pages (see is_website_issue)."""
+
 def is_website_issue(response_text: str) -> bool:
     """
     Checks if the given response text indicates a website or server issue.
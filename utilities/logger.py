@@ -1,10 +1,70 @@
 import logging
+import logging.handlers
+import multiprocessing.util
+import queue
+import threading
 import time
 import os
+import atexit
+import ujson as json
 from pathlib import Path
 
+# The scraper's logger only puts records on a queue; a QueueListener thread formats them and
+# writes the JSON-lines file and the console. Per-module levels are set with "log_levels" in
+# search_details.json, e.g. "INFO,director_lookup=WARNING,director_pool=DEBUG" (a bare level
+# is the default for every other module). Per-row messages are DEBUG and summarised by
+# open_progress / log_progress at most every few seconds.
 
-def setup_logger():
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, module, func, line, thread, msg (and exc)."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "module": record.module,
+            "func": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "process": record.process,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, escape_forward_slashes=False)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Drops records below the level set for the calling module (or the default level)."""
+
+    def __init__(self, default_level=logging.INFO):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = {}
+
+    def filter(self, record):
+        return record.levelno >= self.module_levels.get(record.module, self.default_level)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Only merges the message arguments in the calling thread; formatting is the listener's job."""
+
+    def prepare(self, record):
+        # It is the logger's only handler, so the record is changed in place instead of copied
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logger(name:str = "CIBILLogger", log_dir=None):
     # ✅ Detect correct base path even in PyInstaller Onefile mode
     if getattr(os, 'frozen', False):
         # When running as .exe, use the folder containing the EXE
@@ -19,39 +79,136 @@ def setup_logger():
         base_path = Path(os.getcwd())
 
     current_date = time.strftime("%Y-%m-%d")
-    log_dir = base_path / "logs" / current_date
+    log_dir = Path(log_dir) if log_dir else base_path / "logs" / current_date
     log_dir.mkdir(parents=True, exist_ok=True)
 
-    log_filename = log_dir / f"cibil_log_{time.strftime('%Y-%m-%d_%H-%M-%S')}.log"
+    log_filename = log_dir / f"cibil_log_{time.strftime('%Y-%m-%d_%H-%M-%S')}.jsonl"
 
-    # logging.basicConfig(
-    #     filename=log_filename,
-    #     level=logging.INFO,
-    #     format="%(asctime)s - %(levelname)s - %(message)s"
-    # )
-
-    # logger.info(f"✅ Logging initialized at: {log_filename}")
-    # return logging
     # ✅ Create logger instance
-    logger = logging.getLogger("CIBILLogger")
+    logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
+    stop_logger(logger)
     logger.handlers.clear()  # Prevent duplicate handlers on rerun
 
-    # --- File Handler ---
+    # --- File Handler (JSON lines) ---
     file_handler = logging.FileHandler(log_filename, encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(JsonLineFormatter())
 
     # --- Console Handler ---
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
     console_formatter = logging.Formatter("▶ %(message)s")  # cleaner console output
     console_handler.setFormatter(console_formatter)
 
-    # --- Add Handlers ---
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # --- Queue in front of both, written by a listener thread ---
+    level_filter = ModuleLevelFilter(logging.INFO)
+    queue_handler = LogQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(level_filter)
+    logger.addHandler(queue_handler)
+    logger.log_file = str(log_filename)
+    logger.level_filter = level_filter
+    logger.log_listener = logging.handlers.QueueListener(queue_handler.queue, file_handler, console_handler)
+    logger.log_listener.start()
+    atexit.register(stop_logger, logger)
 
     logger.info(f"Logging initialized at: {log_filename}")
-    return logger
\ No newline at end of file
+    return logger
+
+
+def stop_logger(logger):
+    """Stops the listener after it has written everything already queued."""
+    listener = getattr(logger, "log_listener", None)
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
+
+def _restart_after_fork(logger):
+    # A forked state worker inherits the queue but not the listener thread: give it its own
+    # queue and listener, stopped by multiprocessing's exit hook (workers skip atexit)
+    listener = getattr(logger, "log_listener", None)
+    if listener is None or listener._thread is None:
+        return
+    for handler in logger.handlers:
+        if isinstance(handler, logging.handlers.QueueHandler):
+            handler.queue = queue.SimpleQueue()
+            logger.log_listener = logging.handlers.QueueListener(handler.queue, *listener.handlers)
+            logger.log_listener.start()
+            multiprocessing.util.Finalize(None, stop_logger, args=(logger,), exitpriority=100)
+
+
+def _restart_all_after_fork():
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if isinstance(logger, logging.Logger):
+            _restart_after_fork(logger)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_all_after_fork)
+
+
+def parse_log_levels(spec):
+    """'INFO,director_lookup=WARNING' -> (INFO, {'director_lookup': WARNING})"""
+    default_level, module_levels = logging.INFO, {}
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        module, _, level = part.rpartition("=")
+        level = level.strip().upper()
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level '{level}' in log_levels")
+        if module.strip():
+            module_levels[module.strip()] = getattr(logging, level)
+        else:
+            default_level = getattr(logging, level)
+    return default_level, module_levels
+
+
+def set_log_levels(logger, spec):
+    default_level, module_levels = parse_log_levels(spec)
+    logger.level_filter.default_level = default_level
+    logger.level_filter.module_levels = module_levels
+    # The logger itself lets through the lowest level any module asks for
+    logger.setLevel(min([default_level, *module_levels.values()]))
+
+
+def set_console_level(logger, level):
+    for handler in logger.log_listener.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(level)
+
+
+# ----------------- Progress -----------------
+def open_progress(logger, label, total, every_s:float = 10.0):
+    """Aggregated progress for a per-row loop: one INFO line at most every `every_s` seconds."""
+    return {"logger": logger, "label": label, "total": total, "every_s": every_s, "done": 0, "counts": {},
+            "start": time.time(), "last_logged": time.time(), "lock": threading.Lock()}
+
+
+def log_progress(progress, outcome:str = "done", detail:str = ""):
+    """Counts one row under `outcome`; the row itself is only logged at DEBUG."""
+    logger = progress["logger"]
+    if detail:
+        logger.debug(detail, stacklevel=2)
+    with progress["lock"]:
+        progress["done"] += 1
+        progress["counts"][outcome] = progress["counts"].get(outcome, 0) + 1
+        now = time.time()
+        if now - progress["last_logged"] < progress["every_s"]:
+            return
+        progress["last_logged"] = now
+        line = progress_line(progress, now)
+    logger.info(line, stacklevel=2)
+
+
+def progress_line(progress, now):
+    elapsed = max(now - progress["start"], 1e-9)
+    counts = ", ".join(f"{outcome} {count:,}" for outcome, count in progress["counts"].items())
+    return f"▶ {progress['label']}: {progress['done']:,}/{progress['total']:,} ({counts}), {round(progress['done'] / elapsed, 1)}/s"
+
+
+def close_progress(progress):
+    with progress["lock"]:
+        if not progress["done"]:
+            return
+        line = progress_line(progress, time.time())
+    progress["logger"].info(line + f" in {round(time.time() - progress['start'], 1)}s", stacklevel=2)
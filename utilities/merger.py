@@ -1,9 +1,11 @@
 import os
-import pandas as pd
 import ujson as json
 from pathlib import Path
+from utilities.stage_io import stage_files, read_stage, stage_extension, stage_columns, open_stage_writer, append_stage_rows, close_stage_writer
+from utilities.stage_manifest import load_stage_manifest, input_fingerprints, merge_is_current, record_merge
+from utilities.run_state_store import stored_search_pages
 
-def merge_data(logger):
+def merge_data(logger, stage_format:str = "parquet", incremental:bool = True):
     try:
         # Step 1: Current working directory
         # current_path = os.getcwd()
@@ -44,7 +46,23 @@ def merge_data(logger):
         # Step 5: Process each folder
         for folder in folder_list:
             logger.info(f'--- Opening folder: {folder} ---')
-            xlsx_files = [f for f in os.listdir(folder) if f.endswith('.xlsx')]
+            # For the searches in the run-state store only their saved pages are merged; page files
+            # of other searches (no store, or a search that never got that far) are listed from the folder
+            xlsx_files = stage_files(folder)
+            search_pages = stored_search_pages(folder)
+            if search_pages is not None:
+                stored_files = {name for names in search_pages.values() for name in names}
+                stored_stems = {os.path.splitext(name)[0] for name in stored_files}
+                skipped_files = [
+                    item for item in xlsx_files
+                    if os.path.splitext(item)[0] not in stored_stems and any(item.startswith(prefix) for prefix in search_pages)
+                ]
+                for item in skipped_files:
+                    logger.warning(f"⚠️ Skipping file: {item}, not a saved page of its search in the run state.")
+                missing_files = sorted(name for name in stored_files if not os.path.exists(os.path.join(folder, name)))
+                if missing_files:
+                    logger.warning(f"⚠️ Pages in the run state without a file, skipped: {missing_files}")
+                xlsx_files = [item for item in xlsx_files if item not in skipped_files]
             logger.info(f'Files found: {xlsx_files}\n')
 
             for item in xlsx_files:
@@ -79,11 +97,21 @@ def merge_data(logger):
             logger.info(f'  {k}: {v}')
         # logger.info()
 
-        # Step 6: Merge files per (state, date)
+        # Step 6: Merge files per (state, date), skipping groups whose inputs did not change
+        manifest = load_stage_manifest(logger, output_path)
+        skipped_groups = 0
         for (state, file_date), file_list in state_files.items():
             merged_date = f'{file_date}' if file_date != "UNKNOWN" else "UNKNOWN_DATE"
             date_folder = os.path.join(output_path, f'{merged_date}_merged')
             os.makedirs(date_folder, exist_ok=True)
+            output_file = os.path.join(date_folder, f"{merged_date}_{state}_merged{stage_extension(stage_format)}")
+
+            group_key = f"{state}|{file_date}"
+            fingerprints = input_fingerprints(manifest, group_key, file_list)
+            if incremental and merge_is_current(manifest, group_key, fingerprints, output_file):
+                logger.info(f"⏭ Inputs unchanged for state={state}, date={file_date}. Keeping {output_file}")
+                skipped_groups += 1
+                continue
 
             logger.info(f"Starting merge for state={state}, date={file_date}, files={len(file_list)}")
 
@@ -95,24 +123,36 @@ def merge_data(logger):
                 logger.warning(f"⚠️ Could not sort by page number for {file_list}: {e}", exc_info=True)
             logger.info(f'Files after sorting by page: {file_list}')
 
-            df_list = []
+            # Column union in first-appearance order, as pd.concat would build it
+            columns = []
             for fpath in file_list:
-                logger.info(f'📖 Reading file: {fpath}')
-                df = pd.read_excel(fpath)
-                df['source_date'] = file_date  # Add date column for reference
-                logger.info(f'Rows read: {len(df)}')
-                df_list.append(df)
-
-            merged_df = pd.concat(df_list, ignore_index=True)
-            logger.info(f'🔗 Total rows after merging: {len(merged_df)}')
-            if merged_df.empty:
+                for column in stage_columns(fpath) + ['source_date']:
+                    if column not in columns:
+                        columns.append(column)
+
+            # Stream pages one at a time into the merged file in the date subfolder
+            writer = open_stage_writer(output_file, columns)
+            try:
+                for fpath in file_list:
+                    logger.info(f'📖 Reading file: {fpath}')
+                    df = read_stage(fpath)
+                    df['source_date'] = file_date  # Add date column for reference
+                    logger.info(f'Rows read: {len(df)}')
+                    append_stage_rows(writer, df)
+                    del df
+            except Exception:
+                close_stage_writer(writer, keep=False)
+                raise
+
+            logger.info(f'🔗 Total rows after merging: {writer["rows"]}')
+            if writer["rows"] == 0:
+                close_stage_writer(writer, keep=False)
                 logger.warning(f"⚠️ No rows found for state={state}, date={file_date}. Skipping save.")
                 continue
-
-            # Save merged file in a date subfolder
-            output_file = os.path.join(date_folder, f"{merged_date}_{state}_merged.xlsx")
-            merged_df.to_excel(output_file, index=False)
+            close_stage_writer(writer)
+            record_merge(manifest, group_key, fingerprints, output_file)
             logger.info(f'✅ Merged file saved: {output_file}\n')
+        logger.info(f"Merge finished: {len(state_files) - skipped_groups} groups rebuilt, {skipped_groups} unchanged.")
     except Exception as e:
         logger.error(f"❌ Unexpected error in merge_data: {e}", exc_info=True)
 
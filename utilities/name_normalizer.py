@@ -0,0 +1,94 @@
+# name_normalizer.py
+#
+# Name cleanup used for 'Final Borrower Name' and 'Final_DirectorName'. The rules are
+# applied in order, exactly like the chain of .replace(..., regex=True) calls they came
+# from. Runs of whole-word rules ({word: replacement} entries) are compiled into a single
+# alternation, since replacing a bounded word can never create or break another bounded
+# word. Names are normalized once per unique value and mapped back.
+
+import re
+import numpy as np
+import pandas as pd
+
+# (pattern, replacement) or {word: replacement} for \bword\b, applied after lower() and strip()
+NAME_RULES = [
+    # Remove dots
+    (r'\.', ' '),
+
+    # Remove honorifics
+    {'m/s': '', 'mr': '', 'mrs': '', 'ms': '', 'dr': ''},
+
+    # Company type replacements
+    (r'\(?p\)?\s*ltd\b', 'private limited'),
+    (r'\(p\)\s*', 'private'),
+    {'pvtltd': 'private limited', 'pvt': 'private', 'ltd': 'limited', 'soc': 'society', 'corp': 'corporation'},
+
+    # Unwanted words / suffixes
+    {'smt': '', 'smti': '', 'miss': '', 'individual': '', 'chairman': '', 'managing director': '', 'partner': ''},
+    (r'\(?\b(b)?prop(riet([oe]r)?)?\)?', ''),   # handles (prop), bprop, proprietor, etc.
+    {'in liquidation': ''},
+    (r'\(ind\)\s*', ''),
+    (r'\berstwhile\s+promoter\b', ''),
+
+    # Remove titles before name (start only)
+    (r'^\s*co[-\s]*applicant\s*', ''),
+    (r'^\s*\(?whole\s*time\s*director\)?\s*', ''),
+    (r'^\s*guarantors?\s+of\s+', ''),        # e.g., "Guarantors of Rajesh Kumar"
+    (r'\bguarantors?\s+of\b', ''),
+    (r'\(.*promoter.*guarantor.*\)', ''),    # e.g., (PROMOTER DIRECTOR/ GUARANTOR)
+    (r'\(.*guarantor.*promoter.*\)', ''),
+    (r'^\s*directors?\s*/\s*corporate\s*', ''),
+    (r'\berstwhile\s+promoter\b', ''),
+    (r'\(co-borrower\)\s*', ''),
+    (r'^\s*(sh|ch)\.?\s+', ''),
+    (r'^\s*\(\s*\)\s*', ''),
+
+    # Remove director variants at END
+    (r'\s*\(?ex(?:ecutive)?\s*director[s]?\)?\s*$', ''),
+    (r'\s*\(?director\s*(?:ex|\(ex\))?\)?\s*$', ''),  # handles Director EX or (EX)
+
+    # Remove parent info
+    (r'\(?\s*(s|d|w)/o[^,;]*', ''),
+
+    # Remove leftover empty parentheses
+    (r'\(\s*\)', ''),
+]
+
+
+def compile_rules(rules):
+    """Compiles the rule table, joining consecutive word rules into one pattern."""
+    steps = []
+    for rule in rules:
+        if isinstance(rule, dict) and steps and isinstance(steps[-1], dict):
+            steps[-1].update(rule)
+        else:
+            steps.append(dict(rule) if isinstance(rule, dict) else rule)
+
+    compiled = []
+    for step in steps:
+        if isinstance(step, dict):
+            words = sorted(step, key=len, reverse=True)
+            pattern = re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in words) + r')\b')
+            replacements = set(step.values())
+            compiled.append((pattern, replacements.pop() if len(replacements) == 1 else (lambda m, step=step: step[m.group(0)])))
+        else:
+            compiled.append((re.compile(step[0]), step[1]))
+    return compiled
+
+
+COMPILED_RULES = compile_rules(NAME_RULES)
+
+
+def normalize_name(name):
+    text = name.lower().strip()
+    for pattern, replacement in COMPILED_RULES:
+        text = pattern.sub(replacement, text)
+    # Normalize spaces and format
+    return ' '.join(text.split()).upper()
+
+
+def normalize_names(names):
+    """Normalizes a Series of names: factorize → normalize the uniques → map back."""
+    codes, uniques = pd.factorize(names.astype(str))
+    normalized = np.array([normalize_name(name) for name in uniques], dtype=object)
+    return pd.Series(normalized[codes], index=names.index, name=names.name)
@@ -1,11 +1,16 @@
 # perform_search.py
 
 import math
+import time
 
 from utilities.extract_row_counts import extract_row_counts
+from utilities.wait_strategy import get_wait_profile, wait_for_search_results, run_and_wait_for_grid, wait_for_page_change, settle, PAGING_INFO_JS
+
+GRID_ROW_NUM_JS = "() => window.jQuery ? jQuery('#projectTable').jqGrid('getGridParam', 'rowNum') : null"
+SET_ROW_NUM_JS = "(n) => jQuery('#projectTable').jqGrid('setGridParam', {rowNum: n, page: 1}).trigger('reloadGrid')"
 
 # ----------------- Perform Search -----------------
-def perform_search(page, logger, date, state, defaulters_type, timeout_ms:int = 60000):
+def perform_search(page, logger, date, state, defaulters_type, timeout_ms:int = 60000, wait_profile:str = "safe"):
     logger.info(f"▶ Performing search for Date:{date}, State:{state}, Defaulters type:{defaulters_type}")
     # if (defaulters_type == '1 crore') or ('crore' in defaulters_type):
     if "crore" in defaulters_type.lower():
@@ -29,6 +34,11 @@ def perform_search(page, logger, date, state, defaulters_type, timeout_ms:int =
         page.wait_for_selector("img#goForSuitFiledAccounts25LacsId", timeout=timeout_ms)
         page.click("img#goForSuitFiledAccounts25LacsId")
 
+    return search_state(page, logger, state, timeout_ms, wait_profile)
+
+# ----------------- Search State -----------------
+def search_state(page, logger, state, timeout_ms:int = 60000, wait_profile:str = "safe"):
+    """Selects `state` on a page that already shows the search form and runs the search."""
     page.wait_for_selector("select#stateId", timeout=timeout_ms)
     options = page.locator("select#stateId option",)
     option_texts = []
@@ -46,21 +56,12 @@ def perform_search(page, logger, date, state, defaulters_type, timeout_ms:int =
         page.select_option("#stateId", label=state.upper())
 
     page.wait_for_selector("input#searchId", timeout=timeout_ms)
-    page.click("input#searchId")
     logger.info("▶ Waiting for search results...")
-
-    # Wait for loader to disappear
-    try:
-        page.wait_for_selector("div.blockUI.blockMsg.blockPage", state="detached", timeout=timeout_ms)
-    except Exception:
-        logger.warning("⚠️ Loader did not disappear within timeout period.")
-
-    page.wait_for_timeout(2000)
+    # Waits for the grid response, the loader and the paging info instead of fixed timeouts
+    wait_for_search_results(page, logger, lambda: page.click("input#searchId"), get_wait_profile(wait_profile), timeout_ms)
 
     page.locator('a[onclick="goToBottom()"]').click()
-    page.wait_for_timeout(1000)
     page.locator('a[onclick="goToTop()"]').click()
-    page.wait_for_timeout(1000)
     fetched, total = extract_row_counts(page, logger, timeout_ms)
     logger.info(f"▶ Fetched {fetched} out of {total} rows.")
     # pagination_limit = total / 1000
@@ -69,3 +70,52 @@ def perform_search(page, logger, date, state, defaulters_type, timeout_ms:int =
     else:
         pagination_limit = math.ceil(total / fetched) 
         return pagination_limit
+
+
+# ----------------- Page Size -----------------
+def reload_with_page_size(page, logger, page_size, profile, timeout_ms:int = 60000):
+    """Reloads the results grid from page 1 with `page_size` rows per page. Returns (fetched, total)."""
+    previous_text = page.evaluate(PAGING_INFO_JS)
+    run_and_wait_for_grid(page, logger, lambda: page.evaluate(SET_ROW_NUM_JS, page_size), timeout_ms)
+    wait_for_page_change(page, logger, previous_text, timeout_ms)
+    settle(page, profile)
+    return extract_row_counts(page, logger, timeout_ms)
+
+
+def negotiate_page_size(page, logger, max_page_size, wait_profile:str = "safe", timeout_ms:int = 60000):
+    """
+    Asks the grid for the largest page size up to `max_page_size` so the search needs the
+    fewest page fetches. When the server caps the page size the grid is reloaded once more
+    with the capped size, so later page requests line up with what the server serves. Keeps
+    the grid's own size when the bigger page is refused. Returns the pagination limit.
+    """
+    profile = get_wait_profile(wait_profile)
+    fetched, total = extract_row_counts(page, logger, timeout_ms)
+    if total == 0:
+        return 0
+    pagination_limit = math.ceil(total / fetched)
+    current_size = page.evaluate(GRID_ROW_NUM_JS)
+    target_size = min(total, max_page_size)
+    if current_size is None or target_size <= max(int(current_size), fetched):
+        logger.info(f"📐 Page size {fetched}: {pagination_limit} pages for {total} rows")
+        return pagination_limit
+
+    start_time = time.time()
+    try:
+        new_fetched, new_total = reload_with_page_size(page, logger, target_size, profile, timeout_ms)
+        if fetched < new_fetched < target_size and new_total == total:
+            logger.info(f"📐 Server capped the page size at {new_fetched} (asked for {target_size}).")
+            new_fetched, new_total = reload_with_page_size(page, logger, new_fetched, profile, timeout_ms)
+    except Exception as e:
+        logger.warning(f"⚠️ Page size probe failed: {e}")
+        new_fetched, new_total = 0, 0
+
+    if new_fetched <= fetched or new_total != total:
+        logger.warning(f"⚠️ Page size {target_size} refused, keeping {fetched}.")
+        if page.evaluate(GRID_ROW_NUM_JS) != current_size:
+            reload_with_page_size(page, logger, int(current_size), profile, timeout_ms)
+        return pagination_limit
+
+    new_limit = math.ceil(total / new_fetched)
+    logger.info(f"📐 Page size {new_fetched}: {new_limit} pages for {total} rows instead of {pagination_limit} at {fetched} ({round(time.time() - start_time, 1)}s to negotiate)")
+    return new_limit
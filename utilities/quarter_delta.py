@@ -0,0 +1,64 @@
+# quarter_delta.py
+#
+# Cross-quarter delta mode. Most borrowers and their director lists carry over from one
+# quarter to the next, so before the director phase every pending borrower is looked up in
+# the previous quarter's run-state store by a stable identity (bank, branch, borrower name,
+# registered address) plus the configured change columns. Matches get the previous
+# director list copied forward; only new or changed borrowers go to the popup lookups.
+
+import os
+from pathlib import Path
+
+from utilities.run_state_store import STORE_FILE_NAME, open_run_state, find_search, pending_borrower_rows, fetched_borrower_rows, record_director_batch, export_page
+
+IDENTITY_COLUMNS = ["bankName", "branchName", "borrowerName", "regaddr"]
+
+
+def previous_quarter_folder(raw_output_folder, date, previous_date):
+    """The raw output folder of the same search for `previous_date` (folder names embed the date)."""
+    folder = Path(raw_output_folder)
+    return folder.parent / folder.name.replace(f"_{date}_for_", f"_{previous_date}_for_")
+
+
+def borrower_key(row, change_columns):
+    return tuple(" ".join(str(row.get(column) or "").split()).upper() for column in IDENTITY_COLUMNS + list(change_columns))
+
+
+def load_previous_directors(logger, previous_folder, previous_date, defaulters_type, state, change_columns):
+    """{borrower_key: directors} for every borrower with fetched directors in the previous quarter."""
+    if not os.path.exists(os.path.join(previous_folder, STORE_FILE_NAME)):
+        logger.warning(f"⚠️ No run state for {previous_date} in {previous_folder}. Delta mode disabled for {state}.")
+        return {}
+    previous_conn = open_run_state(previous_folder)
+    try:
+        search_id = find_search(previous_conn, previous_date, defaulters_type, state)
+        if search_id is None:
+            logger.warning(f"⚠️ {state} was not scraped for {previous_date}. Delta mode disabled for {state}.")
+            return {}
+        return {borrower_key(row, change_columns): directors for row, directors in fetched_borrower_rows(previous_conn, search_id) if directors}
+    finally:
+        previous_conn.close()
+
+
+def carry_forward_directors(logger, conn, search_id, raw_output_folder, date, previous_date, defaulters_type, state, change_columns):
+    """
+    Copies director lists from the previous quarter into pending rows whose borrower is
+    unchanged and re-exports the touched pages. Returns the number of rows carried forward.
+    """
+    previous_folder = previous_quarter_folder(raw_output_folder, date, previous_date)
+    previous = load_previous_directors(logger, previous_folder, previous_date, defaulters_type, state, change_columns)
+    if not previous:
+        return 0
+
+    pending = pending_borrower_rows(conn, search_id)
+    carried = []
+    for page_no, row_idx, row in pending:
+        directors = previous.get(borrower_key(row, change_columns))
+        if directors:
+            carried.append((page_no, row_idx, directors))
+
+    record_director_batch(conn, search_id, carried)
+    for page_no in sorted({page_no for page_no, _, _ in carried}):
+        export_page(conn, search_id, page_no, raw_output_folder)
+    logger.info(f"⏭ Delta mode for {state}: {len(carried)}/{len(pending)} pending rows carried forward from {previous_date}, {len(pending) - len(carried)} left to fetch")
+    return len(carried)
@@ -0,0 +1,129 @@
+# retry_pass.py
+#
+# Pages and director rows that fail during a state go to the run-state store's retry queue
+# with their reason and attempt count. The retry pass runs at the end of every state and
+# from `python AutoScraper.py retry`, and only touches the queued items. Failed pages are
+# re-read with jump_to_page, unless the grid is already on them. The queued director rows,
+# plus the rows of pages recovered just before, are looked up again. Only one row per href
+# is looked up (coalesce_pending), so the other rows sharing the href of a failed row are
+# queued with it and filled from the cache once a retry succeeds. An item that fails
+# `max_attempts` times in total is given up and left for a full rerun.
+
+from utilities.extract_table_data import extract_table_data, raw_output_file_name
+from utilities.director_lookup import lookup_directors, last_lookup_error
+from utilities.director_cache import apply_cached_directors, coalesce_pending, director_cache_key
+from utilities.director_log import open_director_checkpoints, checkpoint_directors, close_director_checkpoints
+from utilities.logger import open_progress, log_progress, close_progress
+from utilities.run_state_store import record_page, pending_borrowers, queue_failure, resolve_retries, queued_retries, retry_queue_counts
+from utilities.throttle import throttle_slot
+from utilities.wait_strategy import get_wait_profile, jump_to_page, grid_page
+
+
+def retry_failed_pages(page, logger, conn, search_id, date, defaulters_type, state, raw_output_folder, timeout_ms:int = 60000, wait_profile:str = "safe", bulk_extraction:bool = True, max_attempts:int = 3, throttle=None):
+    """Re-reads the queued pages. Returns the page numbers recovered."""
+    recovered = []
+    profile = get_wait_profile(wait_profile)
+    queued = queued_retries(conn, search_id, "page")
+    current_page = grid_page(page) if queued else None
+    for page_no, _, reason, attempts in queued:
+        logger.info(f"🔁 Retrying page {page_no} of {state} (attempt {attempts + 1}, last failure: {reason})")
+        try:
+            with throttle_slot(throttle):
+                if page_no != current_page:
+                    jump_to_page(page, logger, page_no, profile, 0, timeout_ms)
+                    current_page = page_no
+                cibil_df = extract_table_data(page, logger, date, defaulters_type, state, page_no, [], raw_output_folder, timeout_ms, bulk_extraction)
+            if cibil_df.empty:
+                raise Exception("no data rows")
+        except Exception as e:
+            current_page = None  # position unknown, jump to the next page
+            queue_failure(conn, search_id, "page", page_no, -1, e, max_attempts)
+            logger.warning(f"⚠️ Retry of page {page_no} of {state} failed: {e}")
+            continue
+        record_page(conn, search_id, page_no, raw_output_file_name(date, defaulters_type, state, page_no), cibil_df)
+        recovered.append(page_no)
+    return recovered
+
+
+def queue_href_duplicates(conn, search_id, max_attempts:int = 3):
+    """
+    Queues the pending rows that share an href with a queued director row. Their lookup was
+    coalesced into the failed one, so nothing queued them when it failed.
+    """
+    queued = {(page_no, row_idx) for page_no, row_idx, _, _ in queued_retries(conn, search_id, "director")}
+    pending = pending_borrowers(conn, search_id)
+    failed_hrefs = {}
+    for page_no, row_idx, href, _ in pending:
+        key = director_cache_key(href)
+        if key and (page_no, row_idx) in queued:
+            failed_hrefs.setdefault(key, (page_no, row_idx))
+    for page_no, row_idx, href, _ in pending:
+        failed = failed_hrefs.get(director_cache_key(href))
+        if failed and (page_no, row_idx) not in queued:
+            queue_failure(conn, search_id, "director", page_no, row_idx, f"same href as page {failed[0]}, row {failed[1]+1}", max_attempts)
+
+
+def retry_failed_directors(page, logger, conn, search_id, state, raw_output_folder, recovered_pages, cache, timeout_ms:int = 60000, wait_profile:str = "safe", checkpoint_every:int = 20, max_attempts:int = 3, throttle=None):
+    """Looks up the queued director rows and the rows of `recovered_pages` again."""
+    queued = {(page_no, row_idx) for page_no, row_idx, _, _ in queued_retries(conn, search_id, "director")}
+    rows = [row for row in pending_borrowers(conn, search_id) if (row[0], row[1]) in queued or row[0] in recovered_pages]
+    rows = apply_cached_directors(logger, cache, conn, search_id, raw_output_folder, rows)
+    if not rows:
+        return
+
+    lookups = coalesce_pending(rows)
+    rows_by_href = {}
+    for row in rows:
+        rows_by_href.setdefault(director_cache_key(row[2]) or (row[0], row[1]), []).append(row)
+    checkpoints = open_director_checkpoints(conn, search_id, raw_output_folder, checkpoint_every)
+    progress = open_progress(logger, f"Director retries for {state}", len(lookups))
+    for page_no, row_idx, href, borrower_name in lookups:
+        directors = lookup_directors(page, logger, href, cache, timeout_ms, wait_profile, throttle=throttle)
+        checkpoint_directors(checkpoints, page_no, row_idx, directors)
+        if not directors:
+            # The rows sharing this href count the failed attempt as well
+            for failed_page_no, failed_row_idx, _, _ in rows_by_href[director_cache_key(href) or (page_no, row_idx)]:
+                queue_failure(conn, search_id, "director", failed_page_no, failed_row_idx, last_lookup_error(), max_attempts)
+        log_progress(progress, "fetched" if directors else "failed", f"Director retry for page {page_no}, row {row_idx+1}: {borrower_name} ({len(directors)})")
+    close_progress(progress)
+    for file_name in close_director_checkpoints(checkpoints):
+        logger.info(f"✅ Updated raw file saved with director info → {file_name}")
+    # Rows sharing an href with a row retried above
+    apply_cached_directors(logger, cache, conn, search_id, raw_output_folder, rows)
+
+
+def queued_retry_count(conn, search_id):
+    return sum(count for (_, status), count in retry_queue_counts(conn, search_id).items() if status == "queued")
+
+
+def run_retry_pass(page, logger, conn, search_id, date, defaulters_type, state, raw_output_folder, cache, timeout_ms:int = 60000, wait_profile:str = "safe", bulk_extraction:bool = True, checkpoint_every:int = 20, max_attempts:int = 3, throttle=None, retry_pages:bool = True):
+    """
+    Processes the retry queue of one search, with the results grid of that search on `page`.
+    Without `retry_pages` (the grid's page count no longer matches) only director rows are retried.
+    """
+    resolved = resolve_retries(conn, search_id)
+    if resolved:
+        logger.info(f"🔁 {resolved} queued items for {state} were completed since they failed.")
+    queue_href_duplicates(conn, search_id, max_attempts)
+    if not queued_retry_count(conn, search_id):
+        return
+
+    counts = retry_queue_counts(conn, search_id)
+    logger.info(f"🔁 Retry pass for {state}: {counts.get(('page', 'queued'), 0)} pages and {counts.get(('director', 'queued'), 0)} director rows queued")
+    recovered = retry_failed_pages(page, logger, conn, search_id, date, defaulters_type, state, raw_output_folder, timeout_ms, wait_profile, bulk_extraction, max_attempts, throttle) if retry_pages else []
+    retry_failed_directors(page, logger, conn, search_id, state, raw_output_folder, recovered, cache, timeout_ms, wait_profile, checkpoint_every, max_attempts, throttle)
+    resolve_retries(conn, search_id)
+    log_retry_queue(logger, conn, search_id, state)
+
+
+def log_retry_queue(logger, conn, search_id, state):
+    counts = retry_queue_counts(conn, search_id)
+    if not counts:
+        return
+    summary = "; ".join(
+        f"{kind}s: " + ", ".join(f"{status} {counts[(kind, status)]}" for status in ("resolved", "queued", "gave_up") if (kind, status) in counts)
+        for kind in ("page", "director") if any(k == kind for k, _ in counts)
+    )
+    logger.info(f"🔁 Retry queue for {state}: {summary}")
+    if counts.get(("page", "gave_up")) or counts.get(("director", "gave_up")):
+        logger.warning(f"⚠️ Some items for {state} were given up after repeated failures; a full rerun will pick them up again.")
@@ -0,0 +1,152 @@
+# run_metrics.py
+#
+# Per-phase timings for a run. `with timed("phase"):` records one sample per call, and
+# count_playwright_calls() wraps the public methods of the Playwright sync classes so every
+# call is counted against the innermost phase running in the calling thread.
+# write_run_metrics() writes the samples as CSV and a per-phase summary (count, total,
+# p50/p95/max, Playwright calls by method) as JSON next to the log file, logs the summary
+# and starts a fresh set.
+
+import csv
+import functools
+import logging
+import math
+import os
+import threading
+import time
+import ujson as json
+from contextlib import contextmanager
+
+PLAYWRIGHT_CLASSES = ("Page", "Frame", "Locator", "ElementHandle", "BrowserContext", "Keyboard", "Mouse")
+
+_lock = threading.Lock()
+_local = threading.local()
+_patched = []
+samples = []        # {"phase", "started_at", "seconds", "playwright_calls"}
+call_counts = {}    # phase -> {"Class.method": count}
+
+
+def _phase_stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+        _local.calls = 0
+    return _local.stack
+
+
+def record_sample(phase, seconds, started_at=None, playwright_calls:int = 0):
+    with _lock:
+        samples.append({
+            "phase": phase,
+            "started_at": started_at if started_at is not None else time.time() - seconds,
+            "seconds": seconds,
+            "playwright_calls": playwright_calls,
+        })
+
+
+@contextmanager
+def timed(phase):
+    """Times the block as one sample of `phase`, with the Playwright calls made inside it."""
+    stack = _phase_stack()
+    stack.append(phase)
+    calls_before = _local.calls
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        stack.pop()
+        record_sample(phase, time.time() - start_time, start_time, _local.calls - calls_before)
+
+
+# ----------------- Playwright calls -----------------
+def _counting(class_name, name, method):
+    key = f"{class_name}.{name}"
+
+    @functools.wraps(method)
+    def counted(*args, **kwargs):
+        stack = _phase_stack()
+        phase = stack[-1] if stack else "other"
+        _local.calls += 1
+        with _lock:
+            phase_counts = call_counts.setdefault(phase, {})
+            phase_counts[key] = phase_counts.get(key, 0) + 1
+        return method(*args, **kwargs)
+
+    return counted
+
+
+def count_playwright_calls():
+    """Wraps the Playwright sync API methods once per process."""
+    with _lock:
+        if _patched:
+            return
+        import playwright.sync_api as sync_api
+        for class_name in PLAYWRIGHT_CLASSES:
+            cls = getattr(sync_api, class_name)
+            for name, attr in list(vars(cls).items()):
+                if not name.startswith("_") and callable(attr):
+                    setattr(cls, name, _counting(class_name, name, attr))
+        _patched.append(True)
+
+
+# ----------------- Summary -----------------
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(run_samples, run_call_counts):
+    phases = {}
+    for phase in sorted({s["phase"] for s in run_samples} | set(run_call_counts)):
+        seconds = sorted(s["seconds"] for s in run_samples if s["phase"] == phase)
+        calls = run_call_counts.get(phase, {})
+        phases[phase] = {
+            "count": len(seconds),
+            "total_s": round(sum(seconds), 3),
+            "p50_s": round(percentile(seconds, 50), 3),
+            "p95_s": round(percentile(seconds, 95), 3),
+            "max_s": round(seconds[-1], 3) if seconds else 0.0,
+            "playwright_calls": sum(calls.values()),
+            "playwright_calls_by_method": dict(sorted(calls.items(), key=lambda kv: -kv[1])),
+        }
+    return phases
+
+
+def metrics_base_path(logger, label):
+    """cibil_log_<time>.jsonl -> cibil_metrics_<time>_<label>, or None without a log file."""
+    log_files = [getattr(logger, "log_file", None)] + [h.baseFilename for h in logger.handlers if isinstance(h, logging.FileHandler)]
+    for log_file in filter(None, log_files):
+        folder, name = os.path.split(log_file)
+        stem = os.path.splitext(name)[0].replace("cibil_log_", "cibil_metrics_", 1)
+        safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+        return os.path.join(folder, f"{stem}_{safe_label}")
+    return None
+
+
+def write_run_metrics(logger, label):
+    """Writes and logs the metrics collected since the last call, then clears them."""
+    with _lock:
+        run_samples = list(samples)
+        run_call_counts = {phase: dict(counts) for phase, counts in call_counts.items()}
+        samples.clear()
+        call_counts.clear()
+    if not run_samples and not run_call_counts:
+        return None
+
+    phases = summarize(run_samples, run_call_counts)
+    logger.info(f"⏱ Phase summary for {label}:")
+    for phase, s in sorted(phases.items(), key=lambda kv: -kv[1]["total_s"]):
+        logger.info(f"⏱   {phase}: {s['count']} x, {s['total_s']}s total, p50 {round(1000 * s['p50_s'])} ms, p95 {round(1000 * s['p95_s'])} ms, max {round(1000 * s['max_s'])} ms, {s['playwright_calls']} Playwright calls")
+
+    base_path = metrics_base_path(logger, label)
+    if base_path is None:
+        return None
+    with open(base_path + ".json", "w", encoding="utf-8") as f:
+        json.dump({"label": label, "written_at": time.strftime("%Y-%m-%d %H:%M:%S"), "phases": phases}, f, indent=2)
+    with open(base_path + ".csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["phase", "started_at", "seconds", "playwright_calls"])
+        writer.writeheader()
+        writer.writerows(run_samples)
+    logger.info(f"Metrics written → {base_path}.json / .csv")
+    return base_path
@@ -0,0 +1,459 @@
+# run_state_store.py
+#
+# SQLite (WAL) run-state store kept next to the raw page files. It tracks searches, saved
+# result pages, borrower rows with their director status, the fetched directors, and the
+# retry queue of pages and director rows that failed (with reason and attempt count).
+# Pending work is found through indexed queries instead of scanning file names, every
+# director result is committed in its own transaction, and the page files are
+# materialized from the store by export_page. The store's pages, not the files in the
+# folder, are what merge_data reads; page files that do not fit a search's page plan are
+# moved to stale_pages/.
+
+import os
+import sqlite3
+import ujson as json
+from datetime import datetime
+
+import pandas as pd
+
+from utilities.extract_table_data import raw_output_file_name
+from utilities.stage_io import parse_directors, read_stage, write_stage
+
+STORE_FILE_NAME = "run_state.sqlite"
+STALE_PAGES_FOLDER = "stale_pages"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    search_id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    defaulters_type TEXT NOT NULL,
+    state TEXT NOT NULL,
+    pagination_limit INTEGER NOT NULL,
+    page_size INTEGER NOT NULL DEFAULT 0,   -- rows per page, 0 = unknown
+    records INTEGER NOT NULL DEFAULT 0,     -- rows in the whole search, 0 = unknown
+    updated_at TEXT,
+    UNIQUE (date, defaulters_type, state)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    search_id INTEGER NOT NULL,
+    page_no INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'saved',
+    updated_at TEXT,
+    PRIMARY KEY (search_id, page_no)
+);
+CREATE TABLE IF NOT EXISTS borrowers (
+    search_id INTEGER NOT NULL,
+    page_no INTEGER NOT NULL,
+    row_idx INTEGER NOT NULL,
+    borrower_name TEXT,
+    director_href TEXT,
+    row_json TEXT NOT NULL,
+    director_status TEXT NOT NULL DEFAULT 'not_fetched',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (search_id, page_no, row_idx)
+);
+CREATE INDEX IF NOT EXISTS idx_borrowers_status ON borrowers (search_id, director_status, page_no, row_idx);
+CREATE TABLE IF NOT EXISTS directors (
+    search_id INTEGER NOT NULL,
+    page_no INTEGER NOT NULL,
+    row_idx INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    director_name TEXT,
+    din_number TEXT,
+    pan_number TEXT,
+    PRIMARY KEY (search_id, page_no, row_idx, position)
+);
+CREATE TABLE IF NOT EXISTS retry_queue (
+    search_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,                     -- 'page' or 'director'
+    page_no INTEGER NOT NULL,
+    row_idx INTEGER NOT NULL,               -- -1 for pages
+    reason TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued / resolved / gave_up
+    first_failed_at TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (search_id, kind, page_no, row_idx)
+);
+CREATE INDEX IF NOT EXISTS idx_retry_queue_status ON retry_queue (search_id, status, kind);
+"""
+
+
+def now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def open_run_state(raw_output_folder):
+    """Opens (and creates) the store for a raw output folder. Connections are per thread."""
+    conn = sqlite3.connect(os.path.join(raw_output_folder, STORE_FILE_NAME), timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Stores created before the page plan was kept
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(searches)")}
+    for column in ("page_size", "records"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE searches ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    return conn
+
+
+# ----------------- Page plan -----------------
+def expected_page_rows(page_size, records, page_no):
+    """Rows page `page_no` holds under the page plan, or None when the plan is unknown."""
+    if not page_size or not records:
+        return None
+    return max(0, min(page_size, records - (page_no - 1) * page_size))
+
+
+def page_plan_matches(stored, plan):
+    """
+    Compares two (pagination_limit, page_size, records) plans on the page count and page size,
+    so saved pages still line up. An unknown page size (0, from an older store or a caller
+    without one) only needs the page count to match. A different total row count only changes
+    which rows the last pages hold; get_search re-checks those pages instead of resetting.
+    """
+    if stored[0] != plan[0]:
+        return False
+    return not stored[1] or not plan[1] or stored[1] == plan[1]
+
+
+def describe_plan(plan):
+    pagination_limit, page_size, records = plan
+    return f"{pagination_limit} pages" + (f" of {page_size} rows, {records} rows in total" if page_size else "")
+
+
+def search_page_files(raw_output_folder, date, defaulters_type, state):
+    """{page_no: [file names]} for the page files and director logs of a search in the folder."""
+    prefix = raw_output_file_name(date, defaulters_type, state, "", "")
+    files = {}
+    for name in os.listdir(raw_output_folder):
+        if not name.startswith(prefix):
+            continue
+        page_no, dot, _ = name[len(prefix):].partition(".")
+        if dot and page_no.isdigit():
+            files.setdefault(int(page_no), []).append(name)
+    return files
+
+
+def archive_page_files(logger, raw_output_folder, file_names, reason):
+    """Moves page files (and their director logs) to stale_pages/ so they are never imported or merged."""
+    if not file_names:
+        return
+    archive_folder = os.path.join(raw_output_folder, STALE_PAGES_FOLDER)
+    os.makedirs(archive_folder, exist_ok=True)
+    for name in file_names:
+        os.replace(os.path.join(raw_output_folder, name), os.path.join(archive_folder, name))
+    logger.warning(f"⚠️ Moved {len(file_names)} page files to {STALE_PAGES_FOLDER}/ ({reason}).")
+
+
+def drop_page(conn, search_id, page_no):
+    with conn:
+        for table in ("pages", "borrowers", "directors"):
+            conn.execute(f"DELETE FROM {table} WHERE search_id = ? AND page_no = ?", (search_id, page_no))
+        conn.execute("DELETE FROM retry_queue WHERE search_id = ? AND page_no = ? AND kind = 'director'", (search_id, page_no))
+
+
+def drop_mismatched_pages(conn, logger, raw_output_folder, search_id, date, defaulters_type, state, page_size, records):
+    """Drops saved pages whose row count does not fit the page plan, so they are fetched again."""
+    files = search_page_files(raw_output_folder, date, defaulters_type, state)
+    stale = []
+    for page_no, row_count in conn.execute("SELECT page_no, row_count FROM pages WHERE search_id = ?", (search_id,)).fetchall():
+        expected = expected_page_rows(page_size, records, page_no)
+        if expected is not None and row_count != expected:
+            drop_page(conn, search_id, page_no)
+            stale += files.get(page_no, [])
+    archive_page_files(logger, raw_output_folder, stale, f"row counts do not fit {page_size} rows per page for {state}")
+
+
+# ----------------- Searches and pages -----------------
+def get_search(conn, logger, raw_output_folder, date, defaulters_type, state, pagination_limit, page_size:int = 0, records:int = 0):
+    """
+    Returns the search_id for (date, defaulters_type, state), creating it when needed.
+    The search keeps its page plan: page count, rows per page and total rows. A new
+    search imports page files saved by earlier runs (exact file names, Parquet or the older
+    .xlsx) whose row count fits the plan. When the page count or page size changed, saved
+    pages no longer line up: the search is reset and nothing is imported, so every page is
+    fetched again. When only the total row count changed, just the saved pages whose row
+    count no longer fits are dropped. Page files that are not imported, including pages past
+    the page count, go to stale_pages/.
+    """
+    plan = (pagination_limit, page_size, records)
+    row = conn.execute(
+        "SELECT search_id, pagination_limit, page_size, records FROM searches WHERE date = ? AND defaulters_type = ? AND state = ?",
+        (date, defaulters_type, state),
+    ).fetchone()
+
+    if row and page_plan_matches(row[1:], plan):
+        search_id = row[0]
+        if page_size and (row[2], row[3]) != (page_size, records):
+            # The plan was unknown so far (older store) or the site's row count moved: keep the
+            # new plan and re-check the saved pages, which only drops the ones that no longer fit
+            if row[2]:
+                logger.info(f"Row count for {state} changed ({row[3]} → {records}), re-checking saved pages.")
+            with conn:
+                conn.execute("UPDATE searches SET page_size = ?, records = ?, updated_at = ? WHERE search_id = ?", (page_size, records, now(), search_id))
+            drop_mismatched_pages(conn, logger, raw_output_folder, search_id, date, defaulters_type, state, page_size, records)
+        return search_id
+
+    with conn:
+        if row:
+            logger.warning(f"⚠️ Page plan for {state} changed ({describe_plan(row[1:])} → {describe_plan(plan)}). Resetting run state.")
+            search_id = row[0]
+            for table in ("pages", "borrowers", "directors", "retry_queue"):
+                conn.execute(f"DELETE FROM {table} WHERE search_id = ?", (search_id,))
+            conn.execute("UPDATE searches SET pagination_limit = ?, page_size = ?, records = ?, updated_at = ? WHERE search_id = ?", (pagination_limit, page_size, records, now(), search_id))
+        else:
+            search_id = conn.execute(
+                "INSERT INTO searches (date, defaulters_type, state, pagination_limit, page_size, records, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (date, defaulters_type, state, pagination_limit, page_size, records, now()),
+            ).lastrowid
+
+    files = search_page_files(raw_output_folder, date, defaulters_type, state)
+    if row:
+        archive_page_files(logger, raw_output_folder, [name for names in files.values() for name in names], f"saved under the previous page plan of {state}")
+        return search_id
+    archive_page_files(logger, raw_output_folder, [name for page_no, names in files.items() if page_no > pagination_limit for name in names], f"past page {pagination_limit} of {state}")
+
+    imported, refused = 0, []
+    for page_no in range(1, pagination_limit + 1):
+        for extension in (".parquet", ".xlsx"):
+            file_path = os.path.join(raw_output_folder, raw_output_file_name(date, defaulters_type, state, page_no, extension))
+            if os.path.exists(file_path):
+                df = read_stage(file_path)
+                expected = expected_page_rows(page_size, records, page_no)
+                if expected is not None and len(df) != expected:
+                    logger.warning(f"⚠️ {os.path.basename(file_path)} has {len(df)} rows, page {page_no} should have {expected}. Not imported.")
+                    refused += files.get(page_no, [])
+                    break
+                record_page(conn, search_id, page_no, raw_output_file_name(date, defaulters_type, state, page_no), df)
+                if extension == ".xlsx":
+                    export_page(conn, search_id, page_no, raw_output_folder)  # converts the older page file to Parquet
+                imported += 1
+                break
+    archive_page_files(logger, raw_output_folder, refused, f"row counts do not fit the page plan of {state}")
+    logger.info(f"Run state created for {state}: {imported}/{pagination_limit} pages imported from existing files.")
+    return search_id
+
+
+def find_search(conn, date, defaulters_type, state):
+    """search_id of an existing search, or None."""
+    row = conn.execute(
+        "SELECT search_id FROM searches WHERE date = ? AND defaulters_type = ? AND state = ?",
+        (date, defaulters_type, state),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def search_page_plan(conn, search_id):
+    """(pagination_limit, page_size, records) the search was fetched with, or None."""
+    return conn.execute("SELECT pagination_limit, page_size, records FROM searches WHERE search_id = ?", (search_id,)).fetchone()
+
+
+def record_page(conn, search_id, page_no, file_name, df):
+    """Stores a saved results page and its borrower rows in one transaction."""
+    with conn:
+        conn.execute("DELETE FROM borrowers WHERE search_id = ? AND page_no = ?", (search_id, page_no))
+        conn.execute("DELETE FROM directors WHERE search_id = ? AND page_no = ?", (search_id, page_no))
+        for row_idx, row in enumerate(df.to_dict("records")):
+            directors = parse_directors(row.pop("directors_data", None))
+            status = 'fetched' if str(row.get("directors_presence", "")).lower().strip() == 'fetched' else 'not_fetched'
+            row = {k: (None if isinstance(v, float) and pd.isna(v) else v) for k, v in row.items()}
+            conn.execute(
+                "INSERT INTO borrowers (search_id, page_no, row_idx, borrower_name, director_href, row_json, director_status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (search_id, page_no, row_idx, row.get("borrowerName"), row.get("directorName_href"), json.dumps(row), status, now()),
+            )
+            insert_directors(conn, search_id, page_no, row_idx, directors)
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (search_id, page_no, file_name, row_count, status, updated_at) VALUES (?, ?, ?, ?, 'saved', ?)",
+            (search_id, page_no, os.path.basename(file_name), len(df), now()),
+        )
+
+
+def missing_pages(conn, search_id, pagination_limit):
+    saved = {r[0] for r in conn.execute("SELECT page_no FROM pages WHERE search_id = ?", (search_id,))}
+    return [n for n in range(1, pagination_limit + 1) if n not in saved]
+
+
+def page_file_name(conn, search_id, page_no):
+    return conn.execute("SELECT file_name FROM pages WHERE search_id = ? AND page_no = ?", (search_id, page_no)).fetchone()[0]
+
+
+def page_files(conn, search_id, raw_output_folder):
+    return [
+        os.path.join(raw_output_folder, r[0])
+        for r in conn.execute("SELECT file_name FROM pages WHERE search_id = ? ORDER BY page_no", (search_id,))
+    ]
+
+
+def stored_search_pages(raw_output_folder):
+    """
+    {page file prefix: [saved page file names]} for every search in a folder's store, or None
+    without a store. The prefix (raw_output_file_name without the page number) is shared by
+    every page file of the search, saved or not.
+    """
+    if not os.path.exists(os.path.join(raw_output_folder, STORE_FILE_NAME)):
+        return None
+    conn = open_run_state(raw_output_folder)
+    try:
+        searches = {
+            search_id: raw_output_file_name(date, defaulters_type, state, "", "")
+            for search_id, date, defaulters_type, state in conn.execute("SELECT search_id, date, defaulters_type, state FROM searches")
+        }
+        pages = {prefix: [] for prefix in searches.values()}
+        for search_id, file_name in conn.execute("SELECT search_id, file_name FROM pages ORDER BY search_id, page_no"):
+            pages[searches[search_id]].append(file_name)
+        return pages
+    finally:
+        conn.close()
+
+
+# ----------------- Directors -----------------
+def pending_borrowers(conn, search_id):
+    """Rows still waiting for directors: [(page_no, row_idx, href, borrower_name), ...]."""
+    return conn.execute(
+        "SELECT page_no, row_idx, director_href, borrower_name FROM borrowers "
+        "WHERE search_id = ? AND director_status != 'fetched' AND director_href LIKE 'javascript:getDirctorList%' "
+        "ORDER BY page_no, row_idx",
+        (search_id,),
+    ).fetchall()
+
+
+def count_fetched_borrowers(conn, search_id):
+    return conn.execute(
+        "SELECT COUNT(*) FROM borrowers WHERE search_id = ? AND director_status = 'fetched'",
+        (search_id,),
+    ).fetchone()[0]
+
+
+def pending_borrower_rows(conn, search_id):
+    """Rows still waiting for directors with their stored row: [(page_no, row_idx, row), ...]."""
+    return [
+        (page_no, row_idx, json.loads(row_json))
+        for page_no, row_idx, row_json in conn.execute(
+            "SELECT page_no, row_idx, row_json FROM borrowers "
+            "WHERE search_id = ? AND director_status != 'fetched' AND director_href LIKE 'javascript:getDirctorList%' "
+            "ORDER BY page_no, row_idx",
+            (search_id,),
+        )
+    ]
+
+
+def fetched_borrower_rows(conn, search_id):
+    """Rows whose directors are fetched, with their directors: [(row, directors), ...]."""
+    directors = {}
+    for page_no, row_idx, name, din, pan in conn.execute(
+        "SELECT page_no, row_idx, director_name, din_number, pan_number FROM directors WHERE search_id = ? ORDER BY page_no, row_idx, position",
+        (search_id,),
+    ):
+        directors.setdefault((page_no, row_idx), []).append({"Directors Reported by Credit Institutions": name, "DIN Number": din, "PAN Number": pan})
+    return [
+        (json.loads(row_json), directors.get((page_no, row_idx), []))
+        for page_no, row_idx, row_json in conn.execute(
+            "SELECT page_no, row_idx, row_json FROM borrowers WHERE search_id = ? AND director_status = 'fetched'",
+            (search_id,),
+        )
+    ]
+
+
+def insert_directors(conn, search_id, page_no, row_idx, directors):
+    conn.executemany(
+        "INSERT OR REPLACE INTO directors (search_id, page_no, row_idx, position, director_name, din_number, pan_number) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (search_id, page_no, row_idx, position, d.get("Directors Reported by Credit Institutions", ""), d.get("DIN Number", ""), d.get("PAN Number", ""))
+            for position, d in enumerate(directors)
+        ],
+    )
+
+
+def record_directors(conn, search_id, page_no, row_idx, directors):
+    """Stores one director lookup result in its own transaction. Empty results count as an attempt."""
+    record_director_batch(conn, search_id, [(page_no, row_idx, directors)])
+
+
+def record_director_batch(conn, search_id, results):
+    """Stores [(page_no, row_idx, directors), ...] in a single transaction."""
+    with conn:
+        for page_no, row_idx, directors in results:
+            conn.execute("DELETE FROM directors WHERE search_id = ? AND page_no = ? AND row_idx = ?", (search_id, page_no, row_idx))
+            insert_directors(conn, search_id, page_no, row_idx, directors)
+            conn.execute(
+                "UPDATE borrowers SET director_status = ?, attempts = attempts + 1, updated_at = ? WHERE search_id = ? AND page_no = ? AND row_idx = ?",
+                ('fetched' if directors else 'not_fetched', now(), search_id, page_no, row_idx),
+            )
+
+
+# ----------------- Page export -----------------
+def export_page(conn, search_id, page_no, raw_output_folder):
+    """Materializes a raw page file (row columns, directors_presence, directors_data)."""
+    file_name = page_file_name(conn, search_id, page_no)
+    directors = {}
+    for row_idx, name, din, pan in conn.execute(
+        "SELECT row_idx, director_name, din_number, pan_number FROM directors WHERE search_id = ? AND page_no = ? ORDER BY row_idx, position",
+        (search_id, page_no),
+    ):
+        directors.setdefault(row_idx, []).append({"Directors Reported by Credit Institutions": name, "DIN Number": din, "PAN Number": pan})
+
+    rows = []
+    for row_idx, row_json, status in conn.execute(
+        "SELECT row_idx, row_json, director_status FROM borrowers WHERE search_id = ? AND page_no = ? ORDER BY row_idx",
+        (search_id, page_no),
+    ):
+        row = json.loads(row_json)
+        row["directors_presence"] = status
+        row["directors_data"] = directors.get(row_idx, [])
+        rows.append(row)
+
+    file_path = os.path.join(raw_output_folder, file_name)
+    return write_stage(pd.DataFrame(rows), file_path)
+
+
+# ----------------- Retry queue -----------------
+def queue_failure(conn, search_id, kind, page_no, row_idx, reason, max_attempts:int = 3):
+    """Adds a failed page (row_idx -1) or director row to the retry queue, or counts another attempt."""
+    with conn:
+        conn.execute(
+            "INSERT INTO retry_queue (search_id, kind, page_no, row_idx, reason, attempts, status, first_failed_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 1, 'queued', ?, ?) "
+            "ON CONFLICT (search_id, kind, page_no, row_idx) DO UPDATE SET "
+            "reason = excluded.reason, attempts = attempts + 1, updated_at = excluded.updated_at, "
+            "status = CASE WHEN attempts + 1 >= ? THEN 'gave_up' ELSE 'queued' END",
+            (search_id, kind, page_no, row_idx, str(reason)[:500], now(), now(), max_attempts),
+        )
+
+
+def resolve_retries(conn, search_id):
+    """Marks queued items done by any path (a retry, a later run) as resolved. Returns how many."""
+    with conn:
+        pages = conn.execute(
+            "UPDATE retry_queue SET status = 'resolved', updated_at = ? WHERE search_id = ? AND kind = 'page' AND status != 'resolved' "
+            "AND page_no IN (SELECT page_no FROM pages WHERE search_id = ?)",
+            (now(), search_id, search_id),
+        ).rowcount
+        directors = conn.execute(
+            "UPDATE retry_queue SET status = 'resolved', updated_at = ? WHERE search_id = ? AND kind = 'director' AND status != 'resolved' "
+            "AND EXISTS (SELECT 1 FROM borrowers b WHERE b.search_id = retry_queue.search_id AND b.page_no = retry_queue.page_no "
+            "AND b.row_idx = retry_queue.row_idx AND b.director_status = 'fetched')",
+            (now(), search_id),
+        ).rowcount
+    return pages + directors
+
+
+def queued_retries(conn, search_id, kind):
+    """Queued items of one kind: [(page_no, row_idx, reason, attempts), ...]."""
+    return conn.execute(
+        "SELECT page_no, row_idx, reason, attempts FROM retry_queue WHERE search_id = ? AND kind = ? AND status = 'queued' ORDER BY page_no, row_idx",
+        (search_id, kind),
+    ).fetchall()
+
+
+def retry_queue_counts(conn, search_id):
+    """{(kind, status): count} for a search."""
+    return {
+        (kind, status): count
+        for kind, status, count in conn.execute(
+            "SELECT kind, status, COUNT(*) FROM retry_queue WHERE search_id = ? GROUP BY kind, status", (search_id,)
+        )
+    }
@@ -0,0 +1,177 @@
+# stage_io.py
+#
+# Storage for the intermediate stages (raw pages and merged files). Stages are written as
+# Parquet with directors_data kept as a native list<struct> column, so nothing is
+# stringified and re-parsed between stages. Excel is only produced for the final export.
+# Older .xlsx stage files are still read; when a stem exists in both formats the Parquet
+# file wins.
+
+import os
+import ast
+
+import pandas as pd
+import pyarrow as pa
+from openpyxl import Workbook, load_workbook
+import pyarrow.parquet as pq
+
+from utilities.run_metrics import timed
+
+STAGE_EXTENSIONS = (".parquet", ".xlsx")
+
+DIRECTOR_FIELDS = ["Directors Reported by Credit Institutions", "DIN Number", "PAN Number"]
+DIRECTORS_TYPE = pa.list_(pa.struct([(field, pa.string()) for field in DIRECTOR_FIELDS]))
+
+
+def stage_extension(stage_format):
+    return ".xlsx" if str(stage_format).strip().lower() in ("xlsx", "excel") else ".parquet"
+
+
+def parse_directors(value):
+    """directors_data from any stage: a list, a Parquet array of structs or a stringified list."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        if value.strip().startswith("["):
+            try:
+                return ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                return []
+        return []
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    return list(value)
+
+
+def stage_text(value):
+    return None if value is None or (isinstance(value, float) and pd.isna(value)) else str(value)
+
+
+def directors_array(values):
+    return pa.array(
+        [[{field: stage_text(d.get(field)) for field in DIRECTOR_FIELDS} for d in parse_directors(v)] for v in values],
+        type=DIRECTORS_TYPE,
+    )
+
+
+def write_stage(df, file_path):
+    """Writes a stage file; the format follows the file extension."""
+    with timed("stage_write"):
+        if file_path.endswith(".xlsx"):
+            df.to_excel(file_path, index=False)
+            return file_path
+
+        columns = {}
+        for column in df.columns:
+            if column == "directors_data":
+                columns[column] = directors_array(df[column])
+            elif df[column].dtype == object:
+                columns[column] = pa.array([stage_text(v) for v in df[column]], type=pa.string())
+            else:
+                columns[column] = pa.Array.from_pandas(df[column])
+        pq.write_table(pa.table(columns), file_path)
+        return file_path
+
+
+def read_stage(file_path, dtype=None):
+    """
+    Reads a stage file into a DataFrame with directors_data as a list of dicts.
+    dtype=str mirrors read_excel(dtype=str) for the other columns.
+    """
+    if file_path.endswith(".xlsx"):
+        df = pd.read_excel(file_path, dtype=dtype, engine="openpyxl")
+    else:
+        df = pq.read_table(file_path).to_pandas()
+        if dtype is str:
+            for column in df.columns:
+                if column != "directors_data":
+                    text = df[column].map(stage_text)
+                    df[column] = text.where(text.notna(), float("nan"))
+    if "directors_data" in df.columns:
+        df["directors_data"] = df["directors_data"].map(parse_directors)
+    return df
+
+
+def stage_row_count(file_path):
+    """Row count of a stage file without loading it (Parquet metadata, openpyxl read-only dimensions)."""
+    if file_path.endswith(".xlsx"):
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            return max(workbook.active.max_row - 1, 0)
+        finally:
+            workbook.close()
+    return pq.ParquetFile(file_path).metadata.num_rows
+
+
+def stage_files(folder):
+    """Stage file names in a folder, one per stem, preferring Parquet over Excel."""
+    chosen = {}
+    for name in sorted(os.listdir(folder)):
+        stem, extension = os.path.splitext(name)
+        if extension not in STAGE_EXTENSIONS or name.startswith("~$"):
+            continue
+        if stem not in chosen or extension == ".parquet":
+            chosen[stem] = name
+    return sorted(chosen.values())
+
+
+# ----------------- Streaming writer -----------------
+def stage_columns(file_path):
+    """Column names of a stage file without loading its rows."""
+    if file_path.endswith(".xlsx"):
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+            return [c for c in header if c is not None]
+        finally:
+            workbook.close()
+    return pq.read_schema(file_path).names
+
+
+def open_stage_writer(file_path, columns):
+    """
+    Opens a constant-memory writer for a stage file: a Parquet writer with one row group per
+    append (text columns, directors_data as list<struct>) or a write-only workbook. Rows go
+    to a temporary file that close_stage_writer moves into place.
+    """
+    writer = {"path": file_path, "tmp_path": file_path + ".tmp", "columns": list(columns), "rows": 0}
+    if file_path.endswith(".xlsx"):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(writer["columns"])
+        writer.update(workbook=workbook, sheet=sheet)
+    else:
+        schema = pa.schema([(c, DIRECTORS_TYPE if c == "directors_data" else pa.string()) for c in writer["columns"]])
+        writer["parquet"] = pq.ParquetWriter(writer["tmp_path"], schema)
+    return writer
+
+
+def excel_value(value):
+    if isinstance(value, list):
+        return str(value)
+    return None if value is None or (isinstance(value, float) and pd.isna(value)) else value
+
+
+def append_stage_rows(writer, df):
+    """Appends a DataFrame; columns missing from it are written empty."""
+    df = df.reindex(columns=writer["columns"])
+    if "sheet" in writer:
+        for row in df.itertuples(index=False, name=None):
+            writer["sheet"].append([excel_value(v) for v in row])
+    else:
+        arrays = [directors_array(df[c]) if c == "directors_data" else pa.array([stage_text(v) for v in df[c]], type=pa.string()) for c in writer["columns"]]
+        writer["parquet"].write_table(pa.Table.from_arrays(arrays, schema=writer["parquet"].schema))
+    writer["rows"] += len(df)
+
+
+def close_stage_writer(writer, keep:bool = True):
+    """Finishes the file and moves it into place, or discards it. Returns the rows written."""
+    if "sheet" in writer:
+        if keep:
+            writer["workbook"].save(writer["tmp_path"])
+    else:
+        writer["parquet"].close()
+    if keep:
+        os.replace(writer["tmp_path"], writer["path"])
+    elif os.path.exists(writer["tmp_path"]):
+        os.remove(writer["tmp_path"])
+    return writer["rows"]
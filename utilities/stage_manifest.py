@@ -0,0 +1,91 @@
+# stage_manifest.py
+#
+# Manifest for incremental post-processing, kept in fetched_data/final. For every
+# (state, date) group it records the raw input files (size, mtime, sha256) and the merged
+# output; for every merged file it records the fingerprint it was cleaned from. merge_data
+# only rebuilds groups whose inputs changed and cleaner skips outputs that are up to date.
+# Delete the manifest to force a full rebuild.
+
+import os
+import hashlib
+import ujson as json
+
+MANIFEST_FILE_NAME = "stage_manifest.json"
+
+
+def load_stage_manifest(logger, folder):
+    path = os.path.join(folder, MANIFEST_FILE_NAME)
+    manifest = {"merged": {}, "cleaned": {}}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest.update(json.load(f))
+        except ValueError as e:
+            logger.warning(f"⚠️ Unreadable stage manifest {path}: {e}. Rebuilding everything.")
+    manifest["path"] = path
+    return manifest
+
+
+def save_stage_manifest(manifest):
+    """Writes the manifest atomically so a crash never leaves a half-written file."""
+    tmp_path = manifest["path"] + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({k: v for k, v in manifest.items() if k != "path"}, f, indent=2)
+    os.replace(tmp_path, manifest["path"])
+
+
+def manifest_key(manifest, file_path):
+    return os.path.relpath(file_path, os.path.dirname(manifest["path"])).replace(os.sep, "/")
+
+
+def file_fingerprint(file_path, previous=None):
+    """(size, mtime, sha256) of a file. The hash is reused when size and mtime are unchanged."""
+    stat = os.stat(file_path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime") == stat.st_mtime:
+        return dict(previous)
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha.hexdigest()}
+
+
+def same_content(a, b):
+    return bool(a and b) and a.get("size") == b.get("size") and a.get("sha256") == b.get("sha256")
+
+
+# ----------------- Merge groups -----------------
+def input_fingerprints(manifest, key, file_list):
+    previous = manifest["merged"].get(key, {}).get("inputs", {})
+    fingerprints = {}
+    for file_path in file_list:
+        name = manifest_key(manifest, file_path)
+        fingerprints[name] = file_fingerprint(file_path, previous.get(name))
+    return fingerprints
+
+
+def merge_is_current(manifest, key, fingerprints, output_file):
+    entry = manifest["merged"].get(key)
+    if not entry or entry.get("output") != manifest_key(manifest, output_file) or not os.path.exists(output_file):
+        return False
+    previous = entry.get("inputs", {})
+    return previous.keys() == fingerprints.keys() and all(same_content(previous[name], fingerprints[name]) for name in fingerprints)
+
+
+def record_merge(manifest, key, fingerprints, output_file):
+    manifest["merged"][key] = {"inputs": fingerprints, "output": manifest_key(manifest, output_file)}
+    save_stage_manifest(manifest)
+
+
+# ----------------- Cleaned outputs -----------------
+def clean_is_current(manifest, merged_file, output_file):
+    """Returns (is_current, fingerprint of merged_file)."""
+    entry = manifest["cleaned"].get(manifest_key(manifest, merged_file), {})
+    fingerprint = file_fingerprint(merged_file, entry.get("source"))
+    is_current = same_content(entry.get("source"), fingerprint) and entry.get("output") == manifest_key(manifest, output_file) and os.path.exists(output_file)
+    return is_current, fingerprint
+
+
+def record_clean(manifest, merged_file, fingerprint, output_file):
+    manifest["cleaned"][manifest_key(manifest, merged_file)] = {"source": fingerprint, "output": manifest_key(manifest, output_file)}
+    save_stage_manifest(manifest)
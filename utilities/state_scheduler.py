@@ -0,0 +1,132 @@
+# state_scheduler.py
+#
+# Runs several states at once. Each state runs in its own process (sync Playwright and
+# Chromium are per-process), with a global concurrency cap, retry with exponential
+# backoff, largest-first ordering and a live pages/rows summary fed by a progress queue.
+
+import time
+import queue
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from utilities.logger import set_log_levels
+
+
+def order_states(states, big_states):
+    """Largest-first: states from the big_state list (in its order) come first, the rest keep their order."""
+    big_first = [s for s in big_states if s in states]
+    return big_first + [s for s in states if s not in big_first]
+
+
+def report_progress(progress, state, pages:int = 0, rows:int = 0, total_pages=None):
+    """Posts a progress event for the scheduler. No-op when running outside the scheduler."""
+    if progress is None:
+        return
+    try:
+        progress.put({"state": state, "pages": pages, "rows": rows, "total_pages": total_pages})
+    except Exception:
+        pass
+
+
+def init_state_worker(logger_name, log_levels):
+    """
+    Pool initializer. A forked worker inherits the parent's log levels, but a spawned one
+    (Windows) imports the scraper again and starts from the defaults, so they are set here.
+    """
+    logger = logging.getLogger(logger_name)
+    if log_levels and hasattr(logger, "level_filter"):
+        set_log_levels(logger, log_levels)
+
+
+def run_state_with_retry(run_fn, state, run_kwargs, retries, backoff_seconds, progress):
+    """Runs one state, retrying with exponential backoff. Returns (state, succeeded, attempts, error)."""
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            run_fn(state=state, progress=progress, **run_kwargs)
+            return state, True, attempt, None
+        except Exception as e:
+            error = str(e)
+            if attempt <= retries:
+                wait = backoff_seconds * (2 ** (attempt - 1))
+                progress.put({"state": state, "retry": attempt, "wait": wait, "error": error})
+                time.sleep(wait)
+    return state, False, retries + 1, error
+
+
+def apply_progress_event(logger, summary, event):
+    s = summary[event["state"]]
+    if "retry" in event:
+        # the next attempt reports already-saved pages again
+        s.update(status=f"retrying ({event['retry']})", pages=0, rows=0)
+        logger.warning(f"⚠️ {event['state']} failed ({event['error']}), retry {event['retry']} in {event['wait']}s")
+        return
+    if s["status"] not in ("done", "failed"):
+        s["status"] = "running"
+    s["pages"] += event["pages"]
+    s["rows"] += event["rows"]
+    if event["total_pages"] is not None:
+        s["total_pages"] = event["total_pages"]
+
+
+def log_progress_summary(logger, summary):
+    lines = []
+    for state, s in summary.items():
+        total = s["total_pages"] if s["total_pages"] is not None else "?"
+        lines.append(f"  {state}: {s['status']}, pages {s['pages']}/{total}, rows {s['rows']}")
+    logger.info("📊 Progress:\n" + "\n".join(lines))
+
+
+def schedule_states(logger, run_fn, states, big_states, run_kwargs, concurrency:int = 2, retries:int = 2, backoff_seconds:int = 30, progress_interval:int = 30, log_levels:str = ""):
+    """
+    Runs run_fn(state=state, progress=queue, **run_kwargs) for every state, at most
+    `concurrency` at a time. run_fn must be a module-level function so it can be pickled.
+    `log_levels` (the "log_levels" setting) is applied in every worker process.
+    """
+    ordered_states = order_states(states, big_states)
+    logger.info(f"▶ Scheduling {len(ordered_states)} states with concurrency {concurrency}: {ordered_states}")
+    summary = {state: {"status": "queued", "pages": 0, "rows": 0, "total_pages": None} for state in ordered_states}
+
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=concurrency, initializer=init_state_worker, initargs=(logger.name, log_levels)) as executor:
+        progress = manager.Queue()
+        futures = {
+            executor.submit(run_state_with_retry, run_fn, state, run_kwargs, retries, backoff_seconds, progress): state
+            for state in ordered_states
+        }
+        for i, state in enumerate(ordered_states):
+            if i < concurrency:
+                summary[state]["status"] = "running"
+
+        last_summary = time.time()
+        pending = set(futures)
+        while pending:
+            try:
+                event = progress.get(timeout=1)
+            except queue.Empty:
+                event = None
+            if event:
+                apply_progress_event(logger, summary, event)
+
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                state = futures[future]
+                try:
+                    _, succeeded, attempts, error = future.result()
+                except Exception as e:
+                    succeeded, attempts, error = False, 0, str(e)
+                summary[state]["status"] = "done" if succeeded else "failed"
+                if succeeded:
+                    logger.info(f"✅ {state} finished after {attempts} attempt(s)")
+                else:
+                    logger.error(f"❌ Error for {state} after {attempts} attempt(s): {error}")
+
+            if time.time() - last_summary >= progress_interval:
+                log_progress_summary(logger, summary)
+                last_summary = time.time()
+
+        while not progress.empty():
+            apply_progress_event(logger, summary, progress.get())
+
+    log_progress_summary(logger, summary)
+    return summary
@@ -0,0 +1,199 @@
+# throttle.py
+#
+# Adaptive throttle shared by every page and director worker of a state run. Each request
+# to the site runs inside `with throttle_slot(throttle) as slot:`. Its outcome ("ok",
+# "website_issue" from is_website_issue / WebsiteIssueError, or "error") and latency drive:
+#   concurrency - AIMD: +1/limit per success (about +1 per round of requests), halved on a
+#                 failure, cut to 0.7x when latency goes over the target. Limits are cut at
+#                 most once per round so a burst of failures counts once.
+#   pacing      - a gap between request starts. It doubles (once per round, up to
+#                 max_interval_s) on website issues and shrinks 0.9x per success, so the serial
+#                 browser loops slow down as well.
+#   circuit     - `failure_threshold` failures in a row open it. Requests then wait
+#                 `open_seconds` before one half-open probe goes through. A good probe closes
+#                 it with the limit back at 1. A failed probe reopens it for twice as long,
+#                 up to `max_open_seconds`.
+# The latency target is "throttle_latency_target(seconds)", or 3x the fastest smoothed
+# latency seen once a few requests are in.
+
+import threading
+import time
+from contextlib import contextmanager
+
+from utilities.is_website_issue import WebsiteIssueError
+from utilities.run_metrics import record_sample
+
+LATENCY_SAMPLES_BEFORE_TARGET = 5
+
+
+def open_throttle(logger, max_concurrency:int = 1, failure_threshold:int = 5, open_seconds:float = 30.0, max_open_seconds:float = 600.0, latency_target_s:float = 0.0, max_interval_s:float = 5.0):
+    max_concurrency = max(1, int(max_concurrency))
+    return {
+        "logger": logger,
+        "condition": threading.Condition(),
+        "max_concurrency": max_concurrency,
+        "limit": float(max_concurrency),
+        "in_flight": 0,
+        "interval_s": 0.0,
+        "max_interval_s": max_interval_s,
+        "next_start": 0.0,
+        "state": "closed",                 # closed / open / half_open
+        "failures": 0,                     # in a row
+        "failure_threshold": max(1, int(failure_threshold)),
+        "base_open_seconds": open_seconds,
+        "open_seconds": open_seconds,
+        "max_open_seconds": max(open_seconds, max_open_seconds),
+        "opened_at": 0.0,
+        "probe_in_flight": False,
+        "latency_target_s": latency_target_s,
+        "latency_ewma": None,
+        "latency_floor": None,
+        "latency_samples": 0,
+        "last_decrease": 0.0,
+        "stats": {"requests": 0, "ok": 0, "website_issue": 0, "error": 0, "slow": 0, "opened": 0, "waited_s": 0.0, "min_limit": max_concurrency},
+    }
+
+
+def latency_target(throttle):
+    if throttle["latency_target_s"]:
+        return throttle["latency_target_s"]
+    if throttle["latency_samples"] >= LATENCY_SAMPLES_BEFORE_TARGET and throttle["latency_floor"]:
+        return 3 * throttle["latency_floor"]
+    return 0.0
+
+
+def decrease_limit(throttle, factor, now, slow_down:bool = False):
+    # One cut per round of requests (the smoothed latency, at least a second)
+    if now - throttle["last_decrease"] < max(throttle["latency_ewma"] or 0.0, 1.0):
+        return
+    throttle["limit"] = max(1.0, throttle["limit"] * factor)
+    if slow_down:
+        throttle["interval_s"] = min(throttle["max_interval_s"], max(2 * throttle["interval_s"], 0.5))
+    throttle["last_decrease"] = now
+    throttle["stats"]["min_limit"] = min(throttle["stats"]["min_limit"], int(throttle["limit"]))
+
+
+def open_circuit(throttle, now, reason):
+    throttle["state"] = "open"
+    throttle["opened_at"] = now
+    throttle["limit"] = 1.0
+    throttle["stats"]["opened"] += 1
+    throttle["stats"]["min_limit"] = 1
+    throttle["logger"].warning(f"🚦 Circuit open after {reason}, pausing requests for {round(throttle['open_seconds'], 1)}s.")
+
+
+# ----------------- Slots -----------------
+def acquire_slot(throttle):
+    """Blocks until the circuit, the concurrency limit and the pacing let a request start."""
+    condition = throttle["condition"]
+    wait_start = time.time()
+    with condition:
+        while True:
+            now = time.time()
+            if throttle["state"] == "open" and now - throttle["opened_at"] >= throttle["open_seconds"]:
+                throttle["state"] = "half_open"
+                throttle["logger"].info("🚦 Circuit half-open, sending one probe request.")
+            probe = False
+            if throttle["state"] == "open":
+                timeout = throttle["opened_at"] + throttle["open_seconds"] - now
+            elif throttle["state"] == "half_open":
+                if not throttle["probe_in_flight"] and throttle["in_flight"] == 0:
+                    throttle["probe_in_flight"] = probe = True
+                    break
+                timeout = None
+            elif throttle["in_flight"] >= int(throttle["limit"]):
+                timeout = None
+            elif now < throttle["next_start"]:
+                timeout = throttle["next_start"] - now
+            else:
+                break
+            condition.wait(timeout)
+
+        throttle["in_flight"] += 1
+        throttle["next_start"] = now + throttle["interval_s"]
+        throttle["stats"]["requests"] += 1
+        waited_s = now - wait_start
+        throttle["stats"]["waited_s"] += waited_s
+    if waited_s > 0.001:
+        record_sample("throttle_wait", waited_s, wait_start)
+    return {"started": time.time(), "probe": probe, "outcome": "ok"}
+
+
+def release_slot(throttle, slot):
+    """Feeds the outcome and latency of a finished request back into the throttle."""
+    now = time.time()
+    latency = now - slot["started"]
+    outcome = slot["outcome"]
+    logger = throttle["logger"]
+    with throttle["condition"]:
+        throttle["in_flight"] -= 1
+        throttle["stats"][outcome] += 1
+        if slot["probe"]:
+            throttle["probe_in_flight"] = False
+
+        if outcome == "ok":
+            throttle["failures"] = 0
+            ewma = throttle["latency_ewma"]
+            throttle["latency_ewma"] = latency if ewma is None else 0.8 * ewma + 0.2 * latency
+            throttle["latency_samples"] += 1
+            if throttle["latency_floor"] is None or throttle["latency_ewma"] < throttle["latency_floor"]:
+                throttle["latency_floor"] = throttle["latency_ewma"]
+            if slot["probe"]:
+                throttle["state"] = "closed"
+                throttle["open_seconds"] = throttle["base_open_seconds"]
+                throttle["interval_s"] /= 2
+                logger.info("🚦 Probe succeeded, circuit closed.")
+            target = latency_target(throttle)
+            if target and latency > target:
+                throttle["stats"]["slow"] += 1
+                decrease_limit(throttle, 0.7, now)
+            else:
+                throttle["limit"] = min(float(throttle["max_concurrency"]), throttle["limit"] + 1 / throttle["limit"])
+            throttle["interval_s"] = throttle["interval_s"] * 0.9 if throttle["interval_s"] > 0.05 else 0.0
+        else:
+            throttle["failures"] += 1
+            decrease_limit(throttle, 0.5, now, slow_down=outcome == "website_issue")
+            if slot["probe"]:
+                throttle["open_seconds"] = min(throttle["max_open_seconds"], 2 * throttle["open_seconds"])
+                open_circuit(throttle, now, "a failed probe")
+            elif throttle["state"] == "closed" and throttle["failures"] >= throttle["failure_threshold"]:
+                open_circuit(throttle, now, f"{throttle['failures']} failures in a row ({outcome})")
+        throttle["condition"].notify_all()
+
+
+@contextmanager
+def throttle_slot(throttle):
+    """
+    Runs the block as one throttled request. WebsiteIssueError counts as a website issue and
+    any other exception as an error; the block can also set slot["outcome"] itself.
+    Without a throttle the block just runs.
+    """
+    if throttle is None:
+        yield {"outcome": "ok"}
+        return
+    slot = acquire_slot(throttle)
+    try:
+        yield slot
+    except WebsiteIssueError:
+        slot["outcome"] = "website_issue"
+        raise
+    except Exception:
+        slot["outcome"] = "error"
+        raise
+    finally:
+        release_slot(throttle, slot)
+
+
+def log_throttle_stats(logger, throttle, state):
+    if throttle is None:
+        return
+    with throttle["condition"]:
+        s = dict(throttle["stats"])
+        limit, interval_s, latency_ewma = throttle["limit"], throttle["interval_s"], throttle["latency_ewma"]
+    if not s["requests"]:
+        return
+    logger.info(
+        f"🚦 Throttle for {state}: {s['requests']} requests ({s['ok']} ok, {s['website_issue']} website issues, {s['error']} errors, {s['slow']} slow), "
+        f"circuit opened {s['opened']} times, {round(s['waited_s'], 1)}s waited across workers, concurrency limit {s['min_limit']}..{int(limit)} of {throttle['max_concurrency']}, "
+        f"pacing {round(interval_s, 2)}s, latency {round(1000 * (latency_ewma or 0))} ms"
+    )
@@ -1,5 +1,7 @@
 # wait_for_loader_to_disappear.py
 
+from utilities.run_metrics import timed
+
 def wait_for_loader_to_disappear(page, logger, timeout_ms:int=60000):
     """
     Waits for the page loader to disappear.
@@ -8,13 +10,14 @@ def wait_for_loader_to_disappear(page, logger, timeout_ms:int=60000):
         page: Playwright page object.
         timeout: Maximum time to wait for the loader in milliseconds.
     """
-    try:
-        page.wait_for_selector(
-            "div.blockUI.blockMsg.blockPage",
-            state="detached",
-            timeout=timeout_ms
-        )
-        logger.info("Loader disappeared.")
-    except Exception:
-        logger.warning(f"⚠️ Loader did not disappear within {timeout_ms/1000} seconds...")
+    with timed("loader_wait"):
+        try:
+            page.wait_for_selector(
+                "div.blockUI.blockMsg.blockPage",
+                state="detached",
+                timeout=timeout_ms
+            )
+            logger.debug("Loader disappeared.")
+        except Exception:
+            logger.warning(f"⚠️ Loader did not disappear within {timeout_ms/1000} seconds...")
         
\ No newline at end of file
@@ -0,0 +1,195 @@
+# wait_strategy.py
+#
+# Event-driven waits for the navigation loop. Instead of fixed sleeps, every step waits on a
+# concrete signal (the grid's XHR response, a changed ui-paging-info text, DirectorInfoTable
+# rows being attached) and then on the blockUI loader via wait_for_loader_to_disappear.
+#
+# Profiles:
+#   fast - signals only
+#   safe - signals plus networkidle and a short settle delay, for a flaky site
+
+import time
+import threading
+
+from utilities.wait_for_loader_to_disappear import wait_for_loader_to_disappear
+from utilities.grid_client import is_grid_response
+
+WAIT_PROFILES = {
+    "fast": {"networkidle": False, "settle_ms": 0},
+    "safe": {"networkidle": True, "settle_ms": 300},
+}
+
+# Fixed sleeps the previous implementation spent on each step, in seconds
+LEGACY_SLEEPS = {
+    "search": 4.0,        # wait_for_timeout(2000) + 2 x wait_for_timeout(1000)
+    "next_page": 3.5,     # sleep(0.5) + sleep(1) + sleep(2)
+    "director": 1.0,      # sleep(1) after the popup loads
+    "back": 1.0,          # sleep(1) after go_back
+}
+
+PAGING_INFO_JS = """
+() => { const el = document.querySelector('div.ui-paging-info'); return el ? el.innerText.trim() : ''; }
+"""
+
+GRID_PAGE_JS = "() => window.jQuery ? jQuery('#projectTable').jqGrid('getGridParam', 'page') : null"
+
+_stats_lock = threading.Lock()
+wait_stats = {}
+
+
+def get_wait_profile(name):
+    return WAIT_PROFILES.get(str(name).strip().lower(), WAIT_PROFILES["safe"])
+
+
+def record_wait(step, waited_s, settle_s, legacy_s=None):
+    with _stats_lock:
+        s = wait_stats.setdefault(step, {"count": 0, "waited_s": 0.0, "saved_s": 0.0})
+        s["count"] += 1
+        s["waited_s"] += waited_s
+        s["saved_s"] += (LEGACY_SLEEPS.get(step, 0.0) if legacy_s is None else legacy_s) - settle_s
+
+
+def settle(page, profile):
+    """Applies the profile's optional networkidle wait and settle delay. Returns the delay in seconds."""
+    if profile["networkidle"]:
+        try:
+            page.wait_for_load_state("networkidle")
+        except Exception:
+            pass
+    if profile["settle_ms"]:
+        page.wait_for_timeout(profile["settle_ms"])
+    return profile["settle_ms"] / 1000
+
+
+def run_and_wait_for_grid(page, logger, action, timeout_ms:int = 60000):
+    """Runs `action` and waits for the jqGrid XHR it triggers. Falls back silently if none comes."""
+    try:
+        with page.expect_response(is_grid_response, timeout=timeout_ms):
+            action()
+    except Exception as e:
+        logger.warning(f"⚠️ No grid response observed: {e}")
+
+
+def wait_for_search_results(page, logger, action, profile, timeout_ms:int = 60000):
+    """Runs the search `action` and waits until the grid response and paging info are in."""
+    start_time = time.time()
+    run_and_wait_for_grid(page, logger, action, timeout_ms)
+    wait_for_loader_to_disappear(page, logger, timeout_ms)
+    try:
+        page.wait_for_function(f"() => /view|no records/i.test(({PAGING_INFO_JS})())", timeout=timeout_ms)
+    except Exception:
+        logger.warning("⚠️ Paging info did not appear after search.")
+    settle_s = settle(page, profile)
+    record_wait("search", time.time() - start_time, settle_s)
+
+
+def click_next_page(page, logger, profile, timeout_ms:int = 60000):
+    """
+    Clicks the jqGrid Next button and waits for the new page's grid response, a changed
+    ui-paging-info text and the loader to go away. Returns False when Next is disabled or
+    the paging info never changed, i.e. the grid is still showing the previous page.
+    """
+    next_button = page.locator('td#next_pagingDiv')
+    if 'ui-state-disabled' in (next_button.get_attribute('class') or ''):
+        logger.info("▶ Next button is disabled, reached last page.")
+        return False
+
+    start_time = time.time()
+    previous_text = page.evaluate(PAGING_INFO_JS)
+    run_and_wait_for_grid(page, logger, next_button.click, timeout_ms)
+    changed = wait_for_page_change(page, logger, previous_text, timeout_ms)
+    settle_s = settle(page, profile)
+    record_wait("next_page", time.time() - start_time, settle_s)
+    return changed
+
+
+def grid_page(page):
+    """The results page the grid is on, or None when the grid does not say."""
+    current_page = page.evaluate(GRID_PAGE_JS)
+    return int(current_page) if current_page is not None else None
+
+
+def jump_to_page(page, logger, page_no, profile, skipped_pages:int = 0, timeout_ms:int = 60000):
+    """
+    Loads results page `page_no` directly through the jqGrid pager input box (or the grid's
+    page parameter when the box is missing) instead of clicking Next through earlier pages.
+    """
+    start_time = time.time()
+    previous_text = page.evaluate(PAGING_INFO_JS)
+    page_input = page.locator('#pagingDiv input.ui-pg-input')
+
+    def go_to_page():
+        if page_input.count() > 0:
+            page_input.fill(str(page_no))
+            page_input.press("Enter")
+        else:
+            page.evaluate("(n) => jQuery('#projectTable').jqGrid('setGridParam', {page: n}).trigger('reloadGrid')", page_no)
+
+    run_and_wait_for_grid(page, logger, go_to_page, timeout_ms)
+    wait_for_page_change(page, logger, previous_text, timeout_ms)
+    current_page = grid_page(page)
+    if current_page is not None and current_page != page_no:
+        raise Exception(f"Jump to page {page_no} landed on page {current_page}")
+    settle_s = settle(page, profile)
+    record_wait("jump", time.time() - start_time, settle_s, legacy_s=skipped_pages * LEGACY_SLEEPS["next_page"])
+    logger.info(f"▶ Jumped to page {page_no} ({skipped_pages} Next clicks avoided).")
+
+
+def wait_for_page_change(page, logger, previous_text, timeout_ms:int = 60000):
+    """Waits for ui-paging-info to change and for both loaders to go away. Returns whether it changed."""
+    try:
+        page.wait_for_function(
+            f"(previous) => ({PAGING_INFO_JS})() !== previous",
+            arg=previous_text,
+            timeout=timeout_ms,
+        )
+        changed = True
+    except Exception:
+        logger.warning("⚠️ Paging info did not change after paging.")
+        changed = False
+    try:
+        page.wait_for_selector('div#load_projectTable', state='hidden', timeout=timeout_ms)  # jqGrid's own loader
+    except Exception:
+        pass
+    wait_for_loader_to_disappear(page, logger, timeout_ms)
+    return changed
+
+
+def wait_for_director_rows(page, logger, profile, timeout_ms:int = 60000):
+    """
+    Waits for the director list popup: loader gone and DirectorInfoTable rows attached.
+    This is the only wait for the rows; returns False when none appeared within `timeout_ms`.
+    """
+    start_time = time.time()
+    wait_for_loader_to_disappear(page, logger, timeout_ms)
+    try:
+        page.wait_for_selector("table#DirectorInfoTable tr.jqgrow", state="attached", timeout=timeout_ms)
+        rows_found = True
+    except Exception:
+        logger.warning("⚠️ Director rows did not appear.")
+        rows_found = False
+    settle_s = settle(page, profile)
+    record_wait("director", time.time() - start_time, settle_s)
+    return rows_found
+
+
+def wait_for_results_grid(page, logger, profile, timeout_ms:int = 60000):
+    """Waits until the search results grid has rows again (after go_back/reload)."""
+    start_time = time.time()
+    wait_for_loader_to_disappear(page, logger, timeout_ms)
+    page.wait_for_selector("table.ui-jqgrid-btable tr.jqgrow", state="attached", timeout=timeout_ms)
+    settle_s = settle(page, profile)
+    record_wait("back", time.time() - start_time, settle_s)
+
+
+def log_wait_savings(logger):
+    """Logs measured event-driven wait time per step and the fixed sleep time it replaced."""
+    with _stats_lock:
+        if not wait_stats:
+            return
+        total_saved = 0.0
+        for step, s in wait_stats.items():
+            total_saved += s["saved_s"]
+            logger.info(f"⏱ {step}: {s['count']} waits, {round(s['waited_s'], 1)}s waiting on signals, {round(s['saved_s'], 1)}s of fixed sleeps saved")
+        logger.info(f"⏱ Total fixed sleep time saved this run: {round(total_saved, 1)}s")
+        wait_stats.clear()